@@ -0,0 +1,169 @@
+"""Configuration and clients shared by the API and the batch jobs
+
+main.py builds the FastAPI app, the OpenAI client and every cache on import;
+this module only reads the environment and defines factories, so
+precompute_outfits.py and its worker processes can reach Supabase, the
+weather service and the outfit-of-the-day store without loading the app.
+"""
+import os
+import logging
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from supabase import create_client
+
+from .services.http_client import HttpClient
+from .services.weather_cache import WeatherCache
+from .services.daily_outfit_store import RedisDailyOutfitStore, SqliteDailyOutfitStore
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+# Environment variables with validation
+def get_required_env_var(var_name: str) -> str:
+    """Get required environment variable or raise error"""
+    value = os.getenv(var_name)
+    if not value:
+        raise ValueError(f"Missing required environment variable: {var_name}")
+    return value
+
+
+def get_optional_env_var(var_name: str, default: str = None) -> str:
+    """Get optional environment variable with fallback"""
+    return os.getenv(var_name, default)
+
+
+# Check if we're in development mode
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+IS_DEVELOPMENT = ENVIRONMENT == "development"
+
+if IS_DEVELOPMENT:
+    # In development, allow fallbacks for optional services
+    SUPABASE_URL = get_optional_env_var("SUPABASE_URL", "https://your-project.supabase.co")
+    SUPABASE_SERVICE_KEY = get_optional_env_var("SUPABASE_SERVICE_KEY", "your-service-key")
+    WEATHER_API_KEY = get_optional_env_var("WEATHER_API_KEY", None)
+else:
+    # In production, all variables are required
+    SUPABASE_URL = get_required_env_var("SUPABASE_URL")
+    SUPABASE_SERVICE_KEY = get_required_env_var("SUPABASE_SERVICE_KEY")
+    WEATHER_API_KEY = get_required_env_var("WEATHER_API_KEY")
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+
+# Outbound HTTP pool (weather, image downloads, RapidAPI)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+# Weather cache: fresh for WEATHER_CACHE_TTL, then served stale while refreshing
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_STALE = float(os.getenv("WEATHER_CACHE_STALE", "1800"))
+WEATHER_CACHE_GRID = float(os.getenv("WEATHER_CACHE_GRID", "0.1"))
+
+# Outfits of the day written by precompute_outfits.py: sqlite, redis or none
+OOTD_STORE = os.getenv("OOTD_STORE", "sqlite")
+OOTD_STORE_PATH = os.getenv("OOTD_STORE_PATH", "./data/daily_outfits.sqlite")
+
+
+def create_supabase_client():
+    if SUPABASE_URL != "https://your-project.supabase.co" and SUPABASE_SERVICE_KEY != "your-service-key":
+        return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    logger.warning("Supabase credentials not properly configured, some features may not work")
+    return None
+
+
+def create_daily_outfit_store():
+    try:
+        if OOTD_STORE == "redis":
+            return RedisDailyOutfitStore(host=REDIS_HOST, port=REDIS_PORT)
+        if OOTD_STORE == "sqlite":
+            return SqliteDailyOutfitStore(OOTD_STORE_PATH)
+    except Exception as e:
+        logger.warning(f"Outfit-of-the-day store unavailable, computing outfits live: {e}")
+    return None
+
+
+# Started and closed by whoever runs the event loop: the app lifespan or the batch job
+http_client = HttpClient(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_connections_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+    read_timeout=HTTP_TIMEOUT
+)
+
+weather_cache = WeatherCache(
+    ttl_seconds=WEATHER_CACHE_TTL,
+    stale_seconds=WEATHER_CACHE_STALE,
+    grid_degrees=WEATHER_CACHE_GRID
+)
+
+
+class WeatherResponse(BaseModel):
+    temp: Optional[float] = None
+    description: Optional[str] = None
+    icon: Optional[str] = None
+    error: Optional[str] = None
+
+
+async def fetch_weather_uncached(
+    city: str = "New York",
+    country: str = "US",
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> WeatherResponse:
+    """Fetch current weather from OpenWeatherMap"""
+    try:
+        # Check if weather API key is properly configured
+        if WEATHER_API_KEY is None:
+            logger.warning("Weather API key not properly configured, returning fallback data")
+            return WeatherResponse(
+                temp=72.0,
+                description="partly cloudy",
+                icon="02d"
+            )
+
+        if lat is not None and lon is not None:
+            url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&units=imperial&appid={WEATHER_API_KEY}"
+        else:
+            url = f"http://api.openweathermap.org/data/2.5/weather?q={city},{country}&units=imperial&appid={WEATHER_API_KEY}"
+
+        resp = await http_client.get(url)
+        resp.raise_for_status()
+        data = resp.json()
+
+        if "main" in data:
+            return WeatherResponse(
+                temp=data["main"]["temp"],
+                description=data["weather"][0]["description"],
+                icon=data["weather"][0]["icon"]
+            )
+
+        return WeatherResponse(error=data.get("message", "Could not fetch weather"))
+
+    except httpx.HTTPError as e:
+        logger.error(f"Weather API error: {e}")
+        return WeatherResponse(error="Weather service unavailable")
+    except Exception as e:
+        logger.error(f"Unexpected error in weather endpoint: {e}")
+        return WeatherResponse(error="Internal server error")
+
+
+async def fetch_weather(
+    city: str = "New York",
+    country: str = "US",
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> WeatherResponse:
+    """Get weather through the shared cache (coordinates are snapped to the cache grid)"""
+    if lat is not None and lon is not None:
+        lat, lon = weather_cache.snap(lat), weather_cache.snap(lon)
+    return await weather_cache.get(
+        weather_cache.key(city, country, lat, lon),
+        lambda: fetch_weather_uncached(city, country, lat, lon),
+        is_cacheable=lambda weather: weather.error is None
+    )
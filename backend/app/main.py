@@ -1,28 +1,52 @@
 from fastapi import FastAPI, UploadFile, File, Form, Body, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from openai import OpenAI
+from fastapi.responses import Response, StreamingResponse
+from openai import AsyncOpenAI
 import base64
 import json
-import re
 import os
-import requests
 import io
-from dotenv import load_dotenv
 import uuid
-from supabase import create_client
 from pydantic import BaseModel, Field
-from langchain_openai import OpenAIEmbeddings, OpenAI as LCOpenAI
-from langchain_community.vectorstores import Chroma
 import logging
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict
 import time
 import asyncio
-from datetime import datetime
-import random
-
-# Load environment variables
-load_dotenv()
+from datetime import date
+from contextlib import asynccontextmanager
+from .clients import (
+    IS_DEVELOPMENT, REDIS_HOST, REDIS_PORT, SUPABASE_SERVICE_KEY, SUPABASE_URL, WeatherResponse,
+    create_daily_outfit_store, create_supabase_client, fetch_weather, get_optional_env_var, get_required_env_var,
+    http_client, weather_cache
+)
+from .utils.image_validation import (
+    ImageUpload, ImageValidationError, archive_images, check_image, read_archive_image, read_image
+)
+from .services.chat_resources import ChatResources
+from .services.embedding_cache import EmbeddingCache
+from .services.upstream_limits import UpstreamLimiter
+from .services.http_client import NO_RETRY
+from .services.streaming import CHUNK_SIZE, TeeDropped, start_tee
+from .services.rate_limiter import InMemoryBackend, RateLimiter, RedisBackend
+from .services.conversation_store import ConversationStore, RedisConversationBackend
+from .services.wardrobe_repository import RedisWardrobeInvalidations, WardrobeRepository
+from .services.outfit_scoring import OCCASION_REQUIREMENTS, KeywordRanking
+from .services.batch_scoring import BatchRanking
+from .services.feature_cache import FeatureCache
+from .services.outfit_search import OutfitSearch, build_slots
+from .services.daily_outfit import (
+    DailyOutfitMemo, compose_outfit_of_the_day, daily_rng, wardrobe_fingerprint, weather_bucket, weather_inputs
+)
+from .services.image_preprocessing import ImagePreprocessor, PreparedImage
+from .services.describe_cache import DescribeCache
+from .services.describe_batch import DESCRIBE_PROMPT, TOKENS_PER_IMAGE, BatchDescriber, BatchImage, parse_description
+from .services.tryon_upstream import RapidApiTryOn, StubTryOn
+from .services.tryon_cache import TryOnResultCache
+from .services.tryon_jobs import FAILED, SUCCEEDED, LocalTryOnJobQueue, QueueFull, TryOnJob
+from .services.semantic_matching import HashingEmbedder, ItemEmbeddings, OccasionPrototypes, SemanticRanking
+from langchain_openai import OpenAIEmbeddings
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(
@@ -31,40 +55,96 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Environment variables with validation
-def get_required_env_var(var_name: str) -> str:
-    """Get required environment variable or raise error"""
-    value = os.getenv(var_name)
-    if not value:
-        raise ValueError(f"Missing required environment variable: {var_name}")
-    return value
-
-def get_optional_env_var(var_name: str, default: str = None) -> str:
-    """Get optional environment variable with fallback"""
-    return os.getenv(var_name, default)
-
-# Check if we're in development mode
-ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
-IS_DEVELOPMENT = ENVIRONMENT == "development"
-
 # Load environment variables with different requirements based on environment
+# (Supabase, weather and Redis settings are read in clients.py)
 if IS_DEVELOPMENT:
     # In development, allow fallbacks for optional services
-    SUPABASE_URL = get_optional_env_var("SUPABASE_URL", "https://your-project.supabase.co")
-    SUPABASE_SERVICE_KEY = get_optional_env_var("SUPABASE_SERVICE_KEY", "your-service-key")
     OPENAI_API_KEY = get_required_env_var("OPENAI_API_KEY")  # Still required for AI features
     RAPIDAPI_KEY = get_optional_env_var("RAPIDAPI_KEY", "your-rapidapi-key")
-    WEATHER_API_KEY = get_optional_env_var("WEATHER_API_KEY", None)
 else:
     # In production, all variables are required
-    SUPABASE_URL = get_required_env_var("SUPABASE_URL")
-    SUPABASE_SERVICE_KEY = get_required_env_var("SUPABASE_SERVICE_KEY")
     OPENAI_API_KEY = get_required_env_var("OPENAI_API_KEY")
     RAPIDAPI_KEY = get_required_env_var("RAPIDAPI_KEY")
-    WEATHER_API_KEY = get_required_env_var("WEATHER_API_KEY")
+
+VECTOR_DB_DIR = os.getenv("VECTOR_DB_DIR", "./fashion_advice_db")
+# "chroma" queries the persisted store directly, "numpy" loads it into an in-process index
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH") or None
+FEATURE_CACHE_SIZE = int(os.getenv("FEATURE_CACHE_SIZE", "50000"))
+FEATURE_CACHE_PATH = os.getenv("FEATURE_CACHE_PATH") or None
+# "keyword" scores items with the rule table, "semantic" by embedding similarity to occasion prototypes
+OUTFIT_MATCHING = os.getenv("OUTFIT_MATCHING", "keyword")
+# Embedder for semantic matching: "hashing" (deterministic, offline) or "openai"
+OUTFIT_EMBEDDER = os.getenv("OUTFIT_EMBEDDER", "hashing")
+
+# Uploads are downscaled to IMAGE_MAX_EDGE pixels and re-encoded (jpeg or webp) before vision calls
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1024"))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "jpeg")
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+# Processes for image decoding/encoding; 0 uses a thread instead
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+DESCRIBE_MODEL = "gpt-4o"
+# Describe results reused for the same photo or a near-duplicate (0 disables the cache);
+# the threshold is the pHash distance in bits, out of 64, still treated as the same photo
+DESCRIBE_CACHE_SIZE = int(os.getenv("DESCRIBE_CACHE_SIZE", "10000"))
+DESCRIBE_CACHE_THRESHOLD = int(os.getenv("DESCRIBE_CACHE_THRESHOLD", "6"))
+DESCRIBE_CACHE_PATH = os.getenv("DESCRIBE_CACHE_PATH") or None
+# Batch describe: images per request, images packed into one vision prompt (1 disables packing)
+# and vision prompts in flight per batch, within OPENAI_MAX_CONCURRENCY overall
+DESCRIBE_BATCH_MAX_IMAGES = int(os.getenv("DESCRIBE_BATCH_MAX_IMAGES", "50"))
+DESCRIBE_BATCH_PER_PROMPT = int(os.getenv("DESCRIBE_BATCH_PER_PROMPT", "4"))
+DESCRIBE_BATCH_CONCURRENCY = int(os.getenv("DESCRIBE_BATCH_CONCURRENCY", "4"))
+
+# Maximum concurrent in-flight calls per upstream service
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+
+RAPIDAPI_TIMEOUT = float(os.getenv("RAPIDAPI_TIMEOUT", "120"))
+# Concurrent calls to the RapidAPI try-on host, shared by the endpoint and the job workers
+RAPIDAPI_MAX_CONCURRENCY = int(os.getenv("RAPIDAPI_MAX_CONCURRENCY", "4"))
+
+# Try-on image generator: "rapidapi" or "stub" (offline, for tests and local development)
+TRYON_UPSTREAM = os.getenv("TRYON_UPSTREAM", "rapidapi")
+TRYON_STUB_DELAY = float(os.getenv("TRYON_STUB_DELAY", "2"))
+# Try-on result URLs remembered by input hash (0 disables the cache); image fingerprints reused per URL
+TRYON_CACHE_SIZE = int(os.getenv("TRYON_CACHE_SIZE", "10000"))
+TRYON_FINGERPRINT_TTL = float(os.getenv("TRYON_FINGERPRINT_TTL", "300"))
+# Background try-on jobs: worker tasks, queue bound and how long finished results are kept
+TRYON_WORKERS = int(os.getenv("TRYON_WORKERS", "4"))
+TRYON_QUEUE_SIZE = int(os.getenv("TRYON_QUEUE_SIZE", "100"))
+TRYON_JOB_TTL = float(os.getenv("TRYON_JOB_TTL", "3600"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients at startup and release them on shutdown"""
+    await http_client.start()
+    await tryon_jobs.start()
+    if wardrobe_invalidations is not None:
+        wardrobe_invalidations.start(drop_cached_wardrobe)
+    try:
+        chat_resources.open()
+    except Exception as e:
+        logger.error(f"Failed to initialize chat resources: {e}")
+    yield
+    await tryon_jobs.close()
+    chat_resources.close()
+    await http_client.close()
+    await rate_limiter.close()
+    conversation_store.close()
+    if wardrobe_invalidations is not None:
+        wardrobe_invalidations.close()
+    feature_cache.close()
+    image_preprocessor.close()
+    if describe_cache is not None:
+        describe_cache.close()
+    if daily_outfit_store is not None:
+        daily_outfit_store.close()
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="TryOn.AI API",
     description="AI-powered virtual wardrobe and styling platform",
     version="1.0.0",
@@ -76,28 +156,32 @@ app = FastAPI(
 security = HTTPBearer(auto_error=False)
 
 # Rate limiting
-class RateLimiter:
-    def __init__(self, max_requests: int = 100, window_seconds: int = 3600):
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self.requests = {}
-
-    def is_allowed(self, client_id: str) -> bool:
-        now = time.time()
-        if client_id not in self.requests:
-            self.requests[client_id] = []
-        
-        # Remove old requests
-        self.requests[client_id] = [req_time for req_time in self.requests[client_id] 
-                                  if now - req_time < self.window_seconds]
-        
-        if len(self.requests[client_id]) >= self.max_requests:
-            return False
-        
-        self.requests[client_id].append(now)
-        return True
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "3600"))
 
-rate_limiter = RateLimiter(max_requests=1000, window_seconds=3600)
+def create_rate_limit_backend():
+    """Shared Redis counters when configured so limits hold across workers"""
+    if RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RedisBackend(host=REDIS_HOST, port=REDIS_PORT)
+        except Exception as e:
+            logger.warning(f"Redis rate limit backend unavailable, using in-memory counters: {e}")
+    return InMemoryBackend()
+
+# Expensive endpoints get their own budget instead of sharing the default one
+rate_limiter = RateLimiter(
+    max_requests=int(os.getenv("RATE_LIMIT_DEFAULT", "1000")),
+    window_seconds=RATE_LIMIT_WINDOW,
+    backend=create_rate_limit_backend(),
+    scopes={
+        "virtual-try-on": (int(os.getenv("RATE_LIMIT_TRYON", "50")), RATE_LIMIT_WINDOW),
+        # Status polls, event streams and result downloads of try-on jobs
+        "virtual-try-on-jobs": (int(os.getenv("RATE_LIMIT_TRYON_JOBS", "3000")), RATE_LIMIT_WINDOW),
+        "describe-clothing": (int(os.getenv("RATE_LIMIT_DESCRIBE", "300")), RATE_LIMIT_WINDOW),
+        "describe-clothing-batch": (int(os.getenv("RATE_LIMIT_DESCRIBE_BATCH", "20")), RATE_LIMIT_WINDOW),
+        "chat": (int(os.getenv("RATE_LIMIT_CHAT", "500")), RATE_LIMIT_WINDOW)
+    }
+)
 
 # Logging middleware
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -129,13 +213,91 @@ app.add_middleware(
 )
 
 # Initialize clients
-if SUPABASE_URL != "https://your-project.supabase.co" and SUPABASE_SERVICE_KEY != "your-service-key":
-    supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+supabase = create_supabase_client()
+
+# Keyword features per item content, computed when an item is described or first loaded
+feature_cache = FeatureCache(max_entries=FEATURE_CACHE_SIZE, disk_path=FEATURE_CACHE_PATH)
+
+def create_outfit_embedder():
+    if OUTFIT_EMBEDDER == "openai":
+        return OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+    return HashingEmbedder()
+
+# Item embeddings for semantic matching, computed when an item is described or first loaded
+item_embeddings = ItemEmbeddings(create_outfit_embedder()) if OUTFIT_MATCHING == "semantic" else None
+
+@lru_cache(maxsize=1)
+def occasion_prototypes() -> OccasionPrototypes:
+    """Occasion embeddings, computed on first use"""
+    return OccasionPrototypes(item_embeddings.embedder)
+
+async def run_embedding(fn, *args):
+    """fn(*args) off the event loop; under the OpenAI limit when the embedder calls the API"""
+    if isinstance(item_embeddings.embedder, HashingEmbedder):
+        return await asyncio.to_thread(fn, *args)
+    async with upstream_limiter.limit("openai"):
+        return await asyncio.to_thread(fn, *args)
+
+def build_semantic_ranking(wardrobe_by_category: Dict[str, List[dict]]) -> SemanticRanking:
+    # Embeds the occasion prototypes on first use and any items not seen before
+    return SemanticRanking(wardrobe_by_category, item_embeddings, occasion_prototypes())
+
+# Wardrobe rows cached per user; the frontend calls /api/wardrobe/invalidate after edits
+wardrobe_repository = WardrobeRepository(
+    supabase,
+    ttl_seconds=float(os.getenv("WARDROBE_CACHE_TTL", "300")),
+    warmers=[feature_cache]
+)
+# "redis" broadcasts invalidations so every worker drops its copy, not only the one that got the request
+WARDROBE_CACHE_BACKEND = os.getenv("WARDROBE_CACHE_BACKEND", "memory")
+wardrobe_invalidations = (
+    RedisWardrobeInvalidations(host=REDIS_HOST, port=REDIS_PORT) if WARDROBE_CACHE_BACKEND == "redis" else None
+)
+# Wardrobes at least this large are scored against all occasions with one matrix product
+OUTFIT_BATCH_MIN_ITEMS = int(os.getenv("OUTFIT_BATCH_MIN_ITEMS", "200"))
+# Time budget of the whole-outfit search per occasion
+OUTFIT_SEARCH_BUDGET_MS = float(os.getenv("OUTFIT_SEARCH_BUDGET_MS", "50"))
+
+client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+upstream_limiter = UpstreamLimiter({"openai": OPENAI_MAX_CONCURRENCY, "rapidapi": RAPIDAPI_MAX_CONCURRENCY})
+
+if TRYON_UPSTREAM == "stub":
+    tryon_upstream = StubTryOn(delay_seconds=TRYON_STUB_DELAY)
 else:
-    logger.warning("Supabase credentials not properly configured, some features may not work")
-    supabase = None
+    tryon_upstream = RapidApiTryOn(http_client, RAPIDAPI_KEY, upstream_limiter, timeout=RAPIDAPI_TIMEOUT)
+
+image_preprocessor = ImagePreprocessor(
+    max_edge=IMAGE_MAX_EDGE,
+    image_format=IMAGE_FORMAT,
+    quality=IMAGE_QUALITY,
+    workers=IMAGE_WORKERS
+)
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+describe_cache = DescribeCache(
+    max_entries=DESCRIBE_CACHE_SIZE,
+    threshold=DESCRIBE_CACHE_THRESHOLD,
+    model=DESCRIBE_MODEL,
+    disk_path=DESCRIBE_CACHE_PATH
+) if DESCRIBE_CACHE_SIZE > 0 else None
+
+tryon_cache = TryOnResultCache(
+    http_client,
+    max_entries=TRYON_CACHE_SIZE,
+    fingerprint_ttl=TRYON_FINGERPRINT_TTL
+) if TRYON_CACHE_SIZE > 0 else None
+
+# Embeddings, LLM and vector store for /chat, opened once in the app lifespan
+chat_resources = ChatResources(
+    openai_api_key=OPENAI_API_KEY,
+    persist_directory=VECTOR_DB_DIR,
+    retrieval_backend=VECTOR_BACKEND,
+    embedding_cache=EmbeddingCache(
+        max_entries=EMBEDDING_CACHE_SIZE,
+        ttl_seconds=EMBEDDING_CACHE_TTL,
+        disk_path=EMBEDDING_CACHE_PATH
+    ) if EMBEDDING_CACHE_SIZE > 0 else None
+)
 
 # Pydantic models for request/response validation
 class WeatherRequest(BaseModel):
@@ -144,12 +306,6 @@ class WeatherRequest(BaseModel):
     lat: Optional[float] = None
     lon: Optional[float] = None
 
-class WeatherResponse(BaseModel):
-    temp: Optional[float] = None
-    description: Optional[str] = None
-    icon: Optional[str] = None
-    error: Optional[str] = None
-
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=1000)
     user_id: Optional[str] = Field(None, min_length=1)
@@ -161,28 +317,14 @@ class ChatResponse(BaseModel):
     conversation_id: Optional[str] = None
 
 # Utility functions
-def validate_image_file(file: UploadFile) -> bool:
-    """Validate uploaded image file"""
-    allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/webp"]
-    max_size = 10 * 1024 * 1024  # 10MB
-    
-    # Handle WebP files that might be detected as application/octet-stream
-    if file.content_type == "application/octet-stream":
-        # Check file extension
-        if file.filename and file.filename.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-            file.content_type = "image/jpeg" if file.filename.lower().endswith(('.jpg', '.jpeg')) else "image/png" if file.filename.lower().endswith('.png') else "image/webp"
-    
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail=f"Invalid file type: {file.content_type}. Only JPEG, PNG, and WebP are allowed.")
-    
-    # Read file content to check size
-    content = file.file.read()
-    file.file.seek(0)  # Reset file pointer
-    
-    if len(content) > max_size:
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
-    
-    return True
+def validate_image_file(file: UploadFile, read: bool = False) -> ImageUpload:
+    """Validate an uploaded image by its magic bytes and size; read=True also loads it, once"""
+    try:
+        if read:
+            return read_image(file.file, file.filename, file.content_type)
+        return check_image(file.file, file.filename, file.content_type)
+    except ImageValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 def get_client_id(request: Request) -> str:
     """Get client identifier for rate limiting"""
@@ -200,43 +342,47 @@ async def get_weather(
     """Get weather information for outfit suggestions"""
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.is_allowed(client_id):
+    if not await rate_limiter.is_allowed(client_id):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
-    try:
-        # Check if weather API key is properly configured
-        if WEATHER_API_KEY is None:
-            logger.warning("Weather API key not properly configured, returning fallback data")
-            return WeatherResponse(
-                temp=72.0,
-                description="partly cloudy",
-                icon="02d"
-            )
-        
-        if lat is not None and lon is not None:
-            url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&units=imperial&appid={WEATHER_API_KEY}"
-        else:
-            url = f"http://api.openweathermap.org/data/2.5/weather?q={city},{country}&units=imperial&appid={WEATHER_API_KEY}"
-        
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        
-        if "main" in data:
-            return WeatherResponse(
-                temp=data["main"]["temp"],
-                description=data["weather"][0]["description"],
-                icon=data["weather"][0]["icon"]
-            )
-        
-        return WeatherResponse(error=data.get("message", "Could not fetch weather"))
-        
-    except requests.RequestException as e:
-        logger.error(f"Weather API error: {e}")
-        return WeatherResponse(error="Weather service unavailable")
-    except Exception as e:
-        logger.error(f"Unexpected error in weather endpoint: {e}")
-        return WeatherResponse(error="Internal server error")
+    return await fetch_weather(city, country, lat, lon)
+
+def check_describe_configured():
+    if OPENAI_API_KEY == "your_openai_api_key_here":
+        logger.warning("OpenAI API key not properly configured")
+        raise HTTPException(
+            status_code=503, 
+            detail="AI service not configured. Please set OPENAI_API_KEY in your environment variables."
+        )
+
+async def vision_describe(images: List[PreparedImage], prompt: str, max_tokens: int) -> str:
+    """One vision call over the prompt and images, each image after an "Image n:" label when there are several"""
+    content = [{"type": "text", "text": prompt}]
+    for number, image in enumerate(images, 1):
+        if len(images) > 1:
+            content.append({"type": "text", "text": f"Image {number}:"})
+        img_b64 = base64.b64encode(image.data).decode()
+        content.append({"type": "image_url", "image_url": {"url": f"data:{image.content_type};base64,{img_b64}"}})
+
+    async with upstream_limiter.limit("openai"):
+        response = await client.chat.completions.create(
+            model=DESCRIBE_MODEL,
+            messages=[{"role": "user", "content": content}],
+            max_tokens=max_tokens,
+            temperature=0.3
+        )
+    content = response.choices[0].message.content.strip()
+    logger.info(f"LLM RAW OUTPUT: '{content}'")
+    return content
+
+async def warm_described_items(items: List[dict]):
+    """Precompute item features; the saved items will hit them by content hash"""
+    feature_cache.warm(items)
+    if item_embeddings is not None:
+        try:
+            await run_embedding(item_embeddings.warm, items)
+        except Exception as e:
+            logger.warning(f"Failed to embed described item: {e}")
 
 @app.post("/describe-clothing")
 async def describe_clothing(
@@ -246,84 +392,38 @@ async def describe_clothing(
     """Describe clothing item using AI vision"""
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.is_allowed(client_id):
+    if not await rate_limiter.is_allowed(client_id, "describe-clothing"):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
     try:
-        # Validate image
-        validate_image_file(image)
+        # Validate image and read it, once
+        upload = validate_image_file(image, read=True)
         
         # Check if OpenAI API key is properly configured
-        if OPENAI_API_KEY == "your_openai_api_key_here":
-            logger.warning("OpenAI API key not properly configured")
-            raise HTTPException(
-                status_code=503, 
-                detail="AI service not configured. Please set OPENAI_API_KEY in your environment variables."
-            )
-        
-        # Read image data
-        img_bytes = await image.read()
-        img_b64 = base64.b64encode(img_bytes).decode()
-
-        # Prepare prompt for clothing description
-        prompt = """
-        Analyze this clothing item and provide a detailed description in JSON format.
-        Return ONLY a JSON object with these fields:
-        - item_name: A concise name for the clothing item
-        - description: A detailed description including color, style, material, fit, and any notable features
-        - category: One of these categories: "Tops", "Bottoms", "Dresses", "Outerwear", "Shoes", "Accessories"
-        
-        Focus on fashion-relevant details that would help someone understand what this item looks like.
-        Choose the most appropriate category based on the item type.
-        """
-        
-        # Call OpenAI Vision API
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-            {
-                "role": "user",
-                "content": [
-                        {"type": "text", "text": prompt},
-                    {
-                        "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{img_b64}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=300,
-            temperature=0.3
-        )
-        
-        # Parse response
-        content = response.choices[0].message.content.strip()
-        logger.info(f"LLM RAW OUTPUT: '{content}'")
+        check_describe_configured()
         
-        # Try to extract JSON from response
+        # The model doesn't need full resolution to describe a garment; smaller is faster and cheaper
         try:
-            # Look for JSON in the response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-            else:
-                # If no JSON found, create a structured response
-                result = {
-                    "item_name": "Clothing Item",
-                    "description": content
-                }
-            
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
-            # Return a fallback response
-            return {
-                "item_name": "Clothing Item",
-                "description": content
-            }
+            prepared = await image_preprocessor.prepare(upload.data)
+        except Exception as e:
+            logger.warning(f"Image preprocessing failed, sending the original: {e}")
+            prepared = PreparedImage(bytes(upload.data), upload.content_type, 0, 0, upload.size)
+
+        # The same garment photo, re-uploaded or re-compressed, gets the same description
+        if describe_cache is not None:
+            cached = describe_cache.get(prepared.phash, prepared.dhash, prepared.color)
+            if cached is not None:
+                return cached
+
+        content = await vision_describe([prepared], DESCRIBE_PROMPT, TOKENS_PER_IMAGE)
+        result, parsed = parse_description(content)
+
+        if isinstance(result, dict):
+            # Only real model answers; the raw-text fallback is worth retrying
+            if describe_cache is not None and parsed and result.get("item_name"):
+                describe_cache.put(prepared.phash, prepared.dhash, prepared.color, result)
+            await warm_described_items([result])
+        return result
             
     except HTTPException:
         raise
@@ -331,8 +431,104 @@ async def describe_clothing(
         logger.error(f"Error in describe-clothing: {e}")
         raise HTTPException(status_code=500, detail="Failed to process image")
 
-# Add this global variable for conversation storage (in production, use Redis or database)
-conversation_store: Dict[str, List[Dict[str, str]]] = {}
+def batch_upload_loader(file: UploadFile):
+    return lambda: read_image(file.file, file.filename, file.content_type)
+
+def batch_archive_loader(archive, info):
+    return lambda: read_archive_image(archive, info)
+
+@app.post("/describe-clothing/batch")
+async def describe_clothing_batch(
+    request: Request,
+    images: List[UploadFile] = File(default=[]),
+    archive: Optional[UploadFile] = File(None)
+):
+    """Describe many clothing items, from image uploads and/or a zip, streaming one NDJSON line per item
+
+    Lines come in completion order, each with the item's position in the
+    batch ("index", uploads first, then the archive's files in order) and
+    either "item" or "error"; a final {"done": true, ...} line summarises.
+    """
+    client_id = get_client_id(request)
+    if not await rate_limiter.is_allowed(client_id, "describe-clothing-batch"):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    check_describe_configured()
+
+    loaders = [(file.filename, batch_upload_loader(file)) for file in images]
+    zip_file = None
+    if archive is not None:
+        try:
+            zip_file, entries = archive_images(archive.file, DESCRIBE_BATCH_MAX_IMAGES)
+        except ImageValidationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        loaders.extend((info.filename, batch_archive_loader(zip_file, info)) for info in entries)
+    if not loaders:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if len(loaders) > DESCRIBE_BATCH_MAX_IMAGES:
+        if zip_file is not None:
+            zip_file.close()
+        raise HTTPException(status_code=400, detail=f"Too many images. Maximum is {DESCRIBE_BATCH_MAX_IMAGES} per batch.")
+
+    batch = [BatchImage(index, filename, load) for index, (filename, load) in enumerate(loaders)]
+    describer = BatchDescriber(
+        image_preprocessor.prepare,
+        vision_describe,
+        cache=describe_cache,
+        images_per_prompt=DESCRIBE_BATCH_PER_PROMPT,
+        max_prompts=DESCRIBE_BATCH_CONCURRENCY,
+        max_preparing=max(1, IMAGE_WORKERS) * 2
+    )
+
+    async def lines():
+        described, counts = [], {"described": 0, "cached": 0, "failed": 0}
+        try:
+            async for event in describer.run(batch):
+                if "error" in event:
+                    counts["failed"] += 1
+                elif event["cached"]:
+                    counts["cached"] += 1
+                else:
+                    counts["described"] += 1
+                    if isinstance(event["item"], dict):
+                        described.append(event["item"])
+                yield json.dumps(event) + "\n"
+            if described:
+                await warm_described_items(described)
+            yield json.dumps({"done": True, "images": len(batch), **counts}) + "\n"
+        finally:
+            if zip_file is not None:
+                zip_file.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# Conversation memory: bounded in-process LRU, optionally backed by Redis for multi-worker deployments
+CONVERSATION_BACKEND = os.getenv("CONVERSATION_BACKEND", "memory")
+
+def create_conversation_backend():
+    if CONVERSATION_BACKEND == "redis":
+        try:
+            return RedisConversationBackend(host=REDIS_HOST, port=REDIS_PORT)
+        except Exception as e:
+            logger.warning(f"Redis conversation backend unavailable, keeping conversations in memory: {e}")
+    return None
+
+conversation_store = ConversationStore(
+    max_conversations=int(os.getenv("CONVERSATION_MAX", "10000")),
+    ttl_seconds=int(os.getenv("CONVERSATION_TTL", "86400")),
+    max_turns=10,
+    max_bytes=int(os.getenv("CONVERSATION_MAX_MB", "64")) * 1024 * 1024,
+    backend=create_conversation_backend()
+)
+
+def build_wardrobe_context(wardrobe_items: List[dict]) -> str:
+    """Wardrobe section of the chat prompt"""
+    if not wardrobe_items:
+        return "\n\nYour wardrobe appears to be empty. You can add items using the 'Add Item' feature."
+    lines = [
+        f"- {item.get('item_name', 'Unknown')} ({item.get('category', 'Uncategorized')}): {item.get('description', 'No description')}\n"
+        for item in wardrobe_items
+    ]
+    return "\n\nYour Wardrobe Items:\n" + "".join(lines)
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(
@@ -342,7 +538,7 @@ async def chat(
     """Chat with AI fashion assistant with conversation context"""
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.is_allowed(client_id):
+    if not await rate_limiter.is_allowed(client_id, "chat"):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
     try:
@@ -350,62 +546,46 @@ async def chat(
         conversation_id = chat_request.conversation_id or str(uuid.uuid4())
         
         # Get conversation history
-        conversation_history = conversation_store.get(conversation_id, [])
+        conversation_history = await asyncio.to_thread(conversation_store.get, conversation_id)
         
         # Get user's actual wardrobe data from database
         user_wardrobe_context = ""
         if chat_request.user_id:
             try:
                 # Query the user's actual wardrobe items
-                wardrobe_response = supabase.table("wardrobe").select("item_name, description, category").eq("user_id", chat_request.user_id).execute()
-                
-                if wardrobe_response.data:
-                    user_wardrobe_context = "\n\nYour Wardrobe Items:\n"
-                    for item in wardrobe_response.data:
-                        user_wardrobe_context += f"- {item.get('item_name', 'Unknown')} ({item.get('category', 'Uncategorized')}): {item.get('description', 'No description')}\n"
-                else:
-                    user_wardrobe_context = "\n\nYour wardrobe appears to be empty. You can add items using the 'Add Item' feature."
+                # Rendered once per fetched wardrobe and reused until it changes
+                user_wardrobe_context = wardrobe_repository.derived(
+                    chat_request.user_id, "chat_context", build_wardrobe_context
+                )
             except Exception as e:
                 logger.error(f"Error fetching user wardrobe: {e}")
                 user_wardrobe_context = "\n\nUnable to access your wardrobe data at the moment."
         
-        # Initialize vector store for general fashion knowledge context
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-
-        # Check if the vector store directory exists, if not create it
-        persist_directory = "./fashion_advice_db"
-        if not os.path.exists(persist_directory):
-            os.makedirs(persist_directory)
-
-        # Initialize LLM with specific model
-        llm = LCOpenAI(
-            openai_api_key=OPENAI_API_KEY,
-            model_name="gpt-3.5-turbo-instruct",  # Use a specific, reliable model
-            temperature=0.7,
-            max_tokens=800,
-            request_timeout=30  # Add timeout to prevent hanging
-        )
+        if not chat_resources.ready:
+            raise RuntimeError("Chat resources are not initialized")
+
+        # Pick up a rebuilt knowledge base without restarting the worker; reopens in the background
+        chat_resources.reload_if_changed()
 
         # Try to use vector store for additional context, but don't fail if it's empty
         general_context = ""
-        try:
-            vectorstore = Chroma(
-                persist_directory=persist_directory,
-                embedding_function=embeddings
-            )
-            docs = vectorstore.similarity_search(chat_request.message, k=3)
-            if docs:
-                general_context = "\n".join([doc.page_content for doc in docs])
-        except Exception as ve:
-            logger.warning(f"Vector store not available, proceeding without it: {ve}")
-            general_context = ""
+        vectorstore = chat_resources.vectorstore
+        if vectorstore is not None:
+            try:
+                # Chroma and the embedding client are synchronous; keep them off the event loop
+                docs = await asyncio.to_thread(vectorstore.similarity_search, chat_request.message, 3)
+                if docs:
+                    general_context = "\n".join([doc.page_content for doc in docs])
+            except Exception as ve:
+                logger.warning(f"Vector store search failed, proceeding without it: {ve}")
+                general_context = ""
         
         # Build conversation context
         conversation_context = ""
         if conversation_history:
             conversation_context = "\n\nPrevious conversation:\n"
-            for msg in conversation_history[-5:]:  # Keep last 5 messages for context
-                conversation_context += f"User: {msg['user']}\nAssistant: {msg['assistant']}\n"
+            for turn in conversation_history[-5:]:  # Keep last 5 messages for context
+                conversation_context += f"User: {turn.user}\nAssistant: {turn.assistant}\n"
         
         prompt = f"""
         You are a helpful AI fashion assistant. Use this context to provide accurate fashion advice:
@@ -431,21 +611,12 @@ async def chat(
         If the user is asking a follow-up question, reference the previous conversation context.
         """
         
-        response = llm.invoke(prompt)
+        async with upstream_limiter.limit("openai"):
+            response = await chat_resources.llm.ainvoke(prompt)
         response_text = response.strip()
         
-        # Store conversation in memory
-        conversation_history.append({
-            "user": chat_request.message,
-            "assistant": response_text,
-            "timestamp": str(datetime.now())
-        })
-        
-        # Keep only last 10 messages to prevent memory bloat
-        if len(conversation_history) > 10:
-            conversation_history = conversation_history[-10:]
-        
-        conversation_store[conversation_id] = conversation_history
+        # Store the turn (the store keeps only the last 10 per conversation)
+        await asyncio.to_thread(conversation_store.append, conversation_id, chat_request.message, response_text)
         
         return ChatResponse(
             response=response_text,
@@ -461,262 +632,291 @@ async def chat(
 
 
 
+def check_tryon_configured():
+    """503 unless the try-on generator has the credentials it needs"""
+    if TRYON_UPSTREAM == "stub":
+        return
+    # Check if OpenAI API key is properly configured
+    if OPENAI_API_KEY == "your_openai_api_key_here":
+        logger.warning("OpenAI API key not properly configured")
+        raise HTTPException(
+            status_code=503, 
+            detail="AI service not configured. Please set OPENAI_API_KEY in your environment variables."
+        )
+    
+    # Check if RapidAPI key is properly configured
+    if not RAPIDAPI_KEY or RAPIDAPI_KEY == "your-rapidapi-key":
+        logger.warning("RapidAPI key not properly configured")
+        raise HTTPException(
+            status_code=503, 
+            detail="Virtual try-on service not configured. Please set RAPIDAPI_KEY in your environment variables."
+        )
+
+def resolve_tryon_inputs(user_id: str, clothing_item_id: Optional[str], clothing_item_name: Optional[str]):
+    """(user photo URL, clothing image URL, clothing item name) from the database"""
+    if supabase is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+
+    # Get user's photo URL from users table
+    user_response = supabase.table("users").select("photo_url").eq("id", user_id).execute()
+    if not user_response.data:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user_photo_url = user_response.data[0].get("photo_url")
+    if not user_photo_url:
+        raise HTTPException(status_code=400, detail="User photo not found. Please upload a photo first.")
+
+    # Resolve the clothing item within this user's wardrobe, by id when the client sends it
+    wardrobe_index = wardrobe_repository.search_index(user_id)
+    if clothing_item_id:
+        clothing_item = wardrobe_index.get(clothing_item_id)
+    else:
+        clothing_item = wardrobe_index.best_match(clothing_item_name)
+    
+    if clothing_item is None:
+        search_term = clothing_item_id or clothing_item_name
+        logger.error(f"Clothing item '{search_term}' not found among {len(wardrobe_index.items)} wardrobe items of user {user_id}")
+        raise HTTPException(status_code=404, detail=f"Clothing item '{search_term}' not found in wardrobe")
+    
+    clothing_image_url = clothing_item.get("image_url")
+    actual_description = clothing_item.get("description")
+    actual_item_name = clothing_item.get("item_name")
+    clothing_item_name = clothing_item_name or actual_item_name or "item"
+    if not clothing_image_url:
+        raise HTTPException(status_code=400, detail=f"Image not found for clothing item '{clothing_item_name}'")
+
+    logger.info(f"Found user photo URL: {user_photo_url}")
+    logger.info(f"Found clothing image URL: {clothing_image_url}")
+    logger.info(f"Matched clothing item: '{actual_item_name}' (description: '{actual_description}') for search term: '{clothing_item_name}'")
+    return user_photo_url, clothing_image_url, clothing_item_name
+
+def tryon_result_path(user_id: str, cache_key: Optional[str] = None) -> str:
+    """Storage path of a result; content-addressed when the inputs could be fingerprinted"""
+    # Use the existing folder structure: tryon-results/tryon-results/{user_id}/
+    filename = f"{cache_key[:32]}.jpg" if cache_key else f"{uuid.uuid4().hex[:8]}.jpg"
+    return f"tryon-results/{user_id}/{filename}"
+
+def tryon_public_url(file_path: str) -> str:
+    try:
+        public_url_response = supabase.storage.from_("tryon-results").get_public_url(file_path)
+        
+        # Handle different response formats
+        if hasattr(public_url_response, 'data') and hasattr(public_url_response.data, 'public_url'):
+            return public_url_response.data.public_url
+        if hasattr(public_url_response, 'public_url'):
+            return public_url_response.public_url
+        if isinstance(public_url_response, str):
+            return public_url_response
+    except Exception as url_error:
+        logger.warning(f"Failed to get public URL: {url_error}")
+    # Construct the URL manually if needed
+    return f"https://hcbkgzcpgahwbzmmlnzk.supabase.co/storage/v1/object/public/tryon-results/{file_path}"
+
+def record_tryon_history(
+    user_id: str,
+    clothing_item_name: str,
+    user_photo_url: str,
+    clothing_image_url: str,
+    result_image_url: str
+):
+    # Save to tryon_history table
+    history_data = {
+        "user_id": user_id,
+        "clothing_item_name": clothing_item_name,
+        "result_image_url": result_image_url,
+        "avatar_image_url": user_photo_url,
+        "clothing_image_url": clothing_image_url,
+        "created_at": "now()"
+    }
+    
+    supabase.table("tryon_history").insert(history_data).execute()
+
+async def store_tryon_result(
+    user_id: str,
+    clothing_item_name: str,
+    user_photo_url: str,
+    clothing_image_url: str,
+    file_path: str,
+    chunks: AsyncIterator[bytes],
+    cache_key: Optional[str] = None
+) -> str:
+    """Stream the result into the tryon-results bucket and record it in tryon_history; returns its public URL"""
+    # supabase-py only uploads whole byte strings, so the storage API is called directly
+    try:
+        response = await http_client.post(
+            f"{SUPABASE_URL}/storage/v1/object/tryon-results/{file_path}",
+            content=chunks,
+            headers={
+                "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+                "apikey": SUPABASE_SERVICE_KEY,
+                "Content-Type": "image/jpeg",
+                "x-upsert": "true"
+            },
+            retry=NO_RETRY
+        )
+    except TeeDropped:
+        # Raised from the request body, so the upload is cut off before it completes and nothing is stored
+        logger.warning(f"Abandoned upload of try-on result {file_path}: storage fell behind the stream")
+        raise
+    response.raise_for_status()
+    result_image_url = tryon_public_url(file_path)
+    
+    try:
+        await asyncio.to_thread(
+            record_tryon_history, user_id, clothing_item_name, user_photo_url, clothing_image_url, result_image_url
+        )
+        logger.info(f"Virtual try-on result saved to database for {clothing_item_name}")
+    except Exception as db_error:
+        logger.warning(f"Failed to save try-on result to database: {db_error}")
+    if cache_key is not None and tryon_cache is not None:
+        tryon_cache.put(cache_key, result_image_url)
+    return result_image_url
+
+# Uploads that outlive the request that started them
+tryon_uploads = set()
+
+def store_tryon_result_in_background(*args):
+    async def store():
+        try:
+            await store_tryon_result(*args)
+        except TeeDropped:
+            pass  # already logged
+        except Exception as e:
+            logger.warning(f"Failed to upload try-on result to storage: {e}")
+    
+    task = asyncio.create_task(store())
+    tryon_uploads.add(task)
+    task.add_done_callback(tryon_uploads.discard)
+
+async def find_tryon_result(user_id: str, user_photo_url: str, clothing_image_url: str):
+    """(cache key, storage path, URL of an already stored result or None)"""
+    cache_key = None
+    if tryon_cache is not None:
+        try:
+            cache_key = await tryon_cache.key(user_photo_url, clothing_image_url, tryon_upstream.model)
+        except Exception as e:
+            logger.warning(f"Could not fingerprint try-on inputs, skipping the result cache: {e}")
+    file_path = tryon_result_path(user_id, cache_key)
+    if cache_key is None:
+        return None, file_path, None
+    
+    cached_url = tryon_cache.get(cache_key)
+    # Another worker, or this one before a restart, may have produced it already
+    if cached_url is None and supabase is not None:
+        cached_url = await tryon_cache.find_stored(cache_key, tryon_public_url(file_path))
+    if cached_url is None:
+        tryon_cache.miss()
+    return cache_key, file_path, cached_url
+
+@asynccontextmanager
+async def stored_image(url: str):
+    """Chunks of an image in storage"""
+    async with http_client.stream("GET", url) as response:
+        response.raise_for_status()
+        yield response.aiter_bytes(CHUNK_SIZE)
+
+async def run_tryon_job(job: TryOnJob):
+    """The virtual try-on pipeline for a queued job"""
+    user_photo_url, clothing_image_url, clothing_item_name = await asyncio.to_thread(
+        resolve_tryon_inputs, job.user_id, job.params.get("clothing_item_id"), job.params.get("clothing_item_name")
+    )
+    cache_key, file_path, cached_url = await find_tryon_result(job.user_id, user_photo_url, clothing_image_url)
+    if cached_url is not None:
+        logger.info(f"Virtual try-on job {job.id} served from cache for {clothing_item_name}")
+        return None, cached_url
+    
+    try:
+        async with tryon_upstream.stream(user_photo_url, clothing_image_url) as chunks:
+            if supabase is None:
+                # Nowhere to keep the result but memory (offline development)
+                return b"".join([chunk async for chunk in chunks]), None
+            result_image_url = await store_tryon_result(
+                job.user_id, clothing_item_name, user_photo_url, clothing_image_url, file_path, chunks, cache_key
+            )
+    except Exception as api_error:
+        logger.error(f"RapidAPI error: {api_error}")
+        raise HTTPException(status_code=502, detail="Virtual try-on service failed, please try again")
+    logger.info(f"Virtual try-on job {job.id} completed for {clothing_item_name}")
+    return None, result_image_url
+
+# Submitted try-on jobs, processed by TRYON_WORKERS background tasks
+tryon_jobs = LocalTryOnJobQueue(
+    run_tryon_job,
+    workers=TRYON_WORKERS,
+    max_pending=TRYON_QUEUE_SIZE,
+    result_ttl=TRYON_JOB_TTL
+)
+
 @app.post("/virtual-try-on")
 async def virtual_try_on(
     request: Request,
     user_id: str = Form(...),
     avatar_image: UploadFile = File(...),
     clothing_image: UploadFile = File(...),
-    clothing_item_name: str = Form(...),
+    clothing_item_name: Optional[str] = Form(None),
+    clothing_item_id: Optional[str] = Form(None),
     as_image: str = Form("false")
 ):
     """Virtual try-on endpoint that combines user photo with clothing item"""
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.is_allowed(client_id):
+    if not await rate_limiter.is_allowed(client_id, "virtual-try-on"):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
+    if not clothing_item_id and not clothing_item_name:
+        raise HTTPException(status_code=400, detail="clothing_item_id or clothing_item_name is required")
+    
     try:
         # Validate both images
         validate_image_file(avatar_image)
         validate_image_file(clothing_image)
         
-        # Check if OpenAI API key is properly configured
-        if OPENAI_API_KEY == "your_openai_api_key_here":
-            logger.warning("OpenAI API key not properly configured")
-            raise HTTPException(
-                status_code=503, 
-                detail="AI service not configured. Please set OPENAI_API_KEY in your environment variables."
-            )
-        
-        # Check if RapidAPI key is properly configured
-        if not RAPIDAPI_KEY or RAPIDAPI_KEY == "your-rapidapi-key":
-            logger.warning("RapidAPI key not properly configured")
-            raise HTTPException(
-                status_code=503, 
-                detail="Virtual try-on service not configured. Please set RAPIDAPI_KEY in your environment variables."
-            )
+        check_tryon_configured()
         
         # Get the correct URLs from the database
-        if supabase is None:
-            raise HTTPException(status_code=503, detail="Database not configured")
-
         try:
-            # Get user's photo URL from users table
-            user_response = supabase.table("users").select("photo_url").eq("id", user_id).execute()
-            if not user_response.data:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            user_photo_url = user_response.data[0].get("photo_url")
-            if not user_photo_url:
-                raise HTTPException(status_code=400, detail="User photo not found. Please upload a photo first.")
-
-            # Get the selected clothing item's image URL from wardrobe table
-            # We need to find the clothing item by name - try multiple approaches
-            wardrobe_response = None
-            
-            # First try exact match on item_name
-            wardrobe_response = supabase.table("wardrobe").select("image_url, description, item_name").eq("item_name", clothing_item_name).execute()
-            
-            # If no exact match, try partial match on item_name
-            if not wardrobe_response.data:
-                wardrobe_response = supabase.table("wardrobe").select("image_url, description, item_name").ilike("item_name", f"%{clothing_item_name}%").execute()
-            
-            # If still no match, try matching key words in item_name
-            if not wardrobe_response.data:
-                # Split the clothing item name into words and search for any that match
-                words = clothing_item_name.lower().split()
-                for word in words:
-                    if len(word) > 3:  # Only search for words longer than 3 characters
-                        wardrobe_response = supabase.table("wardrobe").select("image_url, description, item_name").ilike("item_name", f"%{word}%").execute()
-                        if wardrobe_response.data:
-                            break
-            
-            # If still no match, try searching in description as fallback
-            if not wardrobe_response.data:
-                wardrobe_response = supabase.table("wardrobe").select("image_url, description, item_name").ilike("description", f"%{clothing_item_name}%").execute()
-            
-            # If still no match, get all wardrobe items for debugging
-            if not wardrobe_response.data:
-                all_items = supabase.table("wardrobe").select("item_name, description").execute()
-                logger.error(f"Clothing item '{clothing_item_name}' not found. Available items: {[{'item_name': item['item_name'], 'description': item['description']} for item in all_items.data]}")
-                raise HTTPException(status_code=404, detail=f"Clothing item '{clothing_item_name}' not found in wardrobe")
-            
-            clothing_image_url = wardrobe_response.data[0].get("image_url")
-            actual_description = wardrobe_response.data[0].get("description")
-            actual_item_name = wardrobe_response.data[0].get("item_name")
-            if not clothing_image_url:
-                raise HTTPException(status_code=400, detail=f"Image not found for clothing item '{clothing_item_name}'")
-
-            logger.info(f"Found user photo URL: {user_photo_url}")
-            logger.info(f"Found clothing image URL: {clothing_image_url}")
-            logger.info(f"Matched clothing item: '{actual_item_name}' (description: '{actual_description}') for search term: '{clothing_item_name}'")
-
-            # Download the images from the URLs
-            import httpx
-            
-            # Download user photo
-            async with httpx.AsyncClient() as client:
-                user_response = await client.get(user_photo_url)
-                user_response.raise_for_status()
-                avatar_bytes = user_response.content
-                
-                # Download clothing image
-                clothing_response = await client.get(clothing_image_url)
-                clothing_response.raise_for_status()
-                clothing_bytes = clothing_response.content
-
-            logger.info(f"Downloaded user photo: {len(avatar_bytes)} bytes")
-            logger.info(f"Downloaded clothing image: {len(clothing_bytes)} bytes")
-
+            user_photo_url, clothing_image_url, clothing_item_name = resolve_tryon_inputs(
+                user_id, clothing_item_id, clothing_item_name
+            )
+        except HTTPException:
+            raise
         except Exception as db_error:
             logger.error(f"Database error: {db_error}")
             raise HTTPException(status_code=500, detail="Failed to retrieve user or clothing data")
         
-        # Convert to base64
-        avatar_b64 = base64.b64encode(avatar_bytes).decode()
-        clothing_b64 = base64.b64encode(clothing_bytes).decode()
+        headers = {
+            "Content-Disposition": f"attachment; filename=tryon_{clothing_item_name}.jpg",
+            "X-Clothing-Item": clothing_item_name,
+            "X-User-ID": user_id,
+            "X-Fallback": "true"
+        }
+        
+        cache_key, file_path, cached_url = await find_tryon_result(user_id, user_photo_url, clothing_image_url)
+        if cached_url is not None:
+            try:
+                tee = await start_tee(stored_image(cached_url), 1)
+                logger.info(f"Virtual try-on for {clothing_item_name} served from cache")
+                return StreamingResponse(
+                    tee.branch(0),
+                    media_type="image/jpeg",
+                    headers={**headers, "X-Result-URL": cached_url, "X-Cache": "hit"}
+                )
+            except Exception as e:
+                logger.warning(f"Cached try-on result unavailable, generating it again: {e}")
+                tryon_cache.discard(cache_key)
         
         try:
-            # Use the correct RapidAPI virtual try-on service with /try-on-url endpoint
-            # This endpoint expects URLs, not file uploads, as shown in the manual test
-            url = "https://try-on-diffusion.p.rapidapi.com/try-on-url"
-            
-            # Prepare the payload with the correct URLs using form-urlencoded format
-            payload = f"avatar_image_url={user_photo_url}&clothing_image_url={clothing_image_url}"
-            
-            headers = {
-                'x-rapidapi-host': 'try-on-diffusion.p.rapidapi.com',
-                'x-rapidapi-key': RAPIDAPI_KEY,
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-            
-            logger.info(f"Sending request to RapidAPI /try-on-url")
-            logger.info(f"Avatar image URL: {user_photo_url}")
-            logger.info(f"Clothing image URL: {clothing_image_url}")
             logger.info(f"Clothing item name: {clothing_item_name}")
-            
-            response = requests.post(url, data=payload, headers=headers)
-            response.raise_for_status()
-            
-            logger.info(f"RapidAPI response status: {response.status_code}, content length: {len(response.content)}")
-            logger.info(f"RapidAPI response headers: {dict(response.headers)}")
-            
-            # Check if the response is actually an image
-            content_type = response.headers.get('content-type', '')
-            if 'image' not in content_type.lower():
-                logger.warning(f"RapidAPI returned non-image content: {content_type}")
-                # Try to parse as JSON to see what we got
-                try:
-                    error_data = response.json()
-                    logger.error(f"RapidAPI error response: {error_data}")
-                except:
-                    logger.error(f"RapidAPI returned non-JSON, non-image content: {response.text[:200]}")
-            
-            # The RapidAPI returns the image directly, not JSON
-            result_image_bytes = response.content
-            
-            # Validate that we actually got an image
-            if len(result_image_bytes) < 1000:  # Too small to be a real image
-                logger.error(f"RapidAPI returned suspiciously small response: {len(result_image_bytes)} bytes")
-                raise Exception("RapidAPI returned invalid response - too small to be an image")
-            
-            logger.info(f"RapidAPI returned valid virtual try-on result: {len(result_image_bytes)} bytes")
-            
-            # Save the generated image to Supabase storage if configured
-            result_image_url = None
-            if supabase is not None:
-                try:
-                    # Generate a unique filename
-                    import uuid
-                    filename = f"{uuid.uuid4().hex[:8]}.jpg"
-                    # Use the existing folder structure: tryon-results/tryon-results/{user_id}/
-                    file_path = f"tryon-results/{user_id}/{filename}"
-                    
-                    # Upload to Supabase storage
-                    upload_result = supabase.storage.from_("tryon-results").upload(
-                        file_path, 
-                        result_image_bytes,
-                        {"content-type": "image/jpeg"}
-                    )
-                    
-                    # Check if upload was successful (fix the error checking)
-                    if not hasattr(upload_result, 'error') or upload_result.error is None:
-                        # Get public URL - fix the response handling
-                        try:
-                            public_url_response = supabase.storage.from_("tryon-results").get_public_url(file_path)
-                            
-                            # Handle different response formats
-                            if hasattr(public_url_response, 'data') and hasattr(public_url_response.data, 'public_url'):
-                                result_image_url = public_url_response.data.public_url
-                            elif hasattr(public_url_response, 'public_url'):
-                                result_image_url = public_url_response.public_url
-                            elif isinstance(public_url_response, str):
-                                result_image_url = public_url_response
-                            else:
-                                # Construct the URL manually if needed
-                                result_image_url = f"https://hcbkgzcpgahwbzmmlnzk.supabase.co/storage/v1/object/public/tryon-results/{file_path}"
-                            
-                            # Save to tryon_history table
-                            history_data = {
-                                "user_id": user_id,
-                                "clothing_item_name": clothing_item_name,
-                                "result_image_url": result_image_url,
-                                "avatar_image_url": user_photo_url,
-                                "clothing_image_url": clothing_image_url,
-                                "created_at": "now()"
-                            }
-                            
-                            supabase.table("tryon_history").insert(history_data).execute()
-                            
-                            logger.info(f"Virtual try-on result saved to database for {clothing_item_name}")
-                        except Exception as url_error:
-                            logger.warning(f"Failed to get public URL: {url_error}")
-                            # Try to construct URL manually
-                            result_image_url = f"https://hcbkgzcpgahwbzmmlnzk.supabase.co/storage/v1/object/public/tryon-results/{file_path}"
-                            
-                            # Save to tryon_history table with manual URL
-                            history_data = {
-                                "user_id": user_id,
-                                "clothing_item_name": clothing_item_name,
-                                "result_image_url": result_image_url,
-                                "avatar_image_url": user_photo_url,
-                                "clothing_image_url": clothing_image_url,
-                                "created_at": "now()"
-                            }
-                            
-                            supabase.table("tryon_history").insert(history_data).execute()
-                            
-                            logger.info(f"Virtual try-on result saved to database for {clothing_item_name} with manual URL")
-                    else:
-                        logger.warning(f"Failed to upload try-on result to storage: {upload_result.error}")
-                        
-                except Exception as db_error:
-                    logger.warning(f"Failed to save try-on result to database: {db_error}")
-            
-            # Return the actual image data as a blob response
-            logger.info(f"Virtual try-on completed for {clothing_item_name} - returning {len(result_image_bytes)} bytes")
-            
-            # Return the image directly as a response
-            from fastapi.responses import Response
-            return Response(
-                content=result_image_bytes,
-                media_type="image/jpeg",
-                headers={
-                    "Content-Disposition": f"attachment; filename=tryon_{clothing_item_name}.jpg",
-                    "X-Clothing-Item": clothing_item_name,
-                    "X-User-ID": user_id,
-                    "X-Result-URL": result_image_url or "",
-                    "X-Fallback": "true"
-                }
+            # One pass over the upstream body feeds both the client and, when configured, storage
+            tee = await start_tee(
+                tryon_upstream.stream(user_photo_url, clothing_image_url),
+                2 if supabase is not None else 1
             )
-                
         except Exception as api_error:
             logger.error(f"RapidAPI error: {api_error}")
             # Fallback to a placeholder image
             fallback_image = base64.b64decode("/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAYEBQYFBAYGBQYHBwYIChAKCgkJChQODwwQFxQYGBcUFhYaHSUfGhsjHBYWICwgIyYnKSopGR8tMC0oMCUoKSj/2wBDAQcHBwoIChMKChMoGhYaKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCj/wAARCAABAAEDASIAAhEBAxEB/8QAFQABAQAAAAAAAAAAAAAAAAAAAAv/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAAAAX/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIRAxAAPwCdABmX/9k=")
             
-            from fastapi.responses import Response
             return Response(
                 content=fallback_image,
                 media_type="image/jpeg",
@@ -728,12 +928,142 @@ async def virtual_try_on(
                 }
             )
         
+        # Where the stored copy will be once the upload finishes
+        result_image_url = None
+        if supabase is not None:
+            result_image_url = tryon_public_url(file_path)
+            store_tryon_result_in_background(
+                user_id, clothing_item_name, user_photo_url, clothing_image_url, file_path, tee.branch(1), cache_key
+            )
+        
+        logger.info(f"Virtual try-on for {clothing_item_name} streaming to the client")
+        return StreamingResponse(
+            tee.branch(0),
+            media_type="image/jpeg",
+            headers={**headers, "X-Result-URL": result_image_url or "", "X-Cache": "miss"}
+        )
+        
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error in virtual try-on: {e}")
         raise HTTPException(status_code=500, detail="Failed to process virtual try-on request")
 
+@app.post("/virtual-try-on/jobs", status_code=202)
+async def submit_virtual_try_on(
+    request: Request,
+    user_id: str = Form(...),
+    avatar_image: UploadFile = File(...),
+    clothing_image: UploadFile = File(...),
+    clothing_item_name: Optional[str] = Form(None),
+    clothing_item_id: Optional[str] = Form(None)
+):
+    """Queue a virtual try-on and return its job id right away"""
+    # Rate limiting
+    client_id = get_client_id(request)
+    if not await rate_limiter.is_allowed(client_id, "virtual-try-on"):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    
+    if not clothing_item_id and not clothing_item_name:
+        raise HTTPException(status_code=400, detail="clothing_item_id or clothing_item_name is required")
+    
+    validate_image_file(avatar_image)
+    validate_image_file(clothing_image)
+    check_tryon_configured()
+    
+    try:
+        job = tryon_jobs.submit(user_id, {
+            "clothing_item_id": clothing_item_id,
+            "clothing_item_name": clothing_item_name
+        })
+    except QueueFull as e:
+        logger.warning(f"Rejected try-on job: {e}")
+        raise HTTPException(status_code=503, detail="Too many try-on requests in progress, please retry shortly")
+    
+    job_url = f"/virtual-try-on/jobs/{job.id}"
+    return {
+        **job.as_dict(),
+        "status_url": job_url,
+        "events_url": f"{job_url}/events",
+        "image_url": f"{job_url}/result"
+    }
+
+def get_tryon_job(job_id: str) -> TryOnJob:
+    job = tryon_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Try-on job not found or expired")
+    return job
+
+async def check_tryon_job_rate_limit(request: Request):
+    if not await rate_limiter.is_allowed(get_client_id(request), "virtual-try-on-jobs"):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+@app.get("/virtual-try-on/jobs/{job_id}")
+async def get_virtual_try_on_job(request: Request, job_id: str):
+    """Current status of a try-on job"""
+    await check_tryon_job_rate_limit(request)
+    return get_tryon_job(job_id).as_dict()
+
+@app.get("/virtual-try-on/jobs/{job_id}/events")
+async def stream_virtual_try_on_job(request: Request, job_id: str):
+    """Server-sent events with the job's status on every change, ending once it finishes"""
+    await check_tryon_job_rate_limit(request)
+    get_tryon_job(job_id)
+    
+    async def events():
+        async for state in tryon_jobs.updates(job_id):
+            if state is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: status\ndata: {json.dumps(state)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/virtual-try-on/jobs/{job_id}/result")
+async def get_virtual_try_on_result(request: Request, job_id: str):
+    """The finished job's image"""
+    await check_tryon_job_rate_limit(request)
+    job = get_tryon_job(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Try-on job is {job.status}")
+    clothing_item_name = job.params.get("clothing_item_name") or "item"
+    headers = {
+        "Content-Disposition": f"attachment; filename=tryon_{clothing_item_name}.jpg",
+        "X-Result-URL": job.result_url or ""
+    }
+    if job.result is not None:
+        return Response(content=job.result, media_type="image/jpeg", headers=headers)
+    try:
+        tee = await start_tee(stored_image(job.result_url), 1)
+    except Exception as e:
+        logger.error(f"Failed to read stored try-on result {job.result_url}: {e}")
+        raise HTTPException(status_code=502, detail="Try-on result is unavailable")
+    return StreamingResponse(tee.branch(0), media_type="image/jpeg", headers=headers)
+
+# Outfits of the day written by precompute_outfits.py (OOTD_STORE: sqlite, redis or none)
+daily_outfit_store = create_daily_outfit_store()
+# Outfits composed live, reused until the day, the wardrobe or the weather bucket changes
+daily_outfit_memo = DailyOutfitMemo()
+
+def get_precomputed_outfit(user_id: str, day: str, fingerprint: str, bucket: int) -> Optional[dict]:
+    """Today's precomputed outfit if it was made for this wardrobe and weather bucket"""
+    if daily_outfit_store is None:
+        return None
+    try:
+        entry = daily_outfit_store.get(user_id, day)
+    except Exception as e:
+        logger.warning(f"Outfit-of-the-day store read failed: {e}")
+        return None
+    if entry is None or entry.get("fingerprint") != fingerprint or entry.get("bucket") != bucket:
+        return None
+    return entry["outfit"]
+
 @app.get("/api/outfit-of-the-day")
 async def get_outfit_of_the_day(
     request: Request,
@@ -742,7 +1072,7 @@ async def get_outfit_of_the_day(
     """Get AI-generated outfit of the day based on user's wardrobe and weather"""
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.is_allowed(client_id):
+    if not await rate_limiter.is_allowed(client_id):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
     try:
@@ -759,10 +1089,11 @@ async def get_outfit_of_the_day(
                 "reasoning": "Service unavailable"
             }
         
+        day = date.today().isoformat()
         # Get user's actual wardrobe items
-        wardrobe_response = supabase.table("wardrobe").select("item_name, description, category, image_url").eq("user_id", user_id).execute()
+        wardrobe_items = wardrobe_repository.get_items(user_id)
         
-        if not wardrobe_response.data:
+        if not wardrobe_items:
             return {
                 "outfit": {
                     "top": "Add items to your wardrobe",
@@ -773,159 +1104,27 @@ async def get_outfit_of_the_day(
                 "reasoning": "No wardrobe items found"
             }
         
-        # Get weather for outfit suggestions
-        weather_response = await get_weather(request)
-        
-        if weather_response.error:
-            # Use default weather for outfit selection
-            temperature = 70  # Default to moderate temperature
-            description = "moderate"
-        else:
-            temperature = weather_response.temp
-            description = weather_response.description
-        
-        # Categorize wardrobe items
-        tops = [item for item in wardrobe_response.data if item.get('category') == 'Tops']
-        bottoms = [item for item in wardrobe_response.data if item.get('category') == 'Bottoms']
-        outerwear = [item for item in wardrobe_response.data if item.get('category') == 'Outerwear']
-        dresses = [item for item in wardrobe_response.data if item.get('category') == 'Dresses']
-        
-        # Smart outfit selection based on weather and available items
-        outfit = {}
-        outfit_details = {}
-        reasoning = []
-        
-        # Helper function to get random item from list
-        def get_random_item(items):
-            if not items:
-                return None
-            return items[random.randint(0, len(items) - 1)]
-        
-        # Temperature-based logic with randomization
-        if temperature < 50:  # Cold weather
-            if outerwear:
-                selected_outerwear = get_random_item(outerwear)
-                outfit['outerwear'] = selected_outerwear['item_name']
-                outfit_details['outerwear'] = {
-                    'name': selected_outerwear['item_name'],
-                    'image_url': selected_outerwear['image_url'],
-                    'description': selected_outerwear['description']
-                }
-                reasoning.append(f"It's chilly at {temperature}°F, so we've layered this outfit with your {selected_outerwear['item_name']} for warmth")
-            else:
-                outfit['outerwear'] = "Warm layer needed"
-                outfit_details['outerwear'] = None
-                reasoning.append(f"Cold weather detected but you don't have outerwear in your wardrobe yet")
-
-            if tops:
-                selected_top = get_random_item(tops)
-                outfit['top'] = selected_top['item_name']
-                outfit_details['top'] = {
-                    'name': selected_top['item_name'],
-                    'image_url': selected_top['image_url'],
-                    'description': selected_top['description']
-                }
-            else:
-                outfit['top'] = "Warm top needed"
-                outfit_details['top'] = None
-
-            if bottoms:
-                selected_bottom = get_random_item(bottoms)
-                outfit['bottom'] = selected_bottom['item_name']
-                outfit_details['bottom'] = {
-                    'name': selected_bottom['item_name'],
-                    'image_url': selected_bottom['image_url'],
-                    'description': selected_bottom['description']
-                }
-            else:
-                outfit['bottom'] = "Warm bottom needed"
-                outfit_details['bottom'] = None
-                
-        elif temperature < 70:  # Moderate weather
-            if tops:
-                selected_top = get_random_item(tops)
-                outfit['top'] = selected_top['item_name']
-                outfit_details['top'] = {
-                    'name': selected_top['item_name'],
-                    'image_url': selected_top['image_url'],
-                    'description': selected_top['description']
-                }
-                reasoning.append(f"Perfect {temperature}°F weather for your {selected_top['item_name']}")
-            else:
-                outfit['top'] = "Moderate weather top needed"
-                outfit_details['top'] = None
-
-            if bottoms:
-                selected_bottom = get_random_item(bottoms)
-                outfit['bottom'] = selected_bottom['item_name']
-                outfit_details['bottom'] = {
-                    'name': selected_bottom['item_name'],
-                    'image_url': selected_bottom['image_url'],
-                    'description': selected_bottom['description']
-                }
-            else:
-                outfit['bottom'] = "Moderate weather bottom needed"
-                outfit_details['bottom'] = None
-
-            if outerwear and temperature < 65:
-                selected_outerwear = get_random_item(outerwear)
-                outfit['outerwear'] = selected_outerwear['item_name']
-                outfit_details['outerwear'] = {
-                    'name': selected_outerwear['item_name'],
-                    'image_url': selected_outerwear['image_url'],
-                    'description': selected_outerwear['description']
-                }
-                reasoning.append(f"Added your {selected_outerwear['item_name']} for an extra layer")
-            else:
-                outfit['outerwear'] = "None needed"
-                outfit_details['outerwear'] = None
-                
-        else:  # Hot weather
-            if tops:
-                selected_top = get_random_item(tops)
-                outfit['top'] = selected_top['item_name']
-                outfit_details['top'] = {
-                    'name': selected_top['item_name'],
-                    'image_url': selected_top['image_url'],
-                    'description': selected_top['description']
-                }
-                reasoning.append(f"Warm {temperature}°F day calls for your {selected_top['item_name']}")
-            else:
-                outfit['top'] = "Light top needed"
-                outfit_details['top'] = None
-
-            if bottoms:
-                selected_bottom = get_random_item(bottoms)
-                outfit['bottom'] = selected_bottom['item_name']
-                outfit_details['bottom'] = {
-                    'name': selected_bottom['item_name'],
-                    'image_url': selected_bottom['image_url'],
-                    'description': selected_bottom['description']
-                }
-            else:
-                outfit['bottom'] = "Light bottom needed"
-                outfit_details['bottom'] = None
-
-            outfit['outerwear'] = "None needed"
-            outfit_details['outerwear'] = None
-            reasoning.append("No jacket needed in this warm weather")
-        
-        # Add weather context
-        weather_context = f"{temperature}°F, {description}"
-
-        # Create natural-sounding reasoning
-        reasoning_text = ". ".join(reasoning)
-        if reasoning_text and not reasoning_text.endswith('.'):
-            reasoning_text += "."
-
-        return {
-            "outfit": outfit,
-            "outfit_details": outfit_details,
-            "weather": weather_context,
-            "reasoning": reasoning_text,
-            "wardrobe_count": len(wardrobe_response.data),
-            "categories_available": list(set([item.get('category') for item in wardrobe_response.data if item.get('category')]))
-        }
+        # Get weather for outfit suggestions (moderate defaults if it is unavailable)
+        weather_response = await fetch_weather()
+        temperature, description = weather_inputs(weather_response)
+        
+        # Both come from caches: the repository's rows (refetched once their TTL
+        # expires) and the shared weather cache
+        fingerprint = wardrobe_repository.derived(user_id, "fingerprint", wardrobe_fingerprint)
+        bucket = weather_bucket(temperature)
+        memoized = daily_outfit_memo.get(user_id, day, fingerprint, bucket)
+        if memoized is not None:
+            return memoized
+        
+        # Skips composing when precompute_outfits.py already ran for this wardrobe and weather
+        outfit = get_precomputed_outfit(user_id, day, fingerprint, bucket)
+        if outfit is None:
+            # Seeded so every refresh today shows the same outfit until the wardrobe changes
+            outfit = compose_outfit_of_the_day(
+                wardrobe_items, temperature, description, rng=daily_rng(user_id, day, fingerprint)
+            )
+        daily_outfit_memo.put(user_id, day, fingerprint, bucket, outfit)
+        return outfit
         
     except Exception as e:
         logger.error(f"Error in outfit-of-the-day: {e}")
@@ -940,7 +1139,7 @@ async def get_tryon_history(
     """Get user's try-on history"""
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.is_allowed(client_id):
+    if not await rate_limiter.is_allowed(client_id):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
     try:
@@ -963,30 +1162,67 @@ async def get_user_wardrobe(user_id: str):
     """Get user's wardrobe items for chat integration"""
     try:
         # Get user's actual wardrobe items
-        wardrobe_response = supabase.table("wardrobe").select(
-            "id, item_name, description, category, image_url, date_added"
-        ).eq("user_id", user_id).execute()
-        
-        if not wardrobe_response.data:
-            return []
-        
-        return wardrobe_response.data
-        
+        return wardrobe_repository.get_items(user_id)
     except Exception as e:
         logger.error(f"Error fetching user wardrobe: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch wardrobe items")
 
+async def require_user(user_id: str, credentials: Optional[HTTPAuthorizationCredentials]):
+    """401 unless the bearer token is a valid Supabase session, 403 unless it belongs to user_id"""
+    if supabase is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        response = await asyncio.to_thread(supabase.auth.get_user, credentials.credentials)
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if response is None or response.user is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if response.user.id != user_id:
+        raise HTTPException(status_code=403, detail="Not allowed for this user")
+
+def drop_cached_wardrobe(user_id: str):
+    """Forget this worker's rows and everything derived from them"""
+    wardrobe_repository.invalidate(user_id)
+    daily_outfit_memo.invalidate(user_id)
+
+@app.post("/api/wardrobe/invalidate")
+async def invalidate_user_wardrobe(
+    request: Request,
+    user_id: str = Body(..., embed=True),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+):
+    """Drop the cached wardrobe after the client added, edited or removed items"""
+    # Rate limiting
+    client_id = get_client_id(request)
+    if not await rate_limiter.is_allowed(client_id):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    await require_user(user_id, credentials)
+    
+    drop_cached_wardrobe(user_id)
+    if wardrobe_invalidations is not None:
+        await asyncio.to_thread(wardrobe_invalidations.publish, user_id)
+    if daily_outfit_store is not None:
+        try:
+            # Today's precomputed outfit may name an item that no longer exists
+            daily_outfit_store.delete(user_id, date.today().isoformat())
+        except Exception as e:
+            logger.warning(f"Failed to drop precomputed outfit for user {user_id}: {e}")
+    return {"status": "ok"}
+
 @app.post("/api/outfit-suggestions")
 async def get_outfit_suggestions(
     request: Request,
     user_id: str = Body(..., embed=True),
     occasions: List[str] = Body(..., embed=True),
-    weather_consideration: bool = Body(True, embed=True)
+    weather_consideration: bool = Body(True, embed=True),
+    outfits_per_occasion: int = Body(1, embed=True, ge=1, le=10)
 ):
     """Get AI-powered outfit suggestions for specific occasions"""
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.is_allowed(client_id):
+    if not await rate_limiter.is_allowed(client_id):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
     try:
@@ -996,16 +1232,16 @@ async def get_outfit_suggestions(
             return {"suggestions": [], "error": "Service unavailable"}
         
         # Get user's actual wardrobe items
-        wardrobe_response = supabase.table("wardrobe").select("item_name, description, category, image_url").eq("user_id", user_id).execute()
+        wardrobe_items = wardrobe_repository.get_items(user_id)
         
-        if not wardrobe_response.data:
+        if not wardrobe_items:
             return {"suggestions": [], "error": "No wardrobe items found"}
         
         # Get weather if requested
         weather_context = ""
         if weather_consideration:
             try:
-                weather_response = await get_weather(request)
+                weather_response = await fetch_weather()
                 if not weather_response.error:
                     weather_context = f"Current weather: {weather_response.temp}°F, {weather_response.description}. "
             except Exception as e:
@@ -1014,140 +1250,60 @@ async def get_outfit_suggestions(
         
         # Categorize wardrobe items
         wardrobe_by_category = {}
-        for item in wardrobe_response.data:
+        for item in wardrobe_items:
             category = item.get('category', 'Uncategorized')
             if category not in wardrobe_by_category:
                 wardrobe_by_category[category] = []
             wardrobe_by_category[category].append(item)
         
-        # Define occasion-specific requirements
-        occasion_requirements = {
-            'business': {
-                'style': 'formal',
-                'required_categories': ['Tops', 'Bottoms'],
-                'optional_categories': ['Outerwear', 'Shoes'],
-                'color_preferences': ['neutral', 'professional'],
-                'description': 'Professional business attire suitable for meetings and office environments',
-                'inappropriate_items': ['shorts', 'jeans', 't-shirts', 'sweatshirts', 'cargo pants'],
-                'preferred_items': ['dress pants', 'slacks', 'chinos', 'button-down shirts', 'polo shirts', 'blazers']
-            },
-            'date': {
-                'style': 'elegant',
-                'required_categories': ['Tops', 'Bottoms'],
-                'optional_categories': ['Outerwear', 'Shoes', 'Accessories'],
-                'color_preferences': ['romantic', 'stylish'],
-                'description': 'Elegant and attractive outfit perfect for romantic evenings',
-                'inappropriate_items': ['shorts', 'cargo pants', 'sweatshirts', 'workout clothes'],
-                'preferred_items': ['dress pants', 'chinos', 'button-down shirts', 'polo shirts', 'blazers']
-            },
-            'casual': {
-                'style': 'comfortable',
-                'required_categories': ['Tops', 'Bottoms'],
-                'optional_categories': ['Outerwear', 'Shoes'],
-                'color_preferences': ['versatile', 'comfortable'],
-                'description': 'Comfortable and stylish casual wear for everyday activities',
-                'inappropriate_items': ['suit jackets', 'dress pants'],
-                'preferred_items': ['jeans', 'chinos', 'polo shirts', 't-shirts', 'sweatshirts']
-            },
-            'weekend': {
-                'style': 'relaxed',
-                'required_categories': ['Tops', 'Bottoms'],
-                'optional_categories': ['Outerwear', 'Shoes'],
-                'color_preferences': ['casual', 'comfortable'],
-                'description': 'Relaxed weekend wear for leisure activities and social gatherings',
-                'inappropriate_items': ['suit jackets', 'dress pants', 'formal shirts'],
-                'preferred_items': ['jeans', 'chinos', 'polo shirts', 't-shirts', 'sweatshirts']
-            },
-            'evening': {
-                'style': 'sophisticated',
-                'required_categories': ['Tops', 'Bottoms'],
-                'optional_categories': ['Outerwear', 'Shoes', 'Accessories'],
-                'color_preferences': ['elegant', 'dramatic'],
-                'description': 'Sophisticated evening wear for formal events and special occasions',
-                'inappropriate_items': ['shorts', 'cargo pants', 'sweatshirts', 'workout clothes'],
-                'preferred_items': ['dress pants', 'slacks', 'button-down shirts', 'polo shirts', 'blazers']
-            },
-            'workout': {
-                'style': 'athletic',
-                'required_categories': ['Tops', 'Bottoms'],
-                'optional_categories': ['Shoes', 'Accessories'],
-                'color_preferences': ['energetic', 'comfortable'],
-                'description': 'Performance athletic wear for gym workouts and physical activities',
-                'inappropriate_items': ['dress pants', 'blazers', 'formal shirts', 'dress shoes'],
-                'preferred_items': ['athletic shorts', 'workout pants', 'performance shirts', 'tank tops']
-            },
-            'travel': {
-                'style': 'versatile',
-                'required_categories': ['Tops', 'Bottoms'],
-                'optional_categories': ['Outerwear', 'Shoes'],
-                'color_preferences': ['versatile', 'comfortable'],
-                'description': 'Versatile travel wear that is comfortable and easy to mix and match',
-                'inappropriate_items': ['suit jackets', 'formal dress pants'],
-                'preferred_items': ['chinos', 'jeans', 'polo shirts', 'button-down shirts', 'blazers']
-            }
-        }
+        # Score the wardrobe once for every occasion below
+        if item_embeddings is not None:
+            ranking = await run_embedding(build_semantic_ranking, wardrobe_by_category)
+        elif len(wardrobe_items) >= OUTFIT_BATCH_MIN_ITEMS:
+            ranking = BatchRanking(wardrobe_by_category, feature_cache=feature_cache)
+        else:
+            ranking = KeywordRanking(wardrobe_by_category, feature_cache=feature_cache)
         
         suggestions = []
         
         for occasion_id in occasions:
-            if occasion_id not in occasion_requirements:
+            if occasion_id not in OCCASION_REQUIREMENTS:
                 continue
                 
-            req = occasion_requirements[occasion_id]
-            
-            # Create intelligent outfit combination
-            outfit_items = []
-            reasoning = []
-            style_tips = []
-            
-            # Select required items
-            for category in req['required_categories']:
-                if category in wardrobe_by_category and wardrobe_by_category[category]:
-                    # Pick the best item for this occasion
-                    best_item = select_best_item_for_occasion(
-                        wardrobe_by_category[category], 
-                        req['style'], 
-                        req['color_preferences'],
-                        req.get('inappropriate_items', []),
-                        req.get('preferred_items', [])
-                    )
-                    if best_item:
-                        outfit_items.append(best_item)
-                        reasoning.append(f"Selected {best_item['item_name']} for {category.lower()}")
+            req = OCCASION_REQUIREMENTS[occasion_id]
             
-            # Add optional items if available
-            for category in req['optional_categories']:
-                if category in wardrobe_by_category and wardrobe_by_category[category]:
-                    if len(outfit_items) < 4:  # Limit total items
-                        best_item = select_best_item_for_occasion(
-                            wardrobe_by_category[category], 
-                            req['style'], 
-                            req['color_preferences'],
-                            req.get('inappropriate_items', []),
-                            req.get('preferred_items', [])
-                        )
-                        if best_item:
-                            outfit_items.append(best_item)
-                            reasoning.append(f"Added {best_item['item_name']} for {category.lower()}")
+            # Search whole outfits: item scores plus how well the items' colours go together
+            slots = build_slots(ranking, occasion_id, req['required_categories'], req['optional_categories'])
+            outfits = OutfitSearch(k=outfits_per_occasion, budget_seconds=OUTFIT_SEARCH_BUDGET_MS / 1000).search(slots)
             
-            # Generate intelligent style tips
-            style_tips = generate_style_tips(req['style'], outfit_items, weather_context)
-            
-            # Create suggestion
-            if outfit_items:
-                suggestions.append({
-                    "id": f"{occasion_id}_{len(suggestions)}",
-                    "occasion": req['description'],
-                    "items": outfit_items,
-                    "reasoning": " | ".join(reasoning),
-                    "style_tips": style_tips,
-                    "style": req['style'],
-                    "weather_considered": weather_consideration
-                })
+            for outfit_score, outfit_items in outfits:
+                reasoning = []
+                for item in outfit_items:
+                    category = item.get('category', 'Uncategorized')
+                    if category in req['required_categories']:
+                        reasoning.append(f"Selected {item['item_name']} for {category.lower()}")
+                    else:
+                        reasoning.append(f"Added {item['item_name']} for {category.lower()}")
+                
+                # Generate intelligent style tips
+                style_tips = generate_style_tips(req['style'], outfit_items, weather_context)
+                
+                # Create suggestion
+                if outfit_items:
+                    suggestions.append({
+                        "id": f"{occasion_id}_{len(suggestions)}",
+                        "occasion": req['description'],
+                        "items": outfit_items,
+                        "reasoning": " | ".join(reasoning),
+                        "style_tips": style_tips,
+                        "style": req['style'],
+                        "score": round(float(outfit_score), 2),
+                        "weather_considered": weather_consideration
+                    })
         
         return {
             "suggestions": suggestions,
-            "wardrobe_count": len(wardrobe_response.data),
+            "wardrobe_count": len(wardrobe_items),
             "categories_available": list(wardrobe_by_category.keys())
         }
         
@@ -1155,149 +1311,6 @@ async def get_outfit_suggestions(
         logger.error(f"Error in outfit suggestions: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate outfit suggestions")
 
-def select_best_item_for_occasion(items: List[dict], style: str, color_preferences: List[str], inappropriate_items: List[str] = None, preferred_items: List[str] = None) -> Optional[dict]:
-    """Select the best item for a specific occasion and style"""
-    if not items:
-        return None
-    
-    # Score items based on style and color preferences
-    scored_items = []
-    for item in items:
-        score = 0
-        item_name = item.get('item_name', '').lower()
-        description = item.get('description', '').lower()
-        category = item.get('category', '').lower()
-        
-        # Style scoring with stronger penalties for inappropriate items
-        if style == 'formal':
-            # Strong positive scoring for formal items
-            if any(word in item_name or word in description for word in ['blazer', 'suit', 'dress', 'shirt', 'polo', 'button-down', 'oxford']):
-                score += 8  # Increased bonus for formal tops
-            elif any(word in item_name or word in description for word in ['dress pants', 'slacks', 'chinos', 'trousers', 'pants']):
-                score += 8  # Increased bonus for formal bottoms
-            elif any(word in item_name or word in description for word in ['pants', 'trousers']):
-                score += 5
-            
-            # Strong negative scoring for casual/inappropriate items
-            if any(word in item_name or word in description for word in ['shorts', 'jeans', 'sweatshirt', 'hoodie', 't-shirt', 'cargo', 'athletic', 'tank', 'sports']):
-                score -= 15  # Much stronger penalty for athletic/sports items
-            elif any(word in item_name or word in description for word in ['casual', 'relaxed', 'loose']):
-                score -= 8
-                
-        elif style == 'elegant':
-            # Similar to formal but with some flexibility
-            if any(word in item_name or word in description for word in ['blazer', 'suit', 'dress', 'shirt', 'polo', 'button-down']):
-                score += 4
-            elif any(word in item_name or word in description for word in ['dress pants', 'slacks', 'chinos', 'trousers']):
-                score += 4
-            elif any(word in item_name or word in description for word in ['pants', 'trousers']):
-                score += 2
-            
-            # Penalize very casual items
-            if any(word in item_name or word in description for word in ['shorts', 'cargo', 'sweatshirt', 'hoodie']):
-                score -= 8
-            elif any(word in item_name or word in description for word in ['jeans', 't-shirt']):
-                score -= 3
-                
-        elif style == 'casual':
-            # Good scoring for casual items
-            if any(word in item_name or word in description for word in ['jeans', 't-shirt', 'sweatshirt', 'hoodie', 'polo', 'shorts']):
-                score += 3
-            elif any(word in item_name or word in description for word in ['casual', 'relaxed', 'comfortable']):
-                score += 2
-            
-            # Slight penalty for very formal items
-            if any(word in item_name or word in description for word in ['suit', 'dress pants', 'blazer']):
-                score -= 2
-                
-        elif style == 'athletic':
-            # Strong positive scoring for athletic items
-            if any(word in item_name or word in description for word in ['gym', 'workout', 'athletic', 'sports', 'performance', 'moisture-wicking']):
-                score += 5
-            elif any(word in item_name or word in description for word in ['shorts', 'pants', 'shirt', 'tank']):
-                score += 2
-            
-            # Strong penalty for formal items
-            if any(word in item_name or word in description for word in ['blazer', 'suit', 'dress', 'dress pants']):
-                score -= 8
-                
-        elif style == 'comfortable':
-            # Good scoring for comfortable items
-            if any(word in item_name or description for word in ['comfortable', 'relaxed', 'soft', 'breathable']):
-                score += 3
-            elif any(word in item_name or description for word in ['cotton', 'blend', 'stretch']):
-                score += 1
-            
-            # Penalty for restrictive items
-            if any(word in item_name or description for word in ['tight', 'restrictive', 'stiff']):
-                score -= 3
-        
-        # Category-specific scoring for formal occasions
-        if style == 'formal' and category == 'bottoms':
-            # Strong preference for pants over shorts
-            if 'shorts' in item_name or 'shorts' in description:
-                score -= 15  # Very strong penalty for shorts in formal settings
-            elif 'pants' in item_name or 'pants' in description:
-                score += 8
-            elif 'dress' in item_name or 'dress' in description:
-                score += 10
-        
-        if style == 'formal' and category == 'tops':
-            # Strong preference for business-appropriate tops
-            if any(word in item_name or word in description for word in ['athletic', 'tank', 'sports', 'workout', 'gym']):
-                score -= 20  # Very strong penalty for athletic tops in formal settings
-            elif any(word in item_name or word in description for word in ['polo', 'shirt', 'button-down', 'oxford']):
-                score += 10  # Strong bonus for business-appropriate tops
-        
-        # Color preference scoring
-        if 'neutral' in color_preferences:
-            if any(word in item_name or word in description for word in ['black', 'white', 'gray', 'navy', 'beige', 'brown', 'charcoal']):
-                score += 3
-        if 'professional' in color_preferences:
-            if any(word in item_name or word in description for word in ['navy', 'black', 'gray', 'white', 'charcoal']):
-                score += 3
-        if 'romantic' in color_preferences:
-            if any(word in item_name or word in description for word in ['red', 'pink', 'purple', 'rose', 'burgundy']):
-                score += 2
-        if 'versatile' in color_preferences:
-            if any(word in item_name or word in description for word in ['black', 'white', 'gray', 'navy', 'beige']):
-                score += 2
-        
-        # Additional context-based scoring
-        if 'business' in item_name or 'business' in description:
-            if style == 'formal':
-                score += 3
-            elif style == 'casual':
-                score -= 1
-        
-        if 'casual' in item_name or 'casual' in description:
-            if style == 'formal':
-                score -= 3
-            elif style == 'casual':
-                score += 2
-        
-        # Use occasion-specific inappropriate and preferred items
-        if inappropriate_items:
-            for inappropriate in inappropriate_items:
-                if inappropriate.lower() in item_name or inappropriate.lower() in description:
-                    score -= 12  # Very strong penalty for inappropriate items
-        
-        if preferred_items:
-            for preferred in preferred_items:
-                if preferred.lower() in item_name or preferred.lower() in description:
-                    score += 8  # Strong bonus for preferred items
-        
-        scored_items.append((score, item))
-    
-    # Return the highest scored item
-    if scored_items:
-        scored_items.sort(key=lambda x: x[0], reverse=True)
-        # Log the scoring for debugging
-        logger.info(f"Item scoring for {style} style: {[(item['item_name'], score) for score, item in scored_items[:3]]}")
-        return scored_items[0][1]
-    
-    return items[0] if items else None
-
 def generate_style_tips(style: str, items: List[dict], weather_context: str) -> List[str]:
     """Generate intelligent style tips based on style and items"""
     tips = []
@@ -1362,7 +1375,27 @@ def generate_style_tips(style: str, items: List[dict], weather_context: str) ->
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
-    return {"status": "healthy", "timestamp": time.time()}
+    chat_status = chat_resources.status()
+    return {
+        "status": "healthy" if chat_status["ready"] else "degraded",
+        "timestamp": time.time(),
+        "chat": chat_status,
+        "upstreams": upstream_limiter.stats(),
+        "http": http_client.metrics(),
+        "weather_cache": weather_cache.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "conversations": conversation_store.stats(),
+        "wardrobe_cache": wardrobe_repository.stats(),
+        "wardrobe_invalidations": wardrobe_invalidations.stats() if wardrobe_invalidations is not None else None,
+        "feature_cache": feature_cache.stats(),
+        "item_embeddings": item_embeddings.stats() if item_embeddings is not None else None,
+        "daily_outfits": daily_outfit_store.stats() if daily_outfit_store is not None else None,
+        "outfit_memo": daily_outfit_memo.stats(),
+        "tryon_jobs": tryon_jobs.stats(),
+        "tryon_cache": tryon_cache.stats() if tryon_cache is not None else None,
+        "image_preprocessing": image_preprocessor.stats(),
+        "describe_cache": describe_cache.stats() if describe_cache is not None else None
+    }
 
 # Keepalive endpoint - prevents Supabase free tier from auto-pausing
 @app.get("/keepalive")
@@ -0,0 +1,137 @@
+"""Vectorized scoring of a whole wardrobe against every occasion at once"""
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .outfit_scoring import OCCASION_REQUIREMENTS, ItemFeatures, OccasionScorer, extract_features, occasion_scorer
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScorer:
+    """The compiled occasion rules as matrices
+
+    Items become a dense item x token indicator matrix X. Every clause of
+    every occasion is a column of C (token x clause), so X @ C > 0 gives all
+    clause activations in one product. First-match semantics of each chain
+    come from a running count of active clauses within the chain, category
+    rules are masked per item, and the winning clauses are summed per
+    occasion by W (clause x occasion). Listed inappropriate/preferred words
+    contribute X @ D directly.
+
+    SciPy isn't a dependency, so the matrices are dense; wardrobes have a few
+    hundred distinct tokens at most.
+    """
+
+    def __init__(self, scorers: Dict[str, OccasionScorer]):
+        self.occasions = list(scorers)
+        self.occasion_index = {occasion_id: column for column, occasion_id in enumerate(self.occasions)}
+
+        # (occasion column, gating category or None, clause tokens, delta, chain start)
+        clauses = []
+        for column, scorer in enumerate(scorers.values()):
+            chains = [(None, chain) for chain in scorer.chains]
+            for category, category_chains in scorer.chains_by_category.items():
+                chains.extend((category, chain) for chain in category_chains[len(scorer.chains):])
+            for category, chain in chains:
+                start = len(clauses)
+                for clause_tokens, delta in chain:
+                    clauses.append((column, category, clause_tokens, delta, start))
+
+        tokens = set()
+        for _, _, clause_tokens, _, _ in clauses:
+            tokens |= clause_tokens
+        for scorer in scorers.values():
+            tokens.update(word for word, _ in scorer.keyword_deltas)
+        self.token_index = {token: row for row, token in enumerate(sorted(tokens))}
+
+        self.categories = sorted({category for _, category, _, _, _ in clauses if category is not None})
+        category_codes = {category: code for code, category in enumerate(self.categories)}
+
+        n_tokens, n_clauses, n_occasions = len(self.token_index), len(clauses), len(self.occasions)
+        self.clause_matrix = np.zeros((n_tokens, n_clauses), dtype=np.float32)
+        self.clause_weights = np.zeros((n_clauses, n_occasions), dtype=np.float32)
+        self.clause_category = np.full(n_clauses, -1, dtype=np.int32)
+        self.chain_start = np.zeros(n_clauses, dtype=np.int64)
+        for k, (column, category, clause_tokens, delta, start) in enumerate(clauses):
+            for token in clause_tokens:
+                self.clause_matrix[self.token_index[token], k] = 1.0
+            self.clause_weights[k, column] = delta
+            if category is not None:
+                self.clause_category[k] = category_codes[category]
+            self.chain_start[k] = start
+
+        self.keyword_weights = np.zeros((n_tokens, n_occasions), dtype=np.float32)
+        for column, scorer in enumerate(scorers.values()):
+            for word, delta in scorer.keyword_deltas:
+                self.keyword_weights[self.token_index[word], column] += delta
+
+        self._category_codes = category_codes
+
+    def encode(self, features: Sequence[ItemFeatures]):
+        """Item x token indicator matrix and each item's gating category code"""
+        token_index = self.token_index
+        columns_per_item = [
+            [token_index[token] for token in item_features.tokens if token in token_index]
+            for item_features in features
+        ]
+        rows = np.repeat(np.arange(len(features)), [len(columns) for columns in columns_per_item])
+        columns = [column for item_columns in columns_per_item for column in item_columns]
+        codes = np.array(
+            [self._category_codes.get(item_features.category, -1) for item_features in features],
+            dtype=np.int32
+        )
+        matrix = np.zeros((len(features), len(token_index)), dtype=np.float32)
+        matrix[rows, columns] = 1.0
+        return matrix, codes
+
+    def score(self, features: Sequence[ItemFeatures]) -> np.ndarray:
+        """Scores as an item x occasion matrix, identical to OccasionScorer.score"""
+        if not features:
+            return np.zeros((0, len(self.occasions)), dtype=np.int32)
+        matrix, codes = self.encode(features)
+
+        active = (matrix @ self.clause_matrix) > 0
+        gated = active & ((self.clause_category < 0) | (self.clause_category == codes[:, None]))
+        # A clause wins its chain if it is the first active one: exactly one active clause
+        # from the chain start up to and including it
+        running = np.zeros((gated.shape[0], gated.shape[1] + 1), dtype=np.int32)
+        np.cumsum(gated, axis=1, out=running[:, 1:])
+        first = gated & ((running[:, 1:] - running[:, self.chain_start]) == 1)
+
+        scores = first.astype(np.float32) @ self.clause_weights + matrix @ self.keyword_weights
+        return np.rint(scores).astype(np.int32)
+
+
+@lru_cache(maxsize=1)
+def occasion_batch_scorer() -> BatchScorer:
+    return BatchScorer({occasion_id: occasion_scorer(occasion_id) for occasion_id in OCCASION_REQUIREMENTS})
+
+
+class BatchRanking:
+    """Item scores per (occasion, category) from one item x occasion score matrix"""
+
+    def __init__(
+        self,
+        wardrobe_by_category: Dict[str, List[dict]],
+        scorer: Optional[BatchScorer] = None,
+        feature_cache=None
+    ):
+        self.scorer = scorer or occasion_batch_scorer()
+        self.items: List[dict] = []
+        self.positions: Dict[str, np.ndarray] = {}
+        for category, items in wardrobe_by_category.items():
+            start = len(self.items)
+            self.items.extend(items)
+            self.positions[category] = np.arange(start, len(self.items))
+        extract = feature_cache.features if feature_cache is not None else extract_features
+        self.scores = self.scorer.score(extract(self.items))
+
+    def item_scores(self, occasion_id: str, category: str) -> Tuple[List[dict], List[float]]:
+        positions = self.positions.get(category)
+        if positions is None or not len(positions):
+            return [], []
+        column = self.scores[positions, self.scorer.occasion_index[occasion_id]]
+        return [self.items[i] for i in positions], column.tolist()
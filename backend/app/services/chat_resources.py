@@ -0,0 +1,159 @@
+"""Process-wide clients for the /chat endpoint (embeddings, LLM, vector store)"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from langchain_openai import OpenAIEmbeddings, OpenAI as LCOpenAI
+from langchain_community.vectorstores import Chroma
+
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .vector_index import NumpyVectorIndex
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_BACKENDS = ("chroma", "numpy")
+
+# Written by init_vector_db.py after every rebuild so running workers can pick it up
+VERSION_MARKER = ".version"
+
+
+def read_store_version(persist_directory: str) -> Optional[str]:
+    """Return the build marker of a persisted vector store, if any"""
+    try:
+        with open(os.path.join(persist_directory, VERSION_MARKER)) as marker:
+            return marker.read().strip() or None
+    except OSError:
+        return None
+
+
+class ChatResources:
+    """Opens the chat clients once and shares them across requests"""
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        persist_directory: str = "./fashion_advice_db",
+        llm_model: str = "gpt-3.5-turbo-instruct",
+        reload_check_interval: float = 5.0,
+        retrieval_backend: str = "chroma",
+        embedding_cache: Optional[EmbeddingCache] = None
+    ):
+        if retrieval_backend not in RETRIEVAL_BACKENDS:
+            raise ValueError(f"Unknown retrieval backend: {retrieval_backend}")
+
+        self.openai_api_key = openai_api_key
+        self.persist_directory = persist_directory
+        self.llm_model = llm_model
+        self.reload_check_interval = reload_check_interval
+        self.retrieval_backend = retrieval_backend
+        self.embedding_cache = embedding_cache
+
+        self.embeddings = None
+        self.llm = None
+        self.vectorstore = None
+        self.store_version: Optional[str] = None
+        self.vectorstore_error: Optional[str] = None
+        self.opened_at: Optional[float] = None
+
+        self._last_reload_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._reload_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.llm is not None and self.embeddings is not None
+
+    def open(self):
+        """Create the embedding client, the LLM client and the vector store"""
+        self.embeddings = OpenAIEmbeddings(openai_api_key=self.openai_api_key)
+        if self.embedding_cache is not None:
+            # Repeated questions skip the embedding round-trip
+            self.embeddings = CachedEmbeddings(self.embeddings, self.embedding_cache)
+        self.llm = LCOpenAI(
+            openai_api_key=self.openai_api_key,
+            model_name=self.llm_model,
+            temperature=0.7,
+            max_tokens=800,
+            request_timeout=30  # Add timeout to prevent hanging
+        )
+        self._open_vectorstore()
+        self.opened_at = time.time()
+        logger.info(f"Chat resources ready (vector store: {'available' if self.vectorstore else 'unavailable'})")
+
+    def close(self):
+        """Drop the shared clients"""
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+        self.vectorstore = None
+        self.llm = None
+        self.embeddings = None
+
+    def _open_vectorstore(self):
+        """(Re)open the persisted collection and swap it in; a failed reopen keeps the current store"""
+        version = read_store_version(self.persist_directory)
+        try:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            if self.vectorstore is not None:
+                # Chroma caches one client per path; a rebuilt directory needs a fresh one
+                try:
+                    from chromadb.api.client import SharedSystemClient
+                    SharedSystemClient.clear_system_cache()
+                except Exception as cache_error:
+                    logger.debug(f"Could not clear Chroma client cache: {cache_error}")
+            vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings
+            )
+            if self.retrieval_backend == "numpy":
+                # Chroma is only needed to read the persisted vectors once
+                vectorstore = NumpyVectorIndex.from_chroma(vectorstore, embedding_function=self.embeddings)
+        except Exception as e:
+            if self.vectorstore is None:
+                logger.warning(f"Vector store not available, proceeding without it: {e}")
+            else:
+                logger.warning(f"Vector store reload failed, keeping the previous one: {e}")
+            self.vectorstore_error = str(e)
+            self.store_version = version
+            return
+
+        self.vectorstore = vectorstore
+        self.vectorstore_error = None
+        self.store_version = version
+
+    def reload(self):
+        """Reopen the vector store, e.g. after init_vector_db.py rebuilt it"""
+        with self._reload_lock:
+            logger.info(f"Reloading vector store from {self.persist_directory}")
+            self._open_vectorstore()
+
+    def reload_if_changed(self):
+        """Start reopening the vector store when its build marker changed, checking at most every few seconds
+
+        The reopen runs in a thread while requests keep using the current
+        store, which is swapped out only once the new one is open. Call from
+        the event loop.
+        """
+        now = time.monotonic()
+        if now - self._last_reload_check < self.reload_check_interval:
+            return
+        self._last_reload_check = now
+
+        if self._reload_task is not None and not self._reload_task.done():
+            return
+        if read_store_version(self.persist_directory) != self.store_version:
+            self._reload_task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.reload))
+
+    def status(self) -> dict:
+        """Readiness summary for the health endpoint"""
+        return {
+            "ready": self.ready,
+            "vector_store": "available" if self.vectorstore is not None else "unavailable",
+            "vector_store_backend": self.retrieval_backend,
+            "vector_store_version": self.store_version,
+            "vector_store_error": self.vectorstore_error,
+            "opened_at": self.opened_at,
+            "embedding_cache": self.embedding_cache.stats() if self.embedding_cache is not None else None
+        }
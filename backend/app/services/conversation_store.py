@@ -0,0 +1,235 @@
+"""Bounded chat conversation memory with an optional shared backend"""
+import abc
+import sys
+import time
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Turn:
+    """One user message and the assistant's reply"""
+    __slots__ = ("user", "assistant", "timestamp")
+
+    def __init__(self, user: str, assistant: str, timestamp: Optional[float] = None):
+        self.user = user
+        self.assistant = assistant
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def size(self) -> int:
+        """Approximate memory footprint in bytes"""
+        return sys.getsizeof(self.user) + sys.getsizeof(self.assistant) + 64
+
+    def to_list(self) -> list:
+        return [self.user, self.assistant, self.timestamp]
+
+    @classmethod
+    def from_list(cls, data: list) -> "Turn":
+        return cls(data[0], data[1], data[2])
+
+
+class Conversation:
+    __slots__ = ("turns", "size", "last_access")
+
+    def __init__(self, turns: List[Turn]):
+        self.turns = turns
+        self.size = sum(turn.size() for turn in turns)
+        self.last_access = time.monotonic()
+
+
+class ConversationBackend(abc.ABC):
+    """Persistent storage for conversations shared between workers"""
+
+    @abc.abstractmethod
+    def load(self, conversation_id: str) -> Optional[List[Turn]]:
+        ...
+
+    @abc.abstractmethod
+    def append(self, conversation_id: str, turn: Turn, max_turns: int, ttl_seconds: int) -> List[Turn]:
+        """Atomically add a turn, trim to the last max_turns and return them"""
+
+    @abc.abstractmethod
+    def delete(self, conversation_id: str):
+        ...
+
+    def close(self):
+        pass
+
+
+class RedisConversationBackend(ConversationBackend):
+    """Stores each conversation as a Redis list of JSON turns that expires with the TTL
+
+    Appends are RPUSH + LTRIM in one transaction, so turns written by
+    different workers to the same conversation are never lost.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, prefix: str = "conversation", client=None):
+        if client is None:
+            import redis
+            client = redis.Redis(host=host, port=port, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.prefix}:{conversation_id}:turns"
+
+    def load(self, conversation_id: str) -> Optional[List[Turn]]:
+        raw = self.client.lrange(self._key(conversation_id), 0, -1)
+        if not raw:
+            return None
+        return [Turn.from_list(json.loads(item)) for item in raw]
+
+    def append(self, conversation_id: str, turn: Turn, max_turns: int, ttl_seconds: int) -> List[Turn]:
+        key = self._key(conversation_id)
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.rpush(key, json.dumps(turn.to_list(), separators=(",", ":")))
+        pipeline.ltrim(key, -max_turns, -1)
+        pipeline.expire(key, ttl_seconds)
+        pipeline.lrange(key, 0, -1)
+        raw = pipeline.execute()[-1]
+        return [Turn.from_list(json.loads(item)) for item in raw]
+
+    def delete(self, conversation_id: str):
+        self.client.delete(self._key(conversation_id))
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class ConversationStore:
+    """LRU + TTL conversation cache with a hard memory cap
+
+    Without a backend the in-process map is the only copy. With one, the
+    backend is the source of truth and is read on every access, so a
+    conversation can move between workers mid-way; the local map is only a
+    copy of the last read, used while the backend is unreachable.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = 10000,
+        ttl_seconds: int = 86400,
+        max_turns: int = 10,
+        max_bytes: int = 64 * 1024 * 1024,
+        backend: Optional[ConversationBackend] = None
+    ):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.backend = backend
+
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.backend_errors = 0
+
+    def get(self, conversation_id: str) -> List[Turn]:
+        """Return the stored turns, oldest first"""
+        if self.backend is not None:
+            try:
+                turns = self.backend.load(conversation_id) or []
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Failed to load conversation {conversation_id}: {e}")
+            else:
+                turns = turns[-self.max_turns:]
+                with self._lock:
+                    if turns:
+                        self._put(conversation_id, turns)
+                    else:
+                        self._remove(conversation_id)
+                return turns
+        return self._local_get(conversation_id)
+
+    def append(self, conversation_id: str, user: str, assistant: str) -> List[Turn]:
+        """Add a turn, keeping only the most recent max_turns"""
+        turn = Turn(user, assistant)
+        if self.backend is not None:
+            try:
+                turns = self.backend.append(conversation_id, turn, self.max_turns, self.ttl_seconds)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Failed to persist conversation {conversation_id}: {e}")
+            else:
+                with self._lock:
+                    self._put(conversation_id, turns)
+                return turns
+
+        with self._lock:
+            conversation = self._conversations.get(conversation_id)
+            turns = list(conversation.turns) if conversation is not None else []
+            turns.append(turn)
+            turns = turns[-self.max_turns:]
+            self._put(conversation_id, turns)
+        return turns
+
+    def _local_get(self, conversation_id: str) -> List[Turn]:
+        with self._lock:
+            self._expire()
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                return []
+            conversation.last_access = time.monotonic()
+            self._conversations.move_to_end(conversation_id)
+            return list(conversation.turns)
+
+    def delete(self, conversation_id: str):
+        with self._lock:
+            self._remove(conversation_id)
+        if self.backend is not None:
+            try:
+                self.backend.delete(conversation_id)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Failed to delete conversation {conversation_id}: {e}")
+
+    def _put(self, conversation_id: str, turns: List[Turn]):
+        self._remove(conversation_id)
+        conversation = Conversation(turns)
+        self._conversations[conversation_id] = conversation
+        self._bytes += conversation.size
+        self._expire()
+        while self._conversations and (
+            len(self._conversations) > self.max_conversations or self._bytes > self.max_bytes
+        ):
+            oldest_id = next(iter(self._conversations))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def _remove(self, conversation_id: str):
+        conversation = self._conversations.pop(conversation_id, None)
+        if conversation is not None:
+            self._bytes -= conversation.size
+
+    def _expire(self):
+        """Drop conversations idle for longer than the TTL (they sit at the LRU end)"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._conversations:
+            oldest_id, oldest = next(iter(self._conversations.items()))
+            if oldest.last_access >= cutoff:
+                break
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "conversations": len(self._conversations),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "backend_errors": self.backend_errors
+        }
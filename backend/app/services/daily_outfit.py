@@ -0,0 +1,259 @@
+"""Outfit of the day composed from a user's wardrobe and the current weather"""
+import math
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .outfit_search import OutfitSearch, Slot
+
+# Used when the weather lookup failed
+DEFAULT_TEMPERATURE = 70
+DEFAULT_DESCRIPTION = "moderate"
+
+# Temperatures within one bucket get the same outfit; the 50/65/70°F thresholds are bucket edges
+BUCKET_DEGREES = 5
+# The day's outfit is drawn from this many of the best colour-matched combinations
+OUTFIT_CHOICES = 3
+
+
+def weather_inputs(weather_response) -> Tuple[float, str]:
+    """Temperature and description from a WeatherResponse, with moderate defaults on errors"""
+    if weather_response.error:
+        return DEFAULT_TEMPERATURE, DEFAULT_DESCRIPTION
+    return weather_response.temp, weather_response.description
+
+
+def weather_bucket(temperature: float) -> int:
+    return int(math.floor(temperature / BUCKET_DEGREES))
+
+
+def wardrobe_fingerprint(wardrobe_items: List[dict]) -> str:
+    """Hash of the rows' content, independent of row order"""
+    rows = sorted(
+        "\0".join(str(item.get(field) or '') for field in ('id', 'category', 'item_name', 'description', 'image_url'))
+        for item in wardrobe_items
+    )
+    return hashlib.sha1("\n".join(rows).encode()).hexdigest()
+
+
+def daily_rng(user_id: str, day: str, fingerprint: str) -> random.Random:
+    """Same user, day and wardrobe, same outfit, in the API and in precompute_outfits.py"""
+    seed = hashlib.sha256(f"{user_id}\0{day}\0{fingerprint}".encode()).digest()
+    return random.Random(int.from_bytes(seed[:8], "big"))
+
+
+def pick_items(candidates: Dict[str, List[dict]], rng) -> Dict[str, dict]:
+    """One item per non-empty category
+
+    Items get random scores, the search keeps the best colour-compatible
+    combinations and one of those is picked at random, so the outfit changes
+    from day to day without putting clashing colours together.
+    """
+    slots = []
+    for category, items in candidates.items():
+        if items:
+            # Row order from the database isn't stable; the seed must see the same sequence
+            items = sorted(items, key=lambda item: str(item.get('id')))
+            slots.append(Slot(category, items, [rng.random() for _ in items], optional=False))
+    if not slots:
+        return {}
+    # No time budget: a search cut short would make the pick depend on machine load
+    outfits = OutfitSearch(k=OUTFIT_CHOICES, budget_seconds=math.inf).search(slots)
+    _, items = outfits[rng.randrange(len(outfits))]
+    return {slot.category: item for slot, item in zip(slots, items)}
+
+
+def compose_outfit_of_the_day(wardrobe_items: List[dict], temperature: float, description: str, rng=random) -> dict:
+    """Pick a top, bottom and (weather permitting) outerwear; rng supplies the randomness"""
+    # Categorize wardrobe items
+    tops = [item for item in wardrobe_items if item.get('category') == 'Tops']
+    bottoms = [item for item in wardrobe_items if item.get('category') == 'Bottoms']
+    outerwear = [item for item in wardrobe_items if item.get('category') == 'Outerwear']
+    dresses = [item for item in wardrobe_items if item.get('category') == 'Dresses']
+
+    # Smart outfit selection based on weather and available items
+    outfit = {}
+    outfit_details = {}
+    reasoning = []
+
+    # Choose all pieces together so their colours go with each other
+    picked = pick_items(
+        {'top': tops, 'bottom': bottoms, 'outerwear': outerwear if temperature < 65 else []}, rng
+    )
+
+    # Temperature-based logic
+    if temperature < 50:  # Cold weather
+        if outerwear:
+            selected_outerwear = picked['outerwear']
+            outfit['outerwear'] = selected_outerwear['item_name']
+            outfit_details['outerwear'] = {
+                'name': selected_outerwear['item_name'],
+                'image_url': selected_outerwear['image_url'],
+                'description': selected_outerwear['description']
+            }
+            reasoning.append(f"It's chilly at {temperature}°F, so we've layered this outfit with your {selected_outerwear['item_name']} for warmth")
+        else:
+            outfit['outerwear'] = "Warm layer needed"
+            outfit_details['outerwear'] = None
+            reasoning.append(f"Cold weather detected but you don't have outerwear in your wardrobe yet")
+
+        if tops:
+            selected_top = picked['top']
+            outfit['top'] = selected_top['item_name']
+            outfit_details['top'] = {
+                'name': selected_top['item_name'],
+                'image_url': selected_top['image_url'],
+                'description': selected_top['description']
+            }
+        else:
+            outfit['top'] = "Warm top needed"
+            outfit_details['top'] = None
+
+        if bottoms:
+            selected_bottom = picked['bottom']
+            outfit['bottom'] = selected_bottom['item_name']
+            outfit_details['bottom'] = {
+                'name': selected_bottom['item_name'],
+                'image_url': selected_bottom['image_url'],
+                'description': selected_bottom['description']
+            }
+        else:
+            outfit['bottom'] = "Warm bottom needed"
+            outfit_details['bottom'] = None
+
+    elif temperature < 70:  # Moderate weather
+        if tops:
+            selected_top = picked['top']
+            outfit['top'] = selected_top['item_name']
+            outfit_details['top'] = {
+                'name': selected_top['item_name'],
+                'image_url': selected_top['image_url'],
+                'description': selected_top['description']
+            }
+            reasoning.append(f"Perfect {temperature}°F weather for your {selected_top['item_name']}")
+        else:
+            outfit['top'] = "Moderate weather top needed"
+            outfit_details['top'] = None
+
+        if bottoms:
+            selected_bottom = picked['bottom']
+            outfit['bottom'] = selected_bottom['item_name']
+            outfit_details['bottom'] = {
+                'name': selected_bottom['item_name'],
+                'image_url': selected_bottom['image_url'],
+                'description': selected_bottom['description']
+            }
+        else:
+            outfit['bottom'] = "Moderate weather bottom needed"
+            outfit_details['bottom'] = None
+
+        if outerwear and temperature < 65:
+            selected_outerwear = picked['outerwear']
+            outfit['outerwear'] = selected_outerwear['item_name']
+            outfit_details['outerwear'] = {
+                'name': selected_outerwear['item_name'],
+                'image_url': selected_outerwear['image_url'],
+                'description': selected_outerwear['description']
+            }
+            reasoning.append(f"Added your {selected_outerwear['item_name']} for an extra layer")
+        else:
+            outfit['outerwear'] = "None needed"
+            outfit_details['outerwear'] = None
+
+    else:  # Hot weather
+        if tops:
+            selected_top = picked['top']
+            outfit['top'] = selected_top['item_name']
+            outfit_details['top'] = {
+                'name': selected_top['item_name'],
+                'image_url': selected_top['image_url'],
+                'description': selected_top['description']
+            }
+            reasoning.append(f"Warm {temperature}°F day calls for your {selected_top['item_name']}")
+        else:
+            outfit['top'] = "Light top needed"
+            outfit_details['top'] = None
+
+        if bottoms:
+            selected_bottom = picked['bottom']
+            outfit['bottom'] = selected_bottom['item_name']
+            outfit_details['bottom'] = {
+                'name': selected_bottom['item_name'],
+                'image_url': selected_bottom['image_url'],
+                'description': selected_bottom['description']
+            }
+        else:
+            outfit['bottom'] = "Light bottom needed"
+            outfit_details['bottom'] = None
+
+        outfit['outerwear'] = "None needed"
+        outfit_details['outerwear'] = None
+        reasoning.append("No jacket needed in this warm weather")
+
+    # Add weather context
+    weather_context = f"{temperature}°F, {description}"
+
+    # Create natural-sounding reasoning
+    reasoning_text = ". ".join(reasoning)
+    if reasoning_text and not reasoning_text.endswith('.'):
+        reasoning_text += "."
+
+    return {
+        "outfit": outfit,
+        "outfit_details": outfit_details,
+        "weather": weather_context,
+        "reasoning": reasoning_text,
+        "wardrobe_count": len(wardrobe_items),
+        "categories_available": sorted(set(item.get('category') for item in wardrobe_items if item.get('category')))
+    }
+
+
+
+class DailyOutfitMemo:
+    """Composed outfit per user for the current day, remembering the wardrobe and weather it was made for"""
+
+    def __init__(self, max_users: int = 10000):
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, Tuple[str, str, int, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str, day: str, fingerprint: str, bucket: int) -> Optional[dict]:
+        """The memoized response, unless it is from another day, wardrobe or weather bucket"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[:3] == (day, fingerprint, bucket):
+                    response = entry[3]
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return response
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user_id: str, day: str, fingerprint: str, bucket: int, response: dict):
+        with self._lock:
+            self._entries[user_id] = (day, fingerprint, bucket, response)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
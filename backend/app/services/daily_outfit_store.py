@@ -0,0 +1,124 @@
+"""Precomputed outfit-of-the-day responses, one per user per day"""
+import os
+import abc
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DailyOutfitStore(abc.ABC):
+    """Outfits written by precompute_outfits.py and served by /api/outfit-of-the-day
+
+    Each entry is {"fingerprint", "bucket", "outfit"}: the outfit with the
+    wardrobe fingerprint and weather bucket it was composed for.
+    """
+
+    @abc.abstractmethod
+    def get(self, user_id: str, day: str) -> Optional[dict]:
+        ...
+
+    @abc.abstractmethod
+    def put_many(self, day: str, outfits: Dict[str, dict]):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, user_id: str, day: str):
+        ...
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__}
+
+
+class SqliteDailyOutfitStore(DailyOutfitStore):
+    """Single-host store; old days are purged whenever a new day is written"""
+
+    def __init__(self, path: str, keep_days: int = 2):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.keep_days = keep_days
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS daily_outfits (day TEXT, user_id TEXT, outfit TEXT, PRIMARY KEY (day, user_id))"
+            )
+            self._db.commit()
+
+    def get(self, user_id: str, day: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT outfit FROM daily_outfits WHERE day = ? AND user_id = ?", (day, user_id)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put_many(self, day: str, outfits: Dict[str, dict]):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO daily_outfits (day, user_id, outfit) VALUES (?, ?, ?)",
+                [(day, user_id, json.dumps(outfit, separators=(",", ":"))) for user_id, outfit in outfits.items()]
+            )
+            self._db.execute(
+                "DELETE FROM daily_outfits WHERE day NOT IN "
+                "(SELECT DISTINCT day FROM daily_outfits ORDER BY day DESC LIMIT ?)",
+                (self.keep_days,)
+            )
+            self._db.commit()
+
+    def delete(self, user_id: str, day: str):
+        with self._lock:
+            self._db.execute("DELETE FROM daily_outfits WHERE day = ? AND user_id = ?", (day, user_id))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RedisDailyOutfitStore(DailyOutfitStore):
+    """Shared by every worker; entries expire on their own after ttl_seconds"""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        prefix: str = "ootd",
+        ttl_seconds: int = 36 * 3600,
+        client=None
+    ):
+        if client is None:
+            import redis
+            client = redis.Redis(host=host, port=port, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, user_id: str, day: str) -> str:
+        return f"{self.prefix}:{day}:{user_id}"
+
+    def get(self, user_id: str, day: str) -> Optional[dict]:
+        raw = self.client.get(self._key(user_id, day))
+        return json.loads(raw) if raw is not None else None
+
+    def put_many(self, day: str, outfits: Dict[str, dict]):
+        pipeline = self.client.pipeline(transaction=False)
+        for user_id, outfit in outfits.items():
+            pipeline.set(self._key(user_id, day), json.dumps(outfit, separators=(",", ":")), ex=self.ttl_seconds)
+        pipeline.execute()
+
+    def delete(self, user_id: str, day: str):
+        self.client.delete(self._key(user_id, day))
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
@@ -0,0 +1,216 @@
+"""Describe many garment photos at once, several per vision prompt, yielding each result as it is ready"""
+import re
+import json
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from .image_preprocessing import PreparedImage
+from ..utils.image_validation import ImageUpload, ImageValidationError
+
+logger = logging.getLogger(__name__)
+
+DESCRIBE_PROMPT = """
+        Analyze this clothing item and provide a detailed description in JSON format.
+        Return ONLY a JSON object with these fields:
+        - item_name: A concise name for the clothing item
+        - description: A detailed description including color, style, material, fit, and any notable features
+        - category: One of these categories: "Tops", "Bottoms", "Dresses", "Outerwear", "Shoes", "Accessories"
+
+        Focus on fashion-relevant details that would help someone understand what this item looks like.
+        Choose the most appropriate category based on the item type.
+        """
+
+BATCH_PROMPT = """
+        Analyze each of these {count} clothing items. The images are numbered 1 to {count}, each after its label.
+        Return ONLY a JSON array with one object per image, in the same order, each with these fields:
+        - index: The image's number
+        - item_name: A concise name for the clothing item
+        - description: A detailed description including color, style, material, fit, and any notable features
+        - category: One of these categories: "Tops", "Bottoms", "Dresses", "Outerwear", "Shoes", "Accessories"
+
+        Describe each image on its own, without mixing up details between images.
+        Focus on fashion-relevant details that would help someone understand what each item looks like.
+        """
+
+# Completion budget per described image, the same for single and packed prompts
+TOKENS_PER_IMAGE = 300
+
+
+def parse_description(content: str) -> Tuple[object, bool]:
+    """The model's JSON answer and True, or a description built from the raw text and False"""
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group()), True
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error: {e}")
+    return {"item_name": "Clothing Item", "description": content}, False
+
+
+def parse_descriptions(content: str, count: int) -> List[Optional[dict]]:
+    """Per-image results of a packed prompt; None where the answer is missing or unusable"""
+    results: List[Optional[dict]] = [None] * count
+    json_match = re.search(r'\[.*\]', content, re.DOTALL)
+    if not json_match:
+        return results
+    try:
+        answers = json.loads(json_match.group())
+    except json.JSONDecodeError:
+        return results
+    if not isinstance(answers, list):
+        return results
+
+    for position, answer in enumerate(answers):
+        if not isinstance(answer, dict) or not answer.get("item_name"):
+            continue
+        index = answer.pop("index", position + 1)
+        # Trust the model's numbering only when it is usable; otherwise its position
+        slot = index - 1 if isinstance(index, int) and 0 < index <= count else position
+        if slot < count and results[slot] is None:
+            results[slot] = answer
+    return results
+
+
+class BatchImage:
+    """One image of a batch; load() returns the validated upload or raises ImageValidationError"""
+    __slots__ = ("index", "filename", "load")
+
+    def __init__(self, index: int, filename: Optional[str], load: Callable[[], ImageUpload]):
+        self.index = index
+        self.filename = filename
+        self.load = load
+
+
+class BatchDescriber:
+    """Prepares images in parallel and describes them with few, bounded vision calls
+
+    Images are loaded and preprocessed max_preparing at a time. Cache hits
+    are yielded at once; the rest are packed images_per_prompt to a prompt
+    as they become ready, with up to max_prompts prompts in flight. Images
+    a packed answer leaves out or garbles get a single-image prompt of
+    their own. describe(images, prompt, max_tokens) makes the vision call
+    and returns the answer text.
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[bytes], Awaitable[PreparedImage]],
+        describe: Callable[[List[PreparedImage], str, int], Awaitable[str]],
+        cache=None,
+        images_per_prompt: int = 4,
+        max_prompts: int = 4,
+        max_preparing: int = 4
+    ):
+        self.prepare = prepare
+        self.describe = describe
+        self.cache = cache
+        self.images_per_prompt = max(1, images_per_prompt)
+        self.max_prompts = max(1, max_prompts)
+        self.max_preparing = max(1, max_preparing)
+
+    async def run(self, images: List[BatchImage]) -> AsyncIterator[dict]:
+        """One event per image in completion order: {"index", "filename", "item", "cached"} or {"index", "filename", "error"}"""
+        events: asyncio.Queue = asyncio.Queue()
+        driver = asyncio.create_task(self._drive(images, events))
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            # Surfaces anything that ended the batch early
+            await driver
+        finally:
+            # The client went away or a bug surfaced; don't leave vision calls running
+            driver.cancel()
+
+    async def _drive(self, images: List[BatchImage], events: asyncio.Queue):
+        preparing = asyncio.Semaphore(self.max_preparing)
+        prompting = asyncio.Semaphore(self.max_prompts)
+        pending: List[Tuple[BatchImage, PreparedImage]] = []
+        prompts: List[asyncio.Task] = []
+
+        def launch(group):
+            prompts.append(asyncio.create_task(self._describe_group(group, prompting, events)))
+
+        async def prepare_one(image: BatchImage):
+            async with preparing:
+                try:
+                    upload = await asyncio.to_thread(image.load)
+                except ImageValidationError as e:
+                    events.put_nowait({"index": image.index, "filename": image.filename, "error": str(e)})
+                    return
+                except Exception as e:
+                    logger.error(f"Error reading batch image {image.index}: {e}")
+                    events.put_nowait({"index": image.index, "filename": image.filename, "error": "Failed to read image"})
+                    return
+                try:
+                    prepared = await self.prepare(upload.data)
+                except Exception as e:
+                    logger.warning(f"Image preprocessing failed, sending the original: {e}")
+                    prepared = PreparedImage(bytes(upload.data), upload.content_type, 0, 0, upload.size)
+
+            cached = self.cache.get(prepared.phash, prepared.dhash, prepared.color) if self.cache is not None else None
+            if cached is not None:
+                events.put_nowait({"index": image.index, "filename": image.filename, "item": cached, "cached": True})
+                return
+            pending.append((image, prepared))
+            if len(pending) >= self.images_per_prompt:
+                launch(pending[:])
+                pending.clear()
+
+        tasks = [asyncio.create_task(prepare_one(image)) for image in images]
+        try:
+            await asyncio.gather(*tasks)
+            if pending:
+                launch(pending[:])
+            await asyncio.gather(*prompts)
+        finally:
+            for task in tasks + prompts:
+                task.cancel()
+            events.put_nowait(None)
+
+    async def _describe_group(self, group: List[Tuple[BatchImage, PreparedImage]], prompting: asyncio.Semaphore, events: asyncio.Queue):
+        if len(group) == 1:
+            await self._describe_one(*group[0], prompting, events)
+            return
+
+        try:
+            async with prompting:
+                content = await self.describe(
+                    [prepared for _, prepared in group],
+                    BATCH_PROMPT.format(count=len(group)),
+                    TOKENS_PER_IMAGE * len(group)
+                )
+            results = parse_descriptions(content, len(group))
+        except Exception as e:
+            logger.warning(f"Packed describe of {len(group)} images failed, describing them one by one: {e}")
+            results = [None] * len(group)
+
+        retries = []
+        for (image, prepared), result in zip(group, results):
+            if result is None:
+                retries.append(self._describe_one(image, prepared, prompting, events))
+                continue
+            self._remember(prepared, result)
+            events.put_nowait({"index": image.index, "filename": image.filename, "item": result, "cached": False})
+        if retries:
+            await asyncio.gather(*retries)
+
+    async def _describe_one(self, image: BatchImage, prepared: PreparedImage, prompting: asyncio.Semaphore, events: asyncio.Queue):
+        try:
+            async with prompting:
+                content = await self.describe([prepared], DESCRIBE_PROMPT, TOKENS_PER_IMAGE)
+        except Exception as e:
+            logger.error(f"Error describing batch image {image.index}: {e}")
+            events.put_nowait({"index": image.index, "filename": image.filename, "error": "Failed to process image"})
+            return
+        result, parsed = parse_description(content.strip())
+        if parsed and isinstance(result, dict) and result.get("item_name"):
+            self._remember(prepared, result)
+        events.put_nowait({"index": image.index, "filename": image.filename, "item": result, "cached": False})
+
+    def _remember(self, prepared: PreparedImage, result: dict):
+        if self.cache is not None:
+            self.cache.put(prepared.phash, prepared.dhash, prepared.color, result)
@@ -0,0 +1,215 @@
+"""/describe-clothing results by perceptual hash, so re-uploads of the same photo skip the vision call"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from itertools import combinations
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..utils.perceptual_hash import color_distance, hamming
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def _chunks(value: int) -> List[int]:
+    return [(value >> (CHUNK_BITS * index)) & CHUNK_MASK for index in range(CHUNKS)]
+
+
+def _flip_masks(radius: int) -> List[int]:
+    """Every chunk-sized mask with at most radius bits set"""
+    masks = [0]
+    for bits in range(1, radius + 1):
+        for positions in combinations(range(CHUNK_BITS), bits):
+            masks.append(sum(1 << position for position in positions))
+    return masks
+
+
+class DescribeCache:
+    """LRU of describe results, found by pHash within threshold bits and confirmed by dHash and colour
+
+    Lookups use multi-index hashing: the 64-bit pHash is split into four
+    16-bit chunks, each with its own table. Two hashes within r bits agree
+    to within r // 4 bits on at least one chunk, so probing each table with
+    the chunk's values at that distance (17 probes per table for r = 6)
+    finds every candidate without scanning the cache. Different pictures
+    can share a pHash by chance; a second, independent dHash must also be
+    close before a result is reused. Both hashes are grayscale, so the mean
+    colours must also be within color_threshold Lab units, or the same
+    shirt in red would get the blue one's description.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        threshold: int = 6,
+        dhash_threshold: int = 10,
+        color_threshold: float = 10.0,
+        model: str = "",
+        disk_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.dhash_threshold = dhash_threshold
+        self.color_threshold = color_threshold
+        self.model = model
+        self.disk_path = disk_path
+
+        self._masks = _flip_masks(threshold // CHUNKS)
+        self._entries: "OrderedDict[int, Tuple[int, int, dict]]" = OrderedDict()
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(CHUNKS)]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS describe_cache "
+                "(model TEXT, phash TEXT, dhash TEXT, color TEXT, result TEXT, created_at REAL, PRIMARY KEY (model, phash))"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(describe_cache)")}
+            if "color" not in columns:
+                # Written before colours were kept; those rows can't be confirmed and are never loaded
+                self._db.execute("ALTER TABLE describe_cache ADD COLUMN color TEXT")
+            rows = self._db.execute(
+                "SELECT phash, dhash, color, result FROM describe_cache WHERE model = ? AND color IS NOT NULL "
+                "ORDER BY created_at DESC LIMIT ?",
+                (self.model, self.max_entries)
+            ).fetchall()
+            # Rows past the LRU bound would never be loaded again
+            self._db.execute(
+                "DELETE FROM describe_cache WHERE model = ? AND phash NOT IN "
+                "(SELECT phash FROM describe_cache WHERE model = ? ORDER BY created_at DESC LIMIT ?)",
+                (self.model, self.model, self.max_entries)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Describe cache disk tier disabled: {e}")
+            self._db = None
+            return
+
+        # Oldest first, so the newest end up most recently used
+        for phash, dhash, color, result in reversed(rows):
+            try:
+                self._store(int(phash, 16), int(dhash, 16), int(color, 16), json.loads(result))
+            except ValueError:
+                continue
+        logger.info(f"Describe cache loaded {len(self._entries)} results from {path}")
+
+    def get(self, phash: Optional[int], dhash: Optional[int], color: Optional[int]) -> Optional[dict]:
+        """A copy of the result for this picture or a near-duplicate of it"""
+        if phash is None or dhash is None or color is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(phash)
+            if entry is not None and self._confirms(entry, dhash, color):
+                self._entries.move_to_end(phash)
+                self.hits += 1
+                return dict(entry[2])
+
+            match = self._nearest(phash, dhash, color)
+            if match is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.hits += 1
+            self.near_hits += 1
+            return dict(self._entries[match][2])
+
+    def _confirms(self, entry: Tuple[int, int, dict], dhash: int, color: int) -> bool:
+        return (
+            hamming(entry[0], dhash) <= self.dhash_threshold
+            and color_distance(entry[1], color) <= self.color_threshold
+        )
+
+    def _nearest(self, phash: int, dhash: int, color: int) -> Optional[int]:
+        best, best_distance = None, self.threshold + 1
+        seen = set()
+        for table, chunk in zip(self._tables, _chunks(phash)):
+            for mask in self._masks:
+                for candidate in table.get(chunk ^ mask, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = hamming(candidate, phash)
+                    if distance < best_distance and self._confirms(self._entries[candidate], dhash, color):
+                        best, best_distance = candidate, distance
+        return best
+
+    def put(self, phash: Optional[int], dhash: Optional[int], color: Optional[int], result: dict):
+        if phash is None or dhash is None or color is None:
+            return
+        result = dict(result)
+        with self._lock:
+            self._store(phash, dhash, color, result)
+            self._disk_put(phash, dhash, color, result)
+
+    def _store(self, phash: int, dhash: int, color: int, result: dict):
+        if phash not in self._entries:
+            for table, chunk in zip(self._tables, _chunks(phash)):
+                table.setdefault(chunk, set()).add(phash)
+        self._entries[phash] = (dhash, color, result)
+        self._entries.move_to_end(phash)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._unindex(evicted)
+            self.evictions += 1
+
+    def _unindex(self, phash: int):
+        for table, chunk in zip(self._tables, _chunks(phash)):
+            bucket = table.get(chunk)
+            if bucket is not None:
+                bucket.discard(phash)
+                if not bucket:
+                    del table[chunk]
+
+    def _disk_put(self, phash: int, dhash: int, color: int, result: dict):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO describe_cache (model, phash, dhash, color, result, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.model, f"{phash:016x}", f"{dhash:016x}", f"{color:06x}", json.dumps(result), time.time())
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Describe cache disk write failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "disk_tier": self._db is not None
+        }
@@ -0,0 +1,204 @@
+"""Keyword features of wardrobe items, computed once per item content and reused by every endpoint"""
+import os
+import hashlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from .outfit_scoring import DEFAULT_MATCHER, DESCRIBED, NAME_PREFIX, ItemFeatures, KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureRecord:
+    """Token set of one item content as a bitset over the matcher's token universe"""
+    __slots__ = ("content_hash", "bits", "tokens")
+
+    def __init__(self, content_hash: str, bits: int, tokens: FrozenSet[str]):
+        self.content_hash = content_hash
+        self.bits = bits
+        self.tokens = tokens
+
+
+class FeatureCache:
+    """LRU map from item content hash to feature record, with an optional sqlite tier
+
+    The hash covers the lowercased name and description plus a fingerprint of
+    the keyword universe, so edited items and changed scoring rules both miss.
+    Item ids remember the hash they were last seen with; a different hash
+    marks the old record stale and it is dropped.
+    """
+
+    def __init__(self, max_entries: int = 50000, disk_path: Optional[str] = None, matcher: KeywordMatcher = DEFAULT_MATCHER):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.matcher = matcher
+
+        self.universe = sorted(matcher.keywords) + sorted(NAME_PREFIX + keyword for keyword in matcher.keywords) + [DESCRIBED]
+        self.bit_of = {token: 1 << position for position, token in enumerate(self.universe)}
+        self.fingerprint = hashlib.sha1("\n".join(self.universe).encode()).hexdigest()[:12]
+
+        self._records: "OrderedDict[str, FeatureRecord]" = OrderedDict()
+        self._hash_by_id: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.stale = 0
+        self.evictions = 0
+
+        self._db = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS item_features (content_hash TEXT PRIMARY KEY, item_id TEXT, bits TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS item_features_item_id ON item_features (item_id)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Feature cache disk tier disabled: {e}")
+            self._db = None
+
+    def content_hash(self, item_name: str, description: str) -> str:
+        payload = f"{self.fingerprint}\0{item_name}\0{description}".encode()
+        return hashlib.sha1(payload).hexdigest()
+
+    def encode(self, tokens: FrozenSet[str]) -> int:
+        bits = 0
+        for token in tokens:
+            bits |= self.bit_of.get(token, 0)
+        return bits
+
+    def decode(self, bits: int) -> FrozenSet[str]:
+        tokens = []
+        position = 0
+        while bits:
+            if bits & 1:
+                tokens.append(self.universe[position])
+            bits >>= 1
+            position += 1
+        return frozenset(tokens)
+
+    def features(self, items: Sequence[dict]) -> List[ItemFeatures]:
+        """ItemFeatures for each item, computing only the contents not seen before"""
+        features = []
+        computed: List[Tuple[str, Optional[str], int]] = []
+        with self._lock:
+            for item in items:
+                item_name = (item.get('item_name') or '').lower()
+                description = (item.get('description') or '').lower()
+                category = (item.get('category') or '').lower()
+                item_id = str(item['id']) if item.get('id') is not None else None
+                record, is_new = self._lookup(item_name, description, item_id)
+                if is_new:
+                    computed.append((record.content_hash, item_id, record.bits))
+                features.append(ItemFeatures(item, record.tokens, category))
+            self._disk_put(computed)
+        return features
+
+    def warm(self, items: Sequence[dict]):
+        """Compute and store features ahead of the first request that needs them"""
+        self.features(items)
+
+    def _lookup(self, item_name: str, description: str, item_id: Optional[str]) -> Tuple[FeatureRecord, bool]:
+        content_hash = self.content_hash(item_name, description)
+        if item_id is not None:
+            previous = self._hash_by_id.get(item_id)
+            if previous is not None and previous != content_hash:
+                self.stale += 1
+                self._records.pop(previous, None)
+                self._disk_delete(item_id, content_hash)
+            self._hash_by_id[item_id] = content_hash
+
+        record = self._records.get(content_hash)
+        if record is not None:
+            self._records.move_to_end(content_hash)
+            self.hits += 1
+            return record, False
+
+        bits = self._disk_get(content_hash)
+        if bits is not None:
+            record = FeatureRecord(content_hash, bits, self.decode(bits))
+            self._store(record)
+            self.hits += 1
+            self.disk_hits += 1
+            return record, False
+
+        self.misses += 1
+        tokens = self.matcher.tokens(item_name, description)
+        record = FeatureRecord(content_hash, self.encode(tokens), tokens)
+        self._store(record)
+        return record, True
+
+    def _store(self, record: FeatureRecord):
+        self._records[record.content_hash] = record
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+            self.evictions += 1
+        if len(self._hash_by_id) > self.max_entries * 2:
+            # Ids of deleted items would otherwise accumulate forever
+            self._hash_by_id.clear()
+
+    def _disk_get(self, content_hash: str) -> Optional[int]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT bits FROM item_features WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Feature cache disk read failed: {e}")
+            return None
+        return int(row[0], 16) if row is not None else None
+
+    def _disk_put(self, records: List[Tuple[str, Optional[str], int]]):
+        if self._db is None or not records:
+            return
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO item_features (content_hash, item_id, bits) VALUES (?, ?, ?)",
+                [(content_hash, item_id, format(bits, "x")) for content_hash, item_id, bits in records]
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Feature cache disk write failed: {e}")
+
+    def _disk_delete(self, item_id: str, current_hash: str):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "DELETE FROM item_features WHERE item_id = ? AND content_hash != ?", (item_id, current_hash)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Feature cache disk delete failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._records),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "disk_tier": self._db is not None
+        }
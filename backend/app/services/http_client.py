@@ -0,0 +1,203 @@
+"""Shared, pooled async HTTP client for all outbound calls"""
+import time
+import random
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for transient upstream failures"""
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        retry_on_status: Iterable[int] = RETRYABLE_STATUS_CODES
+    ):
+        self.attempts = max(1, attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_on_status = frozenset(retry_on_status)
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+# Safe for idempotent reads
+DEFAULT_RETRY = RetryPolicy()
+# Non-idempotent or paid calls: only retry when the connection was never made
+CONNECT_RETRY = RetryPolicy(attempts=3, retry_on_status=())
+# Streamed request bodies can only be sent once
+NO_RETRY = RetryPolicy(attempts=1, retry_on_status=())
+
+
+class HostStats:
+    __slots__ = ("requests", "errors", "retries", "in_flight", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.total_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 2)
+        }
+
+
+class HttpClient:
+    """Lifespan-managed httpx.AsyncClient with per-host limits, retries and metrics"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        max_connections_per_host: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        # Replaces the network, e.g. with httpx.MockTransport in tests
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._host_stats: Dict[str, HostStats] = {}
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections
+            ),
+            timeout=self.timeout,
+            http2=self.http2,
+            transport=self.transport
+        )
+        logger.info(f"HTTP client started (http2={'on' if self.http2 else 'off'}, max_connections={self.max_connections})")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("HTTP client is not started")
+        return self._client
+
+    def _host(self, url: str) -> str:
+        return urlsplit(url).hostname or "unknown"
+
+    def _stats(self, host: str) -> HostStats:
+        stats = self._host_stats.get(host)
+        if stats is None:
+            stats = self._host_stats[host] = HostStats()
+        return stats
+
+    def _limit(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return semaphore
+
+    @asynccontextmanager
+    async def _track(self, host: str):
+        stats = self._stats(host)
+        async with self._limit(host):
+            stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                yield stats
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                stats.in_flight -= 1
+                stats.requests += 1
+                stats.total_seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+
+    async def request(self, method: str, url: str, retry: RetryPolicy = DEFAULT_RETRY, **kwargs) -> httpx.Response:
+        """Send a request, retrying transient failures according to the policy"""
+        host = self._host(url)
+        for attempt in range(retry.attempts):
+            last_attempt = attempt == retry.attempts - 1
+            try:
+                async with self._track(host):
+                    response = await self.client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if last_attempt:
+                    raise
+            except httpx.TransportError:
+                # The request may have reached the upstream; only retry where that's harmless
+                if last_attempt or not retry.retry_on_status:
+                    raise
+            else:
+                if response.status_code not in retry.retry_on_status or last_attempt:
+                    return response
+                await response.aclose()
+
+            self._stats(host).retries += 1
+            await asyncio.sleep(retry.delay(attempt))
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Send a request and read the response body incrementally; never retried"""
+        async with self._track(self._host(url)):
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        kwargs.setdefault("retry", CONNECT_RETRY)
+        return await self.request("POST", url, **kwargs)
+
+    def metrics(self) -> dict:
+        pool_in_flight = sum(stats.in_flight for stats in self._host_stats.values())
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight": pool_in_flight,
+            "pool_saturation": round(pool_in_flight / self.max_connections, 4) if self.max_connections else 0.0,
+            "hosts": {
+                host: {**stats.as_dict(), "saturation": round(stats.in_flight / self.max_connections_per_host, 4)}
+                for host, stats in self._host_stats.items()
+            }
+        }
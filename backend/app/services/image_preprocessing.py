@@ -0,0 +1,152 @@
+"""Downscale and recompress uploads before they are sent to the vision model"""
+import io
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from ..utils.perceptual_hash import color_signature, dhash, phash
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+class PreparedImage:
+    __slots__ = ("data", "content_type", "width", "height", "original_bytes", "phash", "dhash", "color")
+
+    def __init__(
+        self,
+        data: bytes,
+        content_type: str,
+        width: int,
+        height: int,
+        original_bytes: int,
+        phash: Optional[int] = None,
+        dhash: Optional[int] = None,
+        color: Optional[int] = None
+    ):
+        self.data = data
+        self.content_type = content_type
+        self.width = width
+        self.height = height
+        self.original_bytes = original_bytes
+        # Perceptual hashes of the decoded pixels, for recognising re-uploads
+        self.phash = phash
+        self.dhash = dhash
+        # Both hashes are grayscale; the mean colour tells a red shirt from the same shirt in blue
+        self.color = color
+
+
+def prepare_image(data: bytes, max_edge: int = 1024, image_format: str = "JPEG", quality: int = 85) -> PreparedImage:
+    """Decode at reduced size, fix orientation, fit within max_edge and re-encode without metadata
+
+    Runs in a worker process. JPEGs are decoded in draft mode, which scales
+    by 1/2, 1/4 or 1/8 inside the decoder, so a 12 megapixel photo never
+    exists in memory at full size. A small original without EXIF comes back
+    unchanged when re-encoding would not make it smaller.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        source_format = image.format
+        if image.format == "JPEG":
+            image.draft("RGB", (max_edge, max_edge))
+        # Orientation lives in EXIF, which is dropped on save; apply it to the pixels first
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=3.0)
+
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            # Neither target keeps alpha the way the model sees it; flatten onto white
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=quality, optimize=image_format == "JPEG")
+        width, height = image.size
+        # Hashed from the already small, upright image while it is decoded anyway
+        hashes = {"phash": phash(image), "dhash": dhash(image), "color": color_signature(image)}
+
+    if buffer.tell() >= len(data) and source_format in MIME_TYPES and max(width, height) <= max_edge:
+        with Image.open(io.BytesIO(data)) as original:
+            if original.size == (width, height) and not original.getexif():
+                return PreparedImage(bytes(data), MIME_TYPES[source_format], width, height, len(data), **hashes)
+    return PreparedImage(buffer.getvalue(), MIME_TYPES[image_format], width, height, len(data), **hashes)
+
+
+class ImagePreprocessor:
+    """prepare_image in a process pool, keeping decoding and encoding off the event loop"""
+
+    def __init__(self, max_edge: int = 1024, image_format: str = "jpeg", quality: int = 85, workers: int = 2):
+        self.max_edge = max_edge
+        self.image_format = image_format.upper()
+        if self.image_format not in MIME_TYPES:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        self.quality = quality
+        self.workers = workers
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.images = 0
+        self.failures = 0
+        self.pool_restarts = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_seconds = 0.0
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        # workers=0 runs in a thread instead, e.g. where processes can't be spawned
+        if self._pool is None and self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def prepare(self, data) -> PreparedImage:
+        # Memoryviews don't pickle; the worker needs its own copy anyway
+        data = bytes(data)
+        started = time.perf_counter()
+        pool = self._executor()
+        args = (data, self.max_edge, self.image_format, self.quality)
+        try:
+            if pool is None:
+                prepared = await asyncio.to_thread(prepare_image, *args)
+            else:
+                prepared = await asyncio.get_running_loop().run_in_executor(pool, prepare_image, *args)
+        except BrokenProcessPool:
+            # A worker died (out of memory on a huge image, say); the pool is unusable from now on
+            self.failures += 1
+            if self._pool is pool:
+                logger.warning("Image preprocessing pool broke, starting a new one")
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self.pool_restarts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        self.images += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(prepared.data)
+        self.total_seconds += time.perf_counter() - started
+        return prepared
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "max_edge": self.max_edge,
+            "format": self.image_format,
+            "images": self.images,
+            "failures": self.failures,
+            "pool_restarts": self.pool_restarts,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+            "avg_ms": round(self.total_seconds / self.images * 1000, 2) if self.images else 0.0
+        }
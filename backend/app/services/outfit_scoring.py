@@ -0,0 +1,384 @@
+"""Declarative occasion scoring rules compiled into a single keyword matcher"""
+import re
+import logging
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+OCCASION_REQUIREMENTS = {
+    'business': {
+        'style': 'formal',
+        'required_categories': ['Tops', 'Bottoms'],
+        'optional_categories': ['Outerwear', 'Shoes'],
+        'color_preferences': ['neutral', 'professional'],
+        'description': 'Professional business attire suitable for meetings and office environments',
+        'inappropriate_items': ['shorts', 'jeans', 't-shirts', 'sweatshirts', 'cargo pants'],
+        'preferred_items': ['dress pants', 'slacks', 'chinos', 'button-down shirts', 'polo shirts', 'blazers']
+    },
+    'date': {
+        'style': 'elegant',
+        'required_categories': ['Tops', 'Bottoms'],
+        'optional_categories': ['Outerwear', 'Shoes', 'Accessories'],
+        'color_preferences': ['romantic', 'stylish'],
+        'description': 'Elegant and attractive outfit perfect for romantic evenings',
+        'inappropriate_items': ['shorts', 'cargo pants', 'sweatshirts', 'workout clothes'],
+        'preferred_items': ['dress pants', 'chinos', 'button-down shirts', 'polo shirts', 'blazers']
+    },
+    'casual': {
+        'style': 'comfortable',
+        'required_categories': ['Tops', 'Bottoms'],
+        'optional_categories': ['Outerwear', 'Shoes'],
+        'color_preferences': ['versatile', 'comfortable'],
+        'description': 'Comfortable and stylish casual wear for everyday activities',
+        'inappropriate_items': ['suit jackets', 'dress pants'],
+        'preferred_items': ['jeans', 'chinos', 'polo shirts', 't-shirts', 'sweatshirts']
+    },
+    'weekend': {
+        'style': 'relaxed',
+        'required_categories': ['Tops', 'Bottoms'],
+        'optional_categories': ['Outerwear', 'Shoes'],
+        'color_preferences': ['casual', 'comfortable'],
+        'description': 'Relaxed weekend wear for leisure activities and social gatherings',
+        'inappropriate_items': ['suit jackets', 'dress pants', 'formal shirts'],
+        'preferred_items': ['jeans', 'chinos', 'polo shirts', 't-shirts', 'sweatshirts']
+    },
+    'evening': {
+        'style': 'sophisticated',
+        'required_categories': ['Tops', 'Bottoms'],
+        'optional_categories': ['Outerwear', 'Shoes', 'Accessories'],
+        'color_preferences': ['elegant', 'dramatic'],
+        'description': 'Sophisticated evening wear for formal events and special occasions',
+        'inappropriate_items': ['shorts', 'cargo pants', 'sweatshirts', 'workout clothes'],
+        'preferred_items': ['dress pants', 'slacks', 'button-down shirts', 'polo shirts', 'blazers']
+    },
+    'workout': {
+        'style': 'athletic',
+        'required_categories': ['Tops', 'Bottoms'],
+        'optional_categories': ['Shoes', 'Accessories'],
+        'color_preferences': ['energetic', 'comfortable'],
+        'description': 'Performance athletic wear for gym workouts and physical activities',
+        'inappropriate_items': ['dress pants', 'blazers', 'formal shirts', 'dress shoes'],
+        'preferred_items': ['athletic shorts', 'workout pants', 'performance shirts', 'tank tops']
+    },
+    'travel': {
+        'style': 'versatile',
+        'required_categories': ['Tops', 'Bottoms'],
+        'optional_categories': ['Outerwear', 'Shoes'],
+        'color_preferences': ['versatile', 'comfortable'],
+        'description': 'Versatile travel wear that is comfortable and easy to mix and match',
+        'inappropriate_items': ['suit jackets', 'formal dress pants'],
+        'preferred_items': ['chinos', 'jeans', 'polo shirts', 'button-down shirts', 'blazers']
+    }
+}
+
+# Feature tokens: a bare keyword means "in the name or the description",
+# "name:<keyword>" means "in the name" and DESCRIBED means "has a description"
+NAME_PREFIX = "name:"
+DESCRIBED = "@description"
+
+Clause = Tuple[Tuple[str, ...], int]
+Chain = List[Clause]
+
+
+def name_or_described(*words: str) -> Tuple[str, ...]:
+    # The comfortable-style checks were written as `word in item_name or description`,
+    # which holds for every item that has any description; kept for identical scores
+    return tuple(NAME_PREFIX + word for word in words) + (DESCRIBED,)
+
+
+# Per style, a list of chains. A chain is an if/elif ladder: only its first
+# matching clause adds its delta. A clause matches if any of its tokens is present.
+STYLE_RULES: Dict[str, List[Chain]] = {
+    'formal': [
+        [
+            (('blazer', 'suit', 'dress', 'shirt', 'polo', 'button-down', 'oxford'), 8),
+            (('dress pants', 'slacks', 'chinos', 'trousers', 'pants'), 8),
+            (('pants', 'trousers'), 5)
+        ],
+        [
+            (('shorts', 'jeans', 'sweatshirt', 'hoodie', 't-shirt', 'cargo', 'athletic', 'tank', 'sports'), -15),
+            (('casual', 'relaxed', 'loose'), -8)
+        ]
+    ],
+    'elegant': [
+        [
+            (('blazer', 'suit', 'dress', 'shirt', 'polo', 'button-down'), 4),
+            (('dress pants', 'slacks', 'chinos', 'trousers'), 4),
+            (('pants', 'trousers'), 2)
+        ],
+        [
+            (('shorts', 'cargo', 'sweatshirt', 'hoodie'), -8),
+            (('jeans', 't-shirt'), -3)
+        ]
+    ],
+    'casual': [
+        [
+            (('jeans', 't-shirt', 'sweatshirt', 'hoodie', 'polo', 'shorts'), 3),
+            (('casual', 'relaxed', 'comfortable'), 2)
+        ],
+        [
+            (('suit', 'dress pants', 'blazer'), -2)
+        ]
+    ],
+    'athletic': [
+        [
+            (('gym', 'workout', 'athletic', 'sports', 'performance', 'moisture-wicking'), 5),
+            (('shorts', 'pants', 'shirt', 'tank'), 2)
+        ],
+        [
+            (('blazer', 'suit', 'dress', 'dress pants'), -8)
+        ]
+    ],
+    'comfortable': [
+        [
+            (name_or_described('comfortable', 'relaxed', 'soft', 'breathable'), 3),
+            (name_or_described('cotton', 'blend', 'stretch'), 1)
+        ],
+        [
+            (name_or_described('tight', 'restrictive', 'stiff'), -3)
+        ]
+    ]
+}
+
+# Extra chains for a (style, lowercased category) pair
+CATEGORY_RULES: Dict[Tuple[str, str], List[Chain]] = {
+    ('formal', 'bottoms'): [
+        [
+            (('shorts',), -15),
+            (('pants',), 8),
+            (('dress',), 10)
+        ]
+    ],
+    ('formal', 'tops'): [
+        [
+            (('athletic', 'tank', 'sports', 'workout', 'gym'), -20),
+            (('polo', 'shirt', 'button-down', 'oxford'), 10)
+        ]
+    ]
+}
+
+# Color preference -> keywords and bonus, each preference scored independently
+COLOR_RULES: Dict[str, Clause] = {
+    'neutral': (('black', 'white', 'gray', 'navy', 'beige', 'brown', 'charcoal'), 3),
+    'professional': (('navy', 'black', 'gray', 'white', 'charcoal'), 3),
+    'romantic': (('red', 'pink', 'purple', 'rose', 'burgundy'), 2),
+    'versatile': (('black', 'white', 'gray', 'navy', 'beige'), 2)
+}
+
+# Context keyword -> delta per style
+CONTEXT_RULES: Dict[str, Dict[str, int]] = {
+    'business': {'formal': 3, 'casual': -1},
+    'casual': {'formal': -3, 'casual': 2}
+}
+
+INAPPROPRIATE_PENALTY = -12
+PREFERRED_BONUS = 8
+
+
+def _keyword(token: str) -> Optional[str]:
+    if token == DESCRIBED:
+        return None
+    return token[len(NAME_PREFIX):] if token.startswith(NAME_PREFIX) else token
+
+
+def _rule_keywords() -> List[str]:
+    tokens = []
+    for chains in list(STYLE_RULES.values()) + list(CATEGORY_RULES.values()):
+        for chain in chains:
+            for clause_tokens, _ in chain:
+                tokens.extend(clause_tokens)
+    for clause_tokens, _ in COLOR_RULES.values():
+        tokens.extend(clause_tokens)
+    tokens.extend(CONTEXT_RULES)
+    for req in OCCASION_REQUIREMENTS.values():
+        tokens.extend(req['inappropriate_items'])
+        tokens.extend(req['preferred_items'])
+    return [keyword for keyword in map(_keyword, tokens) if keyword]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation factored by common prefixes, e.g. dress|dress pants -> dress(?: pants)?"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Finds every keyword occurring as a substring of a text with one regex pass
+
+    The pattern is a lookahead over a trie of all keywords with greedy
+    optional suffixes, so each position yields the longest keyword starting
+    there; the shorter keywords that are prefixes of it are added from a
+    precomputed closure.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = frozenset(keyword.lower() for keyword in keywords if keyword)
+        self.pattern = re.compile("(?=(" + _trie_pattern(self.keywords) + "))") if self.keywords else None
+        self.closure: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(other for other in self.keywords if keyword.startswith(other))
+            for keyword in self.keywords
+        }
+
+    def find(self, text: str) -> FrozenSet[str]:
+        if not text or self.pattern is None:
+            return frozenset()
+        found = set()
+        for longest in set(self.pattern.findall(text)):
+            found |= self.closure[longest]
+        return frozenset(found)
+
+    def tokens(self, item_name: str, description: str) -> FrozenSet[str]:
+        """Feature tokens for one item; inputs must already be lowercased"""
+        in_name = self.find(item_name)
+        tokens = set(in_name) | self.find(description)
+        tokens.update(NAME_PREFIX + keyword for keyword in in_name)
+        if description:
+            tokens.add(DESCRIBED)
+        return frozenset(tokens)
+
+
+DEFAULT_MATCHER = KeywordMatcher(_rule_keywords())
+
+
+@lru_cache(maxsize=64)
+def _matcher_for(extra_keywords: FrozenSet[str]) -> KeywordMatcher:
+    return KeywordMatcher(DEFAULT_MATCHER.keywords | extra_keywords)
+
+
+def matcher_for(keywords: Iterable[str]) -> KeywordMatcher:
+    """The shared matcher, or one extended with keywords the rule table doesn't know"""
+    extra = frozenset(keyword.lower() for keyword in keywords if keyword) - DEFAULT_MATCHER.keywords
+    return _matcher_for(extra) if extra else DEFAULT_MATCHER
+
+
+class ItemFeatures:
+    """Keyword tokens and category of one wardrobe item, extracted once per request"""
+    __slots__ = ("item", "tokens", "category")
+
+    def __init__(self, item: dict, tokens: FrozenSet[str], category: str):
+        self.item = item
+        self.tokens = tokens
+        self.category = category
+
+
+def extract_features(items: Sequence[dict], matcher: KeywordMatcher = DEFAULT_MATCHER) -> List[ItemFeatures]:
+    features = []
+    for item in items:
+        item_name = (item.get('item_name') or '').lower()
+        description = (item.get('description') or '').lower()
+        category = (item.get('category') or '').lower()
+        features.append(ItemFeatures(item, matcher.tokens(item_name, description), category))
+    return features
+
+
+def _compile_chains(chains: Iterable[Chain]) -> Tuple[Tuple[Tuple[FrozenSet[str], int], ...], ...]:
+    return tuple(
+        tuple((frozenset(clause_tokens), delta) for clause_tokens, delta in chain)
+        for chain in chains
+    )
+
+
+class OccasionScorer:
+    """The rule table specialised to one style, color preferences and item lists"""
+
+    def __init__(
+        self,
+        style: str,
+        color_preferences: Sequence[str],
+        inappropriate_items: Sequence[str] = (),
+        preferred_items: Sequence[str] = ()
+    ):
+        self.style = style
+        chains = list(STYLE_RULES.get(style, []))
+        chains.extend(
+            [(preference_keywords, delta)]
+            for preference, (preference_keywords, delta) in COLOR_RULES.items()
+            if preference in color_preferences
+        )
+        chains.extend(
+            [((keyword,), deltas[style])]
+            for keyword, deltas in CONTEXT_RULES.items()
+            if style in deltas
+        )
+        self.chains = _compile_chains(chains)
+        self.chains_by_category = {
+            category: self.chains + _compile_chains(category_chains)
+            for (rule_style, category), category_chains in CATEGORY_RULES.items()
+            if rule_style == style
+        }
+
+        # Every listed word counts separately, duplicates included
+        self.keyword_deltas: List[Tuple[str, int]] = (
+            [(word.lower(), INAPPROPRIATE_PENALTY) for word in inappropriate_items or ()]
+            + [(word.lower(), PREFERRED_BONUS) for word in preferred_items or ()]
+        )
+        self.matcher = matcher_for(word for word, _ in self.keyword_deltas)
+
+    def score(self, features: ItemFeatures) -> int:
+        tokens = features.tokens
+        score = 0
+        for chain in self.chains_by_category.get(features.category, self.chains):
+            for clause_tokens, delta in chain:
+                if not clause_tokens.isdisjoint(tokens):
+                    score += delta
+                    break
+        for word, delta in self.keyword_deltas:
+            if word in tokens:
+                score += delta
+        return score
+
+
+@lru_cache(maxsize=256)
+def _cached_scorer(style, color_preferences, inappropriate_items, preferred_items) -> OccasionScorer:
+    return OccasionScorer(style, color_preferences, inappropriate_items, preferred_items)
+
+
+def get_scorer(
+    style: str,
+    color_preferences: Sequence[str],
+    inappropriate_items: Optional[Sequence[str]] = None,
+    preferred_items: Optional[Sequence[str]] = None
+) -> OccasionScorer:
+    """Compiled scorer for the given occasion parameters, built once and reused"""
+    return _cached_scorer(
+        style,
+        tuple(color_preferences or ()),
+        tuple(inappropriate_items or ()),
+        tuple(preferred_items or ())
+    )
+
+
+def occasion_scorer(occasion_id: str) -> OccasionScorer:
+    req = OCCASION_REQUIREMENTS[occasion_id]
+    return get_scorer(req['style'], req['color_preferences'], req['inappropriate_items'], req['preferred_items'])
+
+
+class KeywordRanking:
+    """Item scores per (occasion, category), scoring items one by one as categories are asked for"""
+
+    def __init__(self, wardrobe_by_category: Dict[str, List[dict]], feature_cache=None):
+        # Extract keyword features once (or take them from a FeatureCache); every occasion reuses them
+        extract = feature_cache.features if feature_cache is not None else extract_features
+        self.features_by_category = {
+            category: extract(items)
+            for category, items in wardrobe_by_category.items()
+        }
+
+    def item_scores(self, occasion_id: str, category: str) -> Tuple[List[dict], List[int]]:
+        features = self.features_by_category.get(category) or []
+        scorer = occasion_scorer(occasion_id)
+        return [item_features.item for item_features in features], [scorer.score(item_features) for item_features in features]
@@ -0,0 +1,184 @@
+"""Top-K whole outfits from per-item scores and pairwise colour compatibility"""
+import re
+import time
+import heapq
+import logging
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Colour word -> family; neutrals go with everything
+COLOR_FAMILIES = {
+    'black': 'neutral', 'white': 'neutral', 'gray': 'neutral', 'grey': 'neutral', 'navy': 'neutral',
+    'beige': 'neutral', 'brown': 'neutral', 'charcoal': 'neutral', 'cream': 'neutral', 'khaki': 'neutral',
+    'tan': 'neutral', 'ivory': 'neutral', 'denim': 'neutral',
+    'red': 'red', 'burgundy': 'red', 'maroon': 'red', 'crimson': 'red',
+    'pink': 'pink', 'rose': 'pink', 'blush': 'pink',
+    'orange': 'orange', 'rust': 'orange', 'coral': 'orange',
+    'yellow': 'yellow', 'mustard': 'yellow', 'gold': 'yellow',
+    'green': 'green', 'olive': 'green', 'emerald': 'green', 'mint': 'green',
+    'blue': 'blue', 'teal': 'blue', 'turquoise': 'blue', 'cobalt': 'blue',
+    'purple': 'purple', 'lavender': 'purple', 'violet': 'purple', 'plum': 'purple'
+}
+
+# Family pairs that tend to clash when worn together
+CLASHING_FAMILIES = {
+    frozenset(('red', 'pink')), frozenset(('red', 'orange')), frozenset(('orange', 'pink')),
+    frozenset(('red', 'green')), frozenset(('orange', 'purple')), frozenset(('yellow', 'purple'))
+}
+
+NEUTRAL_BONUS = 1.0
+SAME_FAMILY_BONUS = 0.5
+CLASH_PENALTY = -2.0
+BUSY_PENALTY = -0.5  # two different non-neutral colours that don't clash outright
+
+_COLOR_WORD = re.compile(r"\b(" + "|".join(sorted(COLOR_FAMILIES, key=len, reverse=True)) + r")\b")
+
+
+def color_families(item: dict) -> FrozenSet[str]:
+    text = f"{item.get('item_name') or ''} {item.get('description') or ''}".lower()
+    return frozenset(COLOR_FAMILIES[word] for word in _COLOR_WORD.findall(text))
+
+
+def pair_score(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """Colour compatibility of two items; 0 when either has no known colour"""
+    if not first or not second:
+        return 0.0
+    if 'neutral' in first or 'neutral' in second:
+        return NEUTRAL_BONUS
+    if first & second:
+        return SAME_FAMILY_BONUS
+    if any(frozenset((a, b)) in CLASHING_FAMILIES for a in first for b in second):
+        return CLASH_PENALTY
+    return BUSY_PENALTY
+
+
+PAIR_MAX = max(NEUTRAL_BONUS, SAME_FAMILY_BONUS, 0.0)
+PAIR_MIN = min(CLASH_PENALTY, BUSY_PENALTY, 0.0)
+
+
+class Slot:
+    """Candidates for one category of the outfit, best first"""
+    __slots__ = ("category", "items", "scores", "colors", "optional")
+
+    def __init__(self, category: str, items: List[dict], scores: List[float], optional: bool):
+        order = sorted(range(len(items)), key=lambda i: -scores[i])
+        self.category = category
+        self.items = [items[i] for i in order]
+        self.scores = [float(scores[i]) for i in order]
+        self.colors = [color_families(item) for item in self.items]
+        self.optional = optional
+
+
+class OutfitSearch:
+    """Branch-and-bound over one item per slot, keeping the K best outfits
+
+    An outfit scores the sum of its items' occasion scores plus the colour
+    compatibility of every pair of items. Before searching, each slot keeps
+    only candidates that could still appear in a top-K outfit: if K items of
+    the slot beat a candidate by more than the largest change swapping it
+    could cause in its pair scores, the candidate can't make the cut. The
+    depth-first search then expands candidates best first and cuts any
+    branch whose optimistic bound can't beat the current K-th outfit. When
+    the time budget runs out the best outfits found so far are returned.
+    Slots are also capped at max_candidates items to keep worst cases bounded.
+    """
+
+    def __init__(self, k: int = 3, budget_seconds: float = 0.05, max_candidates: int = 50):
+        self.k = max(1, k)
+        self.budget_seconds = budget_seconds
+        self.max_candidates = max_candidates
+        self.nodes = 0
+        self.timed_out = False
+
+    def _prune(self, slot: Slot, other_slots: int):
+        swing = other_slots * (PAIR_MAX - PAIR_MIN)
+        if len(slot.scores) > self.k:
+            threshold = slot.scores[self.k - 1] - swing
+            keep = sum(1 for score in slot.scores if score >= threshold)
+            keep = min(keep, max(self.k, self.max_candidates))
+            slot.items, slot.scores, slot.colors = slot.items[:keep], slot.scores[:keep], slot.colors[:keep]
+
+    def search(self, slots: Sequence[Slot]) -> List[Tuple[float, List[dict]]]:
+        slots = [slot for slot in slots if slot.items]
+        if not slots:
+            return []
+        for slot in slots:
+            self._prune(slot, len(slots) - 1)
+
+        # Optimistic remainder after depth d: best items of later slots, best possible pairs
+        best_rest = [0.0] * (len(slots) + 1)
+        for depth in range(len(slots) - 1, -1, -1):
+            best_item = max(slots[depth].scores[0], 0.0) if slots[depth].optional else slots[depth].scores[0]
+            pairs_added = depth  # pairs the slot at this depth forms with earlier slots
+            best_rest[depth] = best_rest[depth + 1] + best_item + pairs_added * PAIR_MAX
+
+        deadline = time.perf_counter() + self.budget_seconds
+        self.nodes = 0
+        self.timed_out = False
+        # Min-heap of (score, sequence, items) holding the best K outfits found
+        top: List[Tuple[float, int, List[dict]]] = []
+        sequence = 0
+        chosen_items: List[Optional[dict]] = []
+        chosen_colors: List[FrozenSet[str]] = []
+
+        def visit(depth: int, score: float):
+            nonlocal sequence
+            if self.timed_out:
+                return
+            self.nodes += 1
+            if self.nodes & 255 == 0 and time.perf_counter() > deadline:
+                self.timed_out = True
+                return
+            if depth == len(slots):
+                outfit = [item for item in chosen_items if item is not None]
+                sequence += 1
+                entry = (score, -sequence, outfit)
+                if len(top) < self.k:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+                return
+
+            slot = slots[depth]
+            rest = best_rest[depth + 1]
+            for item, item_score, colors in zip(slot.items, slot.scores, slot.colors):
+                if len(top) == self.k and score + item_score + depth * PAIR_MAX + rest <= top[0][0]:
+                    break  # candidates are sorted, so no later one can bound higher
+                total = score + item_score + sum(pair_score(colors, other) for other in chosen_colors)
+                if len(top) == self.k and total + rest <= top[0][0]:
+                    continue
+                chosen_items.append(item)
+                chosen_colors.append(colors)
+                visit(depth + 1, total)
+                chosen_items.pop()
+                chosen_colors.pop()
+
+            # An optional category may also be left out
+            if slot.optional and not (len(top) == self.k and score + rest <= top[0][0]):
+                chosen_items.append(None)
+                chosen_colors.append(frozenset())
+                visit(depth + 1, score)
+                chosen_items.pop()
+                chosen_colors.pop()
+
+        visit(0, 0.0)
+        if self.timed_out:
+            logger.info(f"Outfit search hit its {self.budget_seconds * 1000:.0f}ms budget after {self.nodes} nodes")
+        return [(score, outfit) for score, _, outfit in sorted(top, reverse=True)]
+
+
+def build_slots(ranking, occasion_id: str, required: Sequence[str], optional: Sequence[str], max_items: int = 4) -> List[Slot]:
+    """One slot per required category plus optional ones while the outfit has room"""
+    slots = []
+    for category in required:
+        items, scores = ranking.item_scores(occasion_id, category)
+        if items:
+            slots.append(Slot(category, items, scores, optional=False))
+    for category in optional:
+        if len(slots) >= max_items:
+            break
+        items, scores = ranking.item_scores(occasion_id, category)
+        if items:
+            slots.append(Slot(category, items, scores, optional=True))
+    return slots
@@ -0,0 +1,191 @@
+"""Sliding-window rate limiting with in-memory and Redis backends"""
+import abc
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WindowCounter:
+    """Request counts for the current and previous fixed window of one key"""
+    __slots__ = ("window", "current", "previous", "expires_at")
+
+    def __init__(self, window: int, expires_at: float):
+        self.window = window
+        self.current = 0
+        self.previous = 0
+        self.expires_at = expires_at
+
+
+class RateLimitBackend(abc.ABC):
+    """Storage for rate-limit counters
+
+    hit() records one request for key and returns whether it is within limit
+    requests per window_seconds. Implementations use the sliding-window-counter
+    approximation: the previous fixed window's count is weighted by how much of
+    it still overlaps the sliding window.
+    """
+
+    @abc.abstractmethod
+    async def hit(self, key: str, limit: int, window_seconds: int) -> bool:
+        ...
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryBackend(RateLimitBackend):
+    """Per-process counters: O(1) time and memory per key, idle keys swept periodically"""
+
+    def __init__(self, sweep_interval: float = 60.0, clock: Callable[[], float] = time.time):
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.counters: Dict[str, WindowCounter] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + sweep_interval
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> bool:
+        return self.check(key, limit, window_seconds)
+
+    def check(self, key: str, limit: int, window_seconds: int) -> bool:
+        """hit() without the coroutine, for callers that aren't async"""
+        now = self.clock()
+        window = int(now // window_seconds)
+
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+                self._next_sweep = now + self.sweep_interval
+
+            counter = self.counters.get(key)
+            if counter is None:
+                counter = self.counters[key] = WindowCounter(window, (window + 2) * window_seconds)
+            elif counter.window != window:
+                counter.previous = counter.current if counter.window == window - 1 else 0
+                counter.current = 0
+                counter.window = window
+                counter.expires_at = (window + 2) * window_seconds
+
+            overlap = 1.0 - (now % window_seconds) / window_seconds
+            if counter.previous * overlap + counter.current >= limit:
+                return False
+
+            counter.current += 1
+            return True
+
+    def _sweep(self, now: float):
+        """Drop keys whose counts no longer affect any decision"""
+        idle = [key for key, counter in self.counters.items() if counter.expires_at <= now]
+        for key in idle:
+            del self.counters[key]
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self.counters)}
+
+
+# KEYS[1]: current window counter, KEYS[2]: previous window counter
+# ARGV: limit, window length in seconds, overlap weight of the previous window
+SLIDING_WINDOW_SCRIPT = """
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if previous * tonumber(ARGV[3]) + current >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]) * 2)
+return 1
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Counters shared by every worker through Redis, updated atomically by a Lua script
+
+    Uses the asyncio client, so a slow or unreachable Redis holds up only
+    the request being checked, not the event loop. If Redis is unreachable,
+    requests are checked against a local in-memory backend instead so an
+    outage doesn't take the API down with it.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        prefix: str = "ratelimit",
+        socket_timeout: float = 0.25,
+        client=None,
+        clock: Callable[[], float] = time.time
+    ):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.Redis(host=host, port=port, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+        self.fallback = InMemoryBackend(clock=clock)
+        self.errors = 0
+        self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> bool:
+        now = self.clock()
+        window = int(now // window_seconds)
+        overlap = 1.0 - (now % window_seconds) / window_seconds
+        # The hash tag keeps both windows of a key on one cluster slot
+        base = f"{self.prefix}:{{{key}}}"
+        try:
+            allowed = await self._script(
+                keys=[f"{base}:{window}", f"{base}:{window - 1}"],
+                args=[limit, window_seconds, overlap]
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis rate limit check failed, using local counters: {e}")
+            return self.fallback.check(key, limit, window_seconds)
+        return bool(int(allowed))
+
+    async def close(self):
+        try:
+            await self.client.aclose()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "errors": self.errors, "fallback_keys": len(self.fallback.counters)}
+
+
+class RateLimiter:
+    """Per-client request limits, optionally with a separate budget per endpoint scope"""
+
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 3600,
+        backend: Optional[RateLimitBackend] = None,
+        scopes: Optional[Dict[str, Tuple[int, int]]] = None
+    ):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.backend = backend or InMemoryBackend()
+        # scope name -> (max_requests, window_seconds)
+        self.scopes = dict(scopes or {})
+
+    async def is_allowed(self, client_id: str, scope: str = "default") -> bool:
+        max_requests, window_seconds = self.scopes.get(scope, (self.max_requests, self.window_seconds))
+        return await self.backend.hit(f"{scope}:{client_id}", max_requests, window_seconds)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            **self.backend.stats(),
+            "default": {"max_requests": self.max_requests, "window_seconds": self.window_seconds},
+            "scopes": {
+                scope: {"max_requests": limit, "window_seconds": window}
+                for scope, (limit, window) in self.scopes.items()
+            }
+        }
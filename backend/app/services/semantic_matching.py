@@ -0,0 +1,210 @@
+"""Occasion matching by embedding similarity instead of keyword lists"""
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+from .outfit_scoring import OCCASION_REQUIREMENTS
+from .vector_index import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Canonical forms for the offline embedder, which has no notion of meaning on its own
+SYNONYMS = {
+    "trousers": "pants", "slacks": "pants", "chinos": "pants", "joggers": "pants", "sweatpants": "pants",
+    "tee": "tshirt", "tees": "tshirt", "tshirts": "tshirt",
+    "sneakers": "shoes", "trainers": "shoes", "loafers": "shoes", "oxfords": "shoes",
+    "jumper": "sweater", "pullover": "sweater", "sweatshirt": "sweater", "hoodie": "sweater",
+    "jacket": "coat", "parka": "coat", "overcoat": "coat",
+    "denim": "jeans",
+    "gym": "workout", "training": "workout", "athletic": "workout", "sports": "workout", "sport": "workout",
+    "formal": "dressy", "elegant": "dressy", "smart": "dressy",
+    "relaxed": "casual", "comfy": "comfortable", "laidback": "casual",
+    "grey": "gray"
+}
+
+
+class HashingEmbedder(Embeddings):
+    """Deterministic local embedding for offline use and tests
+
+    Words (mapped through SYNONYMS), word bigrams and character trigrams are
+    hashed into signed buckets of a fixed-size vector. Same text, same vector,
+    on every machine; no network and no model download.
+    """
+
+    model = "hashing"
+
+    def __init__(self, dim: int = 256, synonyms: Optional[Dict[str, str]] = None):
+        self.dim = dim
+        self.synonyms = SYNONYMS if synonyms is None else synonyms
+
+    def _bucket(self, feature: str):
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def _features(self, text: str):
+        words = [self.synonyms.get(word, word) for word in _WORD.findall(text.lower().replace("-", ""))]
+        for word in words:
+            yield f"w:{word}", 1.0
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                yield f"c:{padded[i:i + 3]}", 0.25
+        for first, second in zip(words, words[1:]):
+            yield f"b:{first} {second}", 0.5
+
+    def embed_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                bucket, sign = self._bucket(feature)
+                matrix[row, bucket] += sign * weight
+        return normalize_rows(matrix)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_matrix([text])[0].tolist()
+
+
+def item_text(item: dict) -> str:
+    return f"{item.get('item_name') or ''}. {item.get('description') or ''}"
+
+
+def embed(embedder: Embeddings, texts: Sequence[str]) -> np.ndarray:
+    if isinstance(embedder, HashingEmbedder):
+        return embedder.embed_matrix(texts)
+    return normalize_rows(embedder.embed_documents(list(texts)))
+
+
+class ItemEmbeddings:
+    """Unit-length embeddings of wardrobe items, cached by content hash"""
+
+    def __init__(self, embedder: Embeddings, max_entries: int = 50000):
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self.model = getattr(embedder, "model", type(embedder).__name__)
+
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, item: dict) -> str:
+        return hashlib.sha1(f"{self.model}\0{item_text(item).lower()}".encode()).hexdigest()
+
+    def matrix(self, items: Sequence[dict]) -> np.ndarray:
+        """Item x dim matrix, embedding only items whose content hasn't been seen"""
+        keys = [self._key(item) for item in items]
+        vectors: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._vectors.get(key)
+                if vector is not None:
+                    self._vectors.move_to_end(key)
+                    vectors[key] = vector
+            missing = {key: item for key, item in zip(keys, items) if key not in vectors}
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            # One batched call for all new items
+            computed = embed(self.embedder, [item_text(item) for item in missing.values()])
+            with self._lock:
+                for key, vector in zip(missing, computed):
+                    vectors[key] = self._vectors[key] = vector
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([vectors[key] for key in keys])
+
+    def warm(self, items: Sequence[dict]):
+        """Embed items ahead of the first request that needs them"""
+        if items:
+            self.matrix(items)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model,
+            "entries": len(self._vectors),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class OccasionPrototypes:
+    """Embedded description of what suits each occasion and what doesn't"""
+
+    # How much resemblance to the occasion's inappropriate items counts against an item
+    NEGATIVE_WEIGHT = 0.5
+
+    def __init__(self, embedder: Embeddings, requirements: Optional[dict] = None):
+        requirements = requirements or OCCASION_REQUIREMENTS
+        self.occasions = list(requirements)
+        self.occasion_index = {occasion_id: column for column, occasion_id in enumerate(self.occasions)}
+        positive = [
+            f"{req['description']}. {req['style']} style. " + ", ".join(req['preferred_items'])
+            for req in requirements.values()
+        ]
+        negative = [", ".join(req['inappropriate_items']) for req in requirements.values()]
+        self.positive = embed(embedder, positive)
+        self.negative = embed(embedder, negative)
+
+    def score(self, item_vectors: np.ndarray) -> np.ndarray:
+        """Item x occasion suitability"""
+        if not item_vectors.size:
+            return np.zeros((0, len(self.occasions)), dtype=np.float32)
+        return item_vectors @ self.positive.T - self.NEGATIVE_WEIGHT * (item_vectors @ self.negative.T)
+
+
+class SemanticRanking:
+    """Items per (occasion, category) scored by similarity to the occasion prototypes"""
+
+    # As much as one preferred keyword is worth to the keyword rules
+    ITEM_SCORE_SPAN = 8.0
+
+    def __init__(
+        self,
+        wardrobe_by_category: Dict[str, List[dict]],
+        item_embeddings: ItemEmbeddings,
+        prototypes: OccasionPrototypes
+    ):
+        self.prototypes = prototypes
+        self.items: List[dict] = []
+        self.positions: Dict[str, np.ndarray] = {}
+        for category, items in wardrobe_by_category.items():
+            start = len(self.items)
+            self.items.extend(items)
+            self.positions[category] = np.arange(start, len(self.items))
+        # One matrix product scores every item against every occasion
+        self.scores = prototypes.score(item_embeddings.matrix(self.items))
+
+    def item_scores(self, occasion_id: str, category: str) -> Tuple[List[dict], List[float]]:
+        """Similarities rescaled within the category so the best fit scores ITEM_SCORE_SPAN and the worst 0
+
+        Raw similarities differ by a few tenths between items, far less than
+        the outfit search's colour terms; on the keyword rules' scale occasion
+        fit decides and colour only settles close calls.
+        """
+        positions = self.positions.get(category)
+        if positions is None or not len(positions):
+            return [], []
+        column = self.scores[positions, self.prototypes.occasion_index[occasion_id]]
+        spread = float(column.max() - column.min())
+        if spread > 0:
+            column = (column - column.min()) * (self.ITEM_SCORE_SPAN / spread)
+        else:
+            column = np.zeros_like(column)
+        return [self.items[i] for i in positions], column.tolist()
@@ -0,0 +1,127 @@
+"""Fan-out of one async byte stream to several consumers with bounded memory"""
+import asyncio
+import logging
+from typing import AsyncContextManager, AsyncIterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+_END = object()
+
+
+class TeeDropped(Exception):
+    """Raised in a branch that fell behind the others and was cut off"""
+
+
+async def prefetch(chunks: AsyncIterator[bytes], min_bytes: int) -> Tuple[bytes, AsyncIterator[bytes]]:
+    """Read at least min_bytes (or everything, if shorter) and return it with an iterator over the whole stream"""
+    head = []
+    size = 0
+    async for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_bytes:
+            break
+
+    async def replay():
+        for chunk in head:
+            yield chunk
+        async for chunk in chunks:
+            yield chunk
+
+    return b"".join(head), replay()
+
+
+class Tee:
+    """Copies each chunk of a source to every branch as it arrives
+
+    Each branch buffers at most max_chunks chunks, so the slowest consumer
+    sets the pace and memory stays flat whatever the stream's length. A
+    branch that stalls for stall_timeout seconds (a client that went away,
+    say) is dropped so it can't hold up the others; if it ever reads again
+    it gets TeeDropped. An error in the source is raised in every branch
+    that is still reading.
+    """
+
+    def __init__(self, branches: int, max_chunks: int = 8, stall_timeout: float = 30):
+        self.stall_timeout = stall_timeout
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=max_chunks) for _ in range(branches)]
+        self._open = [True] * branches
+        self.task: Optional[asyncio.Task] = None
+        self.bytes = 0
+
+    def branch(self, index: int) -> AsyncIterator[bytes]:
+        queue = self._queues[index]
+
+        async def chunks():
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _END:
+                        return
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            finally:
+                self.close_branch(index)
+
+        return chunks()
+
+    def close_branch(self, index: int):
+        """The consumer is done; stop feeding it and free what it left unread"""
+        self._open[index] = False
+        queue = self._queues[index]
+        while not queue.empty():
+            queue.get_nowait()
+
+    async def _put(self, index: int, item):
+        if not self._open[index]:
+            return
+        try:
+            await asyncio.wait_for(self._queues[index].put(item), self.stall_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping stream consumer {index} after {self.stall_timeout}s without progress")
+            self.close_branch(index)
+            # The queue was just emptied, so this fits and wakes a reader that comes back
+            self._queues[index].put_nowait(TeeDropped(f"Stream consumer {index} fell behind and was dropped"))
+
+    async def run(self, source: AsyncIterator[bytes]):
+        try:
+            async for chunk in source:
+                self.bytes += len(chunk)
+                for index in range(len(self._queues)):
+                    await self._put(index, chunk)
+                if not any(self._open):
+                    return
+        except Exception as e:
+            for index in range(len(self._queues)):
+                await self._put(index, e)
+            raise
+        for index in range(len(self._queues)):
+            await self._put(index, _END)
+
+
+async def start_tee(source: AsyncContextManager[AsyncIterator[bytes]], branches: int, **options) -> Tee:
+    """Open source and pump it into a new Tee from a background task
+
+    Returns once the source is open, raising whatever opening it raised, so
+    callers can still pick a different response before any byte is sent.
+    """
+    tee = Tee(branches, **options)
+    opened = asyncio.get_running_loop().create_future()
+
+    async def pump():
+        try:
+            async with source as chunks:
+                opened.set_result(None)
+                await tee.run(chunks)
+        except Exception as e:
+            if not opened.done():
+                opened.set_exception(e)
+            else:
+                logger.warning(f"Stream failed after {tee.bytes} bytes: {e}")
+
+    tee.task = asyncio.create_task(pump())
+    await opened
+    return tee
@@ -0,0 +1,116 @@
+"""Try-on results addressed by their inputs, so a repeated try-on skips the diffusion call"""
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .streaming import CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class TryOnResultCache:
+    """Maps hash(avatar content, clothing content, generator) to the stored result's URL
+
+    Image content is identified by the storage ETag from a HEAD request, or
+    by hashing the body when the server sends none; fingerprints are reused
+    per URL for fingerprint_ttl seconds. Results are stored under their key,
+    so URLs not in this process's LRU (other workers, restarts) are found
+    with find_stored(). Only URLs are kept; images are streamed from storage.
+    """
+
+    def __init__(self, http_client, max_entries: int = 10000, fingerprint_ttl: float = 300):
+        self.http_client = http_client
+        self.max_entries = max_entries
+        self.fingerprint_ttl = fingerprint_ttl
+
+        self._results: "OrderedDict[str, str]" = OrderedDict()
+        self._fingerprints: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.storage_hits = 0
+        self.misses = 0
+        self.fingerprint_requests = 0
+
+    async def fingerprint(self, url: str) -> str:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._fingerprints.get(url)
+            if entry is not None and now - entry[0] < self.fingerprint_ttl:
+                return entry[1]
+
+        self.fingerprint_requests += 1
+        response = await self.http_client.request("HEAD", url)
+        response.raise_for_status()
+        etag = response.headers.get("etag")
+        if etag:
+            fingerprint = f"etag:{etag.strip()}:{response.headers.get('content-length', '')}"
+        else:
+            digest = hashlib.sha256()
+            async with self.http_client.stream("GET", url) as body:
+                body.raise_for_status()
+                async for chunk in body.aiter_bytes(CHUNK_SIZE):
+                    digest.update(chunk)
+            fingerprint = f"sha256:{digest.hexdigest()}"
+
+        with self._lock:
+            self._fingerprints[url] = (now, fingerprint)
+            self._fingerprints.move_to_end(url)
+            while len(self._fingerprints) > self.max_entries:
+                self._fingerprints.popitem(last=False)
+        return fingerprint
+
+    async def key(self, avatar_image_url: str, clothing_image_url: str, model: str) -> str:
+        avatar = await self.fingerprint(avatar_image_url)
+        clothing = await self.fingerprint(clothing_image_url)
+        return hashlib.sha256(f"{model}\0{avatar}\0{clothing}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """URL of the stored result, counting a hit; None is not yet a miss, storage may have it"""
+        with self._lock:
+            url = self._results.get(key)
+            if url is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+            return url
+
+    async def find_stored(self, key: str, url: str) -> Optional[str]:
+        """url, if an earlier request already stored the result there"""
+        try:
+            response = await self.http_client.request("HEAD", url)
+        except Exception as e:
+            logger.warning(f"Try-on result lookup failed: {e}")
+            return None
+        if response.status_code != 200 or 'image' not in response.headers.get('content-type', '').lower():
+            return None
+        self.storage_hits += 1
+        self.put(key, url)
+        return url
+
+    def miss(self):
+        self.misses += 1
+
+    def put(self, key: str, url: str):
+        with self._lock:
+            self._results[key] = url
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def discard(self, key: str):
+        """The stored copy turned out to be gone"""
+        with self._lock:
+            self._results.pop(key, None)
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.storage_hits + self.misses
+        return {
+            "entries": len(self._results),
+            "hits": self.hits,
+            "storage_hits": self.storage_hits,
+            "misses": self.misses,
+            "fingerprint_requests": self.fingerprint_requests,
+            "hit_rate": round((self.hits + self.storage_hits) / lookups, 4) if lookups else 0.0
+        }
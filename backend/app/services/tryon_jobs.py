@@ -0,0 +1,218 @@
+"""Background virtual try-on jobs: submit, then poll or stream until the result is ready"""
+import abc
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class QueueFull(Exception):
+    """Too many jobs are waiting; the client should retry later"""
+
+
+class TryOnJob:
+    __slots__ = (
+        "id", "user_id", "params", "status", "created_at", "updated_at",
+        "result", "result_url", "error", "error_status", "_changed"
+    )
+
+    def __init__(self, user_id: str, params: dict):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.params = params
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.result: Optional[bytes] = None
+        self.result_url: Optional[str] = None
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None
+        # Replaced on every status change; watchers wait on the one they saw
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "result_url": self.result_url,
+            "error": self.error
+        }
+
+
+# (image bytes, public URL of the stored copy or None)
+JobHandler = Callable[[TryOnJob], Awaitable[Tuple[bytes, Optional[str]]]]
+
+
+class TryOnJobQueue(abc.ABC):
+    """Where try-on jobs wait and how clients follow them"""
+
+    @abc.abstractmethod
+    def submit(self, user_id: str, params: dict) -> TryOnJob:
+        ...
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> Optional[TryOnJob]:
+        ...
+
+    @abc.abstractmethod
+    def updates(self, job_id: str, heartbeat_seconds: float = 15) -> AsyncIterator[Optional[dict]]:
+        ...
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__}
+
+
+class LocalTryOnJobQueue(TryOnJobQueue):
+    """In-process queue drained by a fixed pool of worker tasks
+
+    Jobs and their result images live in this process only, so it suits a
+    single worker deployment. Finished jobs are kept for result_ttl seconds
+    (and at most max_jobs of them) for clients to collect.
+    """
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        workers: int = 4,
+        max_pending: int = 100,
+        max_jobs: int = 200,
+        result_ttl: float = 3600
+    ):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+
+        self._jobs: "OrderedDict[str, TryOnJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Try-on job queue started with {self.workers} workers")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, user_id: str, params: dict) -> TryOnJob:
+        if self._queue is None:
+            raise RuntimeError("Try-on job queue is not started")
+        self._purge()
+        job = TryOnJob(user_id, params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull(f"{self.max_pending} try-on jobs are already waiting")
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[TryOnJob]:
+        return self._jobs.get(job_id)
+
+    async def updates(self, job_id: str, heartbeat_seconds: float = 15) -> AsyncIterator[Optional[dict]]:
+        """The job's state now and after every change until it finishes; None when nothing changed for a while"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        while True:
+            changed = job._changed
+            yield job.as_dict()
+            if job.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat_seconds)
+            except asyncio.TimeoutError:
+                # Lets the caller send a keepalive and notice disconnected clients
+                yield None
+
+    def _set_status(self, job: TryOnJob, status: str):
+        job.status = status
+        job.updated_at = time.time()
+        changed, job._changed = job._changed, asyncio.Event()
+        changed.set()
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            started = time.perf_counter()
+            self._set_status(job, RUNNING)
+            try:
+                job.result, job.result_url = await self.handler(job)
+            except asyncio.CancelledError:
+                job.error, job.error_status = "Server shutting down", 503
+                self._set_status(job, FAILED)
+                raise
+            except Exception as e:
+                # HTTPException-like errors keep their status and message for the client
+                job.error = str(getattr(e, "detail", None) or e)
+                job.error_status = getattr(e, "status_code", 500)
+                self.failed += 1
+                logger.error(f"Try-on job {job.id} failed: {job.error}")
+                self._set_status(job, FAILED)
+            else:
+                self.succeeded += 1
+                self._set_status(job, SUCCEEDED)
+            finally:
+                self.total_seconds += time.perf_counter() - started
+                self._queue.task_done()
+
+    def _purge(self):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and now - job.updated_at > self.result_ttl]:
+            del self._jobs[job_id]
+        # Oldest finished jobs go first when over the cap; waiting and running jobs are never dropped
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+                del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        finished = self.succeeded + self.failed
+        return {
+            **super().stats(),
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "running": sum(1 for job in self._jobs.values() if job.status == RUNNING),
+            "jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_seconds": round(self.total_seconds / finished, 3) if finished else 0.0
+        }
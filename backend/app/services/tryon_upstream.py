@@ -0,0 +1,132 @@
+"""Image generators behind virtual try-on: the RapidAPI diffusion service and an offline stub"""
+import io
+import abc
+import asyncio
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator
+
+import httpx
+
+from .streaming import CHUNK_SIZE, prefetch
+
+logger = logging.getLogger(__name__)
+
+RAPIDAPI_HOST = "try-on-diffusion.p.rapidapi.com"
+# Anything smaller is an error payload rather than a rendered image
+MIN_IMAGE_BYTES = 1000
+
+
+class TryOnError(Exception):
+    """The upstream did not return a usable image"""
+
+
+class TryOnUpstream(abc.ABC):
+    """Renders the avatar wearing the clothing item as a JPEG"""
+
+    name = "tryon"
+    # Identifies the model and parameters; part of the result cache key
+    model = "tryon"
+
+    @abc.abstractmethod
+    def stream(self, avatar_image_url: str, clothing_image_url: str) -> AsyncContextManager[AsyncIterator[bytes]]:
+        """Async context manager over the image's chunks; raises TryOnError before the first chunk if there is no image"""
+
+    async def generate(self, avatar_image_url: str, clothing_image_url: str) -> bytes:
+        """The whole image in memory"""
+        async with self.stream(avatar_image_url, clothing_image_url) as chunks:
+            return b"".join([chunk async for chunk in chunks])
+
+
+class RapidApiTryOn(TryOnUpstream):
+    """Try-on diffusion /try-on-url endpoint, which takes image URLs rather than uploads"""
+
+    name = "rapidapi"
+    model = "try-on-diffusion/try-on-url"
+
+    def __init__(self, http_client, api_key: str, limiter, timeout: float = 120):
+        self.http_client = http_client
+        self.api_key = api_key
+        self.limiter = limiter
+        self.timeout = timeout
+        self.url = f"https://{RAPIDAPI_HOST}/try-on-url"
+
+    @asynccontextmanager
+    async def stream(self, avatar_image_url: str, clothing_image_url: str):
+        payload = f"avatar_image_url={avatar_image_url}&clothing_image_url={clothing_image_url}"
+        headers = {
+            'x-rapidapi-host': RAPIDAPI_HOST,
+            'x-rapidapi-key': self.api_key,
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+
+        logger.info("Sending request to RapidAPI /try-on-url")
+        # The slot is held until the body has been read, since the service works until then
+        async with self.limiter.limit(self.name):
+            async with self.http_client.stream(
+                "POST",
+                self.url,
+                content=payload,
+                headers=headers,
+                timeout=httpx.Timeout(self.timeout, connect=5.0)
+            ) as response:
+                response.raise_for_status()
+                logger.info(f"RapidAPI response status: {response.status_code}, content length: {response.headers.get('content-length')}")
+                logger.info(f"RapidAPI response headers: {dict(response.headers)}")
+
+                # The RapidAPI returns the image directly, not JSON; look at the start before passing it on
+                head, chunks = await prefetch(response.aiter_bytes(CHUNK_SIZE), MIN_IMAGE_BYTES)
+                content_type = response.headers.get('content-type', '')
+                if 'image' not in content_type.lower():
+                    logger.warning(f"RapidAPI returned non-image content: {content_type}")
+                    logger.error(f"RapidAPI response starts with: {head[:200]!r}")
+
+                if len(head) < MIN_IMAGE_BYTES:
+                    logger.error(f"RapidAPI returned suspiciously small response: {len(head)} bytes")
+                    raise TryOnError("RapidAPI returned invalid response - too small to be an image")
+
+                yield chunks
+
+
+class StubTryOn(TryOnUpstream):
+    """Offline stand-in for tests and local development
+
+    Waits like the real service would, then returns a JPEG whose colour is
+    derived from the two URLs, so the same pair always renders the same image.
+    """
+
+    name = "stub"
+
+    def __init__(self, delay_seconds: float = 2.0, size=(384, 512)):
+        self.delay_seconds = delay_seconds
+        self.size = size
+        self.model = f"stub/{size[0]}x{size[1]}"
+
+    @asynccontextmanager
+    async def stream(self, avatar_image_url: str, clothing_image_url: str):
+        await asyncio.sleep(self.delay_seconds)
+        image = await asyncio.to_thread(self._render, avatar_image_url, clothing_image_url)
+
+        async def chunks():
+            for start in range(0, len(image), CHUNK_SIZE):
+                yield image[start:start + CHUNK_SIZE]
+
+        yield chunks()
+
+    def _render(self, avatar_image_url: str, clothing_image_url: str) -> bytes:
+        from PIL import Image, ImageDraw
+
+        digest = hashlib.sha1(f"{avatar_image_url}\0{clothing_image_url}".encode()).digest()
+        width, height = self.size
+        image = Image.new("RGB", self.size, tuple(digest[:3]))
+        draw = ImageDraw.Draw(image)
+        # A garment-shaped block over a figure-shaped one, enough detail to be a plausible image
+        draw.ellipse((width * 3 // 8, height // 16, width * 5 // 8, height // 4), fill=tuple(digest[3:6]))
+        draw.rectangle((width // 4, height // 4, width * 3 // 4, height * 5 // 8), fill=tuple(digest[6:9]))
+        draw.rectangle((width * 5 // 16, height * 5 // 8, width * 11 // 16, height * 15 // 16), fill=tuple(digest[9:12]))
+        draw.text((8, height - 24), "try-on stub", fill=(255, 255, 255))
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        return buffer.getvalue()
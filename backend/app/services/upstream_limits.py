@@ -0,0 +1,48 @@
+"""Per-upstream concurrency limits for outbound AI and API calls"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+class UpstreamLimiter:
+    """Bounds how many calls to each upstream service may be in flight at once"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: int = 16):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}
+
+    def _semaphore(self, upstream: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(upstream)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(upstream, self.default_limit))
+            self._semaphores[upstream] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def limit(self, upstream: str):
+        """Hold one of the upstream's slots for the duration of the block"""
+        semaphore = self._semaphore(upstream)
+        self._waiting[upstream] = self._waiting.get(upstream, 0) + 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[upstream] -= 1
+        self._in_flight[upstream] = self._in_flight.get(upstream, 0) + 1
+        try:
+            yield
+        finally:
+            self._in_flight[upstream] -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            upstream: {
+                "limit": self.limits.get(upstream, self.default_limit),
+                "in_flight": self._in_flight.get(upstream, 0),
+                "waiting": self._waiting.get(upstream, 0)
+            }
+            for upstream in sorted(set(self.limits) | set(self._semaphores))
+        }
@@ -0,0 +1,88 @@
+"""In-process exact nearest-neighbour search for the fashion knowledge corpus"""
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Return a contiguous float32 copy of the vectors scaled to unit length"""
+    matrix = np.array(vectors, dtype=np.float32, order="C", copy=True)
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2-D embedding matrix, got shape {matrix.shape}")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class NumpyVectorIndex:
+    """Cosine-similarity index held as one normalized float32 matrix"""
+
+    def __init__(
+        self,
+        vectors,
+        documents: Sequence[str],
+        metadatas: Optional[Sequence[Optional[dict]]] = None,
+        embedding_function=None
+    ):
+        self.matrix = normalize_rows(vectors) if len(documents) else np.zeros((0, 0), dtype=np.float32)
+        if self.matrix.shape[0] != len(documents):
+            raise ValueError("Number of vectors and documents must match")
+        self.documents = list(documents)
+        self.metadatas = list(metadatas) if metadatas is not None else [None] * len(self.documents)
+        self.embedding_function = embedding_function
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def from_chroma(cls, vectorstore, embedding_function=None) -> "NumpyVectorIndex":
+        """Load every persisted embedding out of a LangChain Chroma store"""
+        data = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+        documents = data.get("documents") or []
+        index = cls(
+            data.get("embeddings") or [],
+            documents,
+            data.get("metadatas"),
+            embedding_function=embedding_function
+        )
+        logger.info(f"Loaded {len(index)} vectors into the in-process index")
+        return index
+
+    def search_by_vector(self, query_vector, k: int = 4) -> List[Tuple[int, float]]:
+        """Return (row, cosine similarity) pairs for the k nearest rows"""
+        if not self.documents:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = self.matrix @ (query / norm)
+        return [(int(i), float(scores[i])) for i in top_k_indices(scores, k)]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4) -> List[Document]:
+        return [
+            Document(page_content=self.documents[i], metadata=self.metadatas[i] or {})
+            for i, _ in self.search_by_vector(embedding, k)
+        ]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """Same call shape as the LangChain vector stores used by /chat"""
+        if self.embedding_function is None:
+            raise RuntimeError("NumpyVectorIndex needs an embedding function for text queries")
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k)
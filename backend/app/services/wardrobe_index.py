@@ -0,0 +1,70 @@
+"""In-memory lookup of a user's wardrobe items by id or by free-text name"""
+from typing import Dict, List, Optional
+
+
+class WardrobeSearchIndex:
+    """Id map and name maps over one user's wardrobe rows
+
+    best_match() keeps the precedence of the old database search cascade:
+    exact name, then name containing the query, then items whose name contains
+    one of the query's words longer than three characters (first word wins),
+    then description containing the query. Containment is a case-insensitive
+    substring test like the ILIKE queries it replaces, so "shirt" still finds
+    "Grey Sweatshirt"; a wardrobe is small enough to scan.
+    """
+
+    def __init__(self, items: List[dict]):
+        self.items = items
+        self.by_id: Dict[str, dict] = {}
+        self.by_name: Dict[str, int] = {}
+        self.by_lower_name: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.descriptions: List[str] = []
+
+        for position, item in enumerate(items):
+            name = item.get("item_name") or ""
+            lower_name = name.lower()
+            if item.get("id") is not None:
+                self.by_id[str(item["id"])] = item
+            self.by_name.setdefault(name, position)
+            self.by_lower_name.setdefault(lower_name, position)
+            self.names.append(lower_name)
+            self.descriptions.append((item.get("description") or "").lower())
+
+    def get(self, item_id: str) -> Optional[dict]:
+        return self.by_id.get(str(item_id))
+
+    def best_match(self, query: str) -> Optional[dict]:
+        query = (query or "").strip()
+        if not query:
+            return None
+
+        position = self.by_name.get(query)
+        if position is None:
+            position = self.by_lower_name.get(query.lower())
+        if position is not None:
+            return self.items[position]
+
+        lowered = query.lower()
+        name_hit = None
+        description_hit = None
+        # One pass for both whole-query substring tiers
+        for position, (name, description) in enumerate(zip(self.names, self.descriptions)):
+            if lowered in name:
+                name_hit = position
+                break
+            if description_hit is None and lowered in description:
+                description_hit = position
+        if name_hit is not None:
+            return self.items[name_hit]
+
+        for word in lowered.split():
+            if len(word) <= 3:  # Only search for words longer than 3 characters
+                continue
+            for position, name in enumerate(self.names):
+                if word in name:
+                    return self.items[position]
+
+        if description_hit is not None:
+            return self.items[description_hit]
+        return None
@@ -0,0 +1,196 @@
+"""Per-user wardrobe cache shared by the chat, outfit and wardrobe endpoints"""
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+from .wardrobe_index import WardrobeSearchIndex
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Union of the columns every wardrobe consumer needs
+WARDROBE_COLUMNS = "id, item_name, description, category, image_url, date_added"
+
+
+class WardrobeEntry:
+    __slots__ = ("items", "fetched_at", "version", "derived")
+
+    def __init__(self, items: List[dict], fetched_at: float, version: int):
+        self.items = items
+        self.fetched_at = fetched_at
+        self.version = version
+        # Values computed from the rows (search index, chat listing), dropped with them
+        self.derived = {}
+
+
+class WardrobeRepository:
+    """Fetches a user's full wardrobe once and serves it from memory until it expires or changes
+
+    Rows are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, supabase, ttl_seconds: float = 300, max_users: int = 10000, warmers: Sequence = ()):
+        self.supabase = supabase
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        # Per-item caches (objects with warm(rows)) filled from every freshly fetched row set
+        self.warmers = list(warmers)
+
+        self._entries: "OrderedDict[str, WardrobeEntry]" = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_items(self, user_id: str) -> List[dict]:
+        """All wardrobe rows for the user"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry.fetched_at < self.ttl_seconds:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry.items
+            self.misses += 1
+            version = self._versions.get(user_id, 0)
+
+        if self.supabase is None:
+            raise RuntimeError("Database not configured")
+        response = self.supabase.table("wardrobe").select(WARDROBE_COLUMNS).eq("user_id", user_id).execute()
+        items = response.data or []
+        for warmer in self.warmers:
+            try:
+                warmer.warm(items)
+            except Exception as e:
+                logger.warning(f"Failed to precompute {type(warmer).__name__} for user {user_id}: {e}")
+
+        with self._lock:
+            # An invalidation that raced with the fetch wins; don't cache possibly stale rows
+            if self._versions.get(user_id, 0) == version:
+                self._entries[user_id] = WardrobeEntry(items, now, version)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_users:
+                    evicted_id, _ = self._entries.popitem(last=False)
+                    self._versions.pop(evicted_id, None)
+        return items
+
+    def cached_items(self, user_id: str) -> Optional[List[dict]]:
+        """The user's rows if they are cached and fresh, without fetching"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry.fetched_at < self.ttl_seconds:
+                return entry.items
+        return None
+
+    def derived(self, user_id: str, name: str, build: Callable[[List[dict]], T]) -> T:
+        """build(rows) memoized with the cached rows, so it runs once per fetched row set"""
+        items = self.get_items(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.items is items and name in entry.derived:
+                return entry.derived[name]
+        value = build(items)
+        if entry is not None and entry.items is items:
+            with self._lock:
+                entry.derived.setdefault(name, value)
+        return value
+
+    def search_index(self, user_id: str) -> WardrobeSearchIndex:
+        """Lookup index over the user's rows"""
+        return self.derived(user_id, "search_index", WardrobeSearchIndex)
+
+    def version(self, user_id: str) -> int:
+        """Counter bumped on every invalidation of the user's wardrobe"""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def invalidate(self, user_id: str):
+        """Forget the cached rows after the user's wardrobe changed"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class RedisWardrobeInvalidations:
+    """Broadcasts wardrobe invalidations over Redis pub/sub so every worker drops its cached rows
+
+    Each worker publishes the invalidations it handles and applies the ones
+    published by others on a background thread. Messages missed while Redis
+    is unreachable are covered by the cache TTL.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, channel: str = "wardrobe:invalidate", client=None):
+        if client is None:
+            import redis
+            client = redis.Redis(host=host, port=port, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client = client
+        self.channel = channel
+        # Lets a worker skip its own messages; it already applied them
+        self.origin = uuid.uuid4().hex
+        self._thread = None
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+
+    def start(self, apply: Callable[[str], None]):
+        """Call apply(user_id) for every invalidation another worker publishes"""
+        def handle(message):
+            origin, _, user_id = message["data"].decode().partition(":")
+            if origin != self.origin and user_id:
+                self.received += 1
+                apply(user_id)
+
+        def on_error(error, pubsub, thread):
+            # The pubsub reconnects and resubscribes on the next read
+            self.errors += 1
+            logger.warning(f"Wardrobe invalidation listener error: {error}")
+            time.sleep(1.0)
+
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: handle})
+            self._thread = pubsub.run_in_thread(sleep_time=0.5, daemon=True, exception_handler=on_error)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Wardrobe invalidations from other workers disabled: {e}")
+
+    def publish(self, user_id: str):
+        try:
+            self.client.publish(self.channel, f"{self.origin}:{user_id}")
+            self.published += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Failed to broadcast wardrobe invalidation for user {user_id}: {e}")
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "listening": self._thread is not None,
+            "published": self.published,
+            "received": self.received,
+            "errors": self.errors
+        }
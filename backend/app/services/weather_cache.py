@@ -0,0 +1,121 @@
+"""Weather lookup cache with single-flight misses and stale-while-revalidate"""
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple
+
+
+class WeatherCache:
+    """Caches weather per city or per lat/lon grid cell"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        stale_seconds: float = 1800,
+        grid_degrees: float = 0.1,
+        max_entries: int = 10000
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.grid_degrees = grid_degrees
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[CacheKey, Tuple[float, object]]" = OrderedDict()
+        self._in_flight: Dict[CacheKey, asyncio.Future] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def snap(self, value: float) -> float:
+        """Round a coordinate to the cache grid"""
+        return round(round(value / self.grid_degrees) * self.grid_degrees, 4)
+
+    def key(self, city: Optional[str], country: Optional[str], lat: Optional[float], lon: Optional[float]) -> CacheKey:
+        if lat is not None and lon is not None:
+            return ("coord", self.snap(lat), self.snap(lon))
+        return ("city", (city or "").strip().lower(), (country or "").strip().lower())
+
+    async def get(
+        self,
+        key: CacheKey,
+        fetch: Callable[[], Awaitable[object]],
+        is_cacheable: Callable[[object], bool] = lambda value: True
+    ):
+        """Return the cached value for key, fetching it at most once concurrently"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, value = entry
+            age = now - fetched_at
+            if age < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self.ttl_seconds + self.stale_seconds:
+                # Serve the slightly old reading and refresh it in the background
+                self.stale_hits += 1
+                if key not in self._in_flight:
+                    task = asyncio.create_task(self._load(key, fetch, is_cacheable))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_done)
+                return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        value = await self._load(key, fetch, is_cacheable)
+        if not is_cacheable(value) and entry is not None:
+            # Upstream failed; an expired reading is still better than an error
+            return entry[1]
+        return value
+
+    async def _load(self, key: CacheKey, fetch, is_cacheable):
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        if is_cacheable(value):
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refresh_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background weather refresh failed: {task.exception()}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,105 @@
+"""Upload validation from the file's own bytes, reading each upload at most once"""
+import os
+import zipfile
+from typing import BinaryIO, List, Optional, Tuple
+
+MAX_IMAGE_BYTES = 10 * 1024 * 1024  # 10MB
+
+# Enough of the header to tell the accepted formats apart
+HEADER_BYTES = 12
+
+
+class ImageValidationError(ValueError):
+    """The upload is not an accepted image"""
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """MIME type from the file's magic bytes, or None for anything but JPEG, PNG and WebP"""
+    if header[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if header[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class ImageUpload:
+    """A validated upload; data is the single in-memory copy, shared rather than copied downstream"""
+    __slots__ = ("filename", "content_type", "size", "data")
+
+    def __init__(self, filename: Optional[str], content_type: str, size: int, data: Optional[memoryview] = None):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.data = data
+
+
+def check_image(file: BinaryIO, filename: Optional[str] = None, declared_type: Optional[str] = None, max_size: int = MAX_IMAGE_BYTES) -> ImageUpload:
+    """Format from the header and size from seek/tell; leaves the file at its start, content unread"""
+    file.seek(0)
+    header = file.read(HEADER_BYTES)
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+
+    if size > max_size:
+        raise ImageValidationError(f"File too large. Maximum size is {max_size // (1024 * 1024)}MB.")
+    content_type = sniff_image_type(header)
+    if content_type is None:
+        raise ImageValidationError(
+            f"Invalid file type: content is not an image (declared {declared_type or 'unknown'}). "
+            "Only JPEG, PNG, and WebP are allowed."
+        )
+    return ImageUpload(filename, content_type, size)
+
+
+def read_image(file: BinaryIO, filename: Optional[str] = None, declared_type: Optional[str] = None, max_size: int = MAX_IMAGE_BYTES) -> ImageUpload:
+    """check_image, then the content read once into a buffer of exactly the checked size"""
+    upload = check_image(file, filename, declared_type, max_size)
+    buffer = bytearray(upload.size)
+    view = memoryview(buffer)
+    filled = 0
+    while filled < upload.size:
+        read = file.readinto(view[filled:])
+        if not read:
+            break
+        filled += read
+    file.seek(0)
+    upload.data = view[:filled]
+    return upload
+
+
+def archive_images(file: BinaryIO, max_images: int) -> Tuple[zipfile.ZipFile, List[zipfile.ZipInfo]]:
+    """Open a zip of images and list its files, skipping folders and macOS/hidden metadata"""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ImageValidationError("Invalid archive: only zip files are supported.")
+    entries = [
+        info for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and not os.path.basename(info.filename).startswith(".")
+    ]
+    if len(entries) > max_images:
+        archive.close()
+        raise ImageValidationError(f"Too many images. Maximum is {max_images} per batch.")
+    return archive, entries
+
+
+def read_archive_image(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_size: int = MAX_IMAGE_BYTES) -> ImageUpload:
+    """One archive member, checked like an upload; reads at most max_size + 1 bytes whatever the header claims"""
+    if info.file_size > max_size:
+        raise ImageValidationError(f"File too large. Maximum size is {max_size // (1024 * 1024)}MB.")
+    try:
+        with archive.open(info) as member:
+            data = member.read(max_size + 1)
+    except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+        raise ImageValidationError(f"Unreadable archive member: {e}")
+    if len(data) > max_size:
+        raise ImageValidationError(f"File too large. Maximum size is {max_size // (1024 * 1024)}MB.")
+    content_type = sniff_image_type(data[:HEADER_BYTES])
+    if content_type is None:
+        raise ImageValidationError("Invalid file type: content is not an image. Only JPEG, PNG, and WebP are allowed.")
+    return ImageUpload(info.filename, content_type, len(data), memoryview(data))
@@ -0,0 +1,80 @@
+"""64-bit perceptual hashes that survive re-compression, resizing and small crops"""
+from functools import lru_cache
+
+import numpy as np
+
+PHASH_SIZE = 32
+PHASH_BITS = 8
+
+
+@lru_cache(maxsize=None)
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so the 2D transform is two matrix products"""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def _pack(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def phash(image) -> int:
+    """Signs of the lowest DCT frequencies of a 32x32 grayscale copy relative to their median"""
+    from PIL import Image
+
+    pixels = np.asarray(image.convert("L").resize((PHASH_SIZE, PHASH_SIZE), Image.BILINEAR), dtype=np.float64)
+    matrix = _dct_matrix(PHASH_SIZE)
+    low = (matrix @ pixels @ matrix.T)[:PHASH_BITS, :PHASH_BITS]
+    # The DC term is overall brightness; leave it out of the median
+    return _pack(low > np.median(low.ravel()[1:]))
+
+
+def dhash(image) -> int:
+    """Whether each pixel of a 9x8 grayscale copy is brighter than its right neighbour"""
+    from PIL import Image
+
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    return _pack(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming(first: int, second: int) -> int:
+    return (first ^ second).bit_count()
+
+
+COLOR_SIZE = 16
+# sRGB (D65) to CIE XYZ, scaled by the reference white so Lab is computed on x/Xn, y/Yn, z/Zn
+_RGB_TO_XYZ = np.array([
+    [0.4124, 0.3576, 0.1805],
+    [0.2126, 0.7152, 0.0722],
+    [0.0193, 0.1192, 0.9505]
+]) / np.array([[0.95047], [1.0], [1.08883]])
+
+
+def color_signature(image) -> int:
+    """Mean CIELAB colour of a 16x16 copy, packed as L, a + 128 and b + 128 in one byte each
+
+    The hashes above only see brightness, so the same garment in two
+    colours shares them; this tells the colours apart.
+    """
+    from PIL import Image
+
+    rgb = np.asarray(image.convert("RGB").resize((COLOR_SIZE, COLOR_SIZE), Image.BILINEAR), dtype=np.float64) / 255
+    linear = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+    xyz = linear.reshape(-1, 3) @ _RGB_TO_XYZ.T
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    lab = np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])], axis=1).mean(axis=0)
+    lightness, a, b = (int(np.clip(round(value), 0, 255)) for value in (lab[0] * 2.55, lab[1] + 128, lab[2] + 128))
+    return (lightness << 16) | (a << 8) | b
+
+
+def color_distance(first: int, second: int) -> float:
+    """Euclidean distance of two colour signatures in Lab units (about 2.3 is just noticeable)"""
+    def unpack(value):
+        return np.array([((value >> 16) & 255) / 2.55, ((value >> 8) & 255) - 128, (value & 255) - 128])
+    return float(np.linalg.norm(unpack(first) - unpack(second)))
@@ -0,0 +1,121 @@
+"""Wall time to describe a wardrobe import: one request per image versus the batch pipeline
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_describe_batch --images 50 --base-ms 2500 --per-image-ms 400
+
+Photos are synthetic phone-camera JPEGs, preprocessed for real in the
+process pool. The vision call is simulated: it takes --base-ms plus
+--per-image-ms for each image in the prompt (prompt processing and output
+tokens grow with the images, the round trip and queueing don't). "single"
+is the client calling /describe-clothing for each garment in turn.
+"""
+import io
+import math
+import time
+import json
+import asyncio
+import argparse
+import logging
+
+import numpy as np
+from PIL import Image
+
+from app.services.describe_batch import BatchDescriber, BatchImage
+from app.services.image_preprocessing import ImagePreprocessor
+from app.utils.image_validation import ImageUpload
+
+
+def make_photo(width: int, height: int, rng: np.random.Generator) -> bytes:
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    channels = [
+        127 + 100 * np.sin(x / width * math.pi * rng.uniform(1, 3) + phase) * np.cos(y / height * math.pi * rng.uniform(1, 3))
+        for phase in rng.uniform(0, math.pi, 3)
+    ]
+    pixels = np.stack(channels, axis=-1) + rng.normal(0, 6, (height, width, 3))
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB").save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+class SimulatedVision:
+    def __init__(self, base_ms: float, per_image_ms: float):
+        self.base_ms = base_ms
+        self.per_image_ms = per_image_ms
+        self.calls = 0
+
+    async def describe(self, images, prompt, max_tokens) -> str:
+        self.calls += 1
+        await asyncio.sleep((self.base_ms + self.per_image_ms * len(images)) / 1000)
+        item = {"item_name": "Shirt", "description": "Blue cotton shirt", "category": "Tops"}
+        if len(images) == 1:
+            return json.dumps(item)
+        return json.dumps([{"index": number, **item} for number in range(1, len(images) + 1)])
+
+
+async def single_requests(photos, preprocessor: ImagePreprocessor, vision: SimulatedVision):
+    start = time.perf_counter()
+    first = None
+    for photo in photos:
+        prepared = await preprocessor.prepare(photo)
+        await vision.describe([prepared], "", 300)
+        if first is None:
+            first = time.perf_counter() - start
+    return time.perf_counter() - start, first
+
+
+async def batch_request(photos, preprocessor: ImagePreprocessor, vision: SimulatedVision, per_prompt: int, concurrency: int):
+    describer = BatchDescriber(
+        preprocessor.prepare,
+        vision.describe,
+        images_per_prompt=per_prompt,
+        max_prompts=concurrency,
+        max_preparing=max(1, preprocessor.workers) * 2
+    )
+    images = [
+        BatchImage(index, f"{index}.jpg", lambda photo=photo: ImageUpload(None, "image/jpeg", len(photo), memoryview(photo)))
+        for index, photo in enumerate(photos)
+    ]
+    start = time.perf_counter()
+    first = None
+    async for _ in describer.run(images):
+        if first is None:
+            first = time.perf_counter() - start
+    return time.perf_counter() - start, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--size", default="3024x4032")
+    parser.add_argument("--base-ms", type=float, default=2500, help="Vision call latency independent of image count")
+    parser.add_argument("--per-image-ms", type=float, default=400, help="Added vision latency per image in the prompt")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--configs", nargs="+", default=["1x4", "4x4", "4x8"], help="images per prompt x prompts in flight")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rng = np.random.default_rng(0)
+    width, height = (int(value) for value in args.size.split("x"))
+    # A handful of distinct photos is enough; preprocessing cost doesn't depend on content
+    distinct = [make_photo(width, height, rng) for _ in range(min(args.images, 5))]
+    photos = [distinct[index % len(distinct)] for index in range(args.images)]
+    preprocessor = ImagePreprocessor(workers=args.workers)
+
+    print(f"{args.images} photos {args.size}, vision {args.base_ms:g} ms + {args.per_image_ms:g} ms/image, {args.workers} workers")
+    print(f"{'mode':>12} {'calls':>6} {'first s':>8} {'total s':>8}")
+    try:
+        asyncio.run(preprocessor.prepare(photos[0]))  # start the worker outside the timing
+        vision = SimulatedVision(args.base_ms, args.per_image_ms)
+        total, first = asyncio.run(single_requests(photos, preprocessor, vision))
+        print(f"{'single':>12} {vision.calls:>6} {first:>8.2f} {total:>8.2f}")
+        for config in args.configs:
+            per_prompt, concurrency = (int(value) for value in config.split("x"))
+            vision = SimulatedVision(args.base_ms, args.per_image_ms)
+            total, first = asyncio.run(batch_request(photos, preprocessor, vision, per_prompt, concurrency))
+            print(f"{'batch ' + config:>12} {vision.calls:>6} {first:>8.2f} {total:>8.2f}")
+    finally:
+        preprocessor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Bytes sent to the vision model and request latency, with and without preprocessing
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_image_preprocessing --sizes 1024x768 3024x4032 --mbps 20
+
+Photos are synthetic (smooth gradients plus sensor-like noise, saved as
+quality 92 JPEGs with EXIF, like a phone camera). Latency is modelled as
+preprocessing + base64 encoding + sending the request body at --mbps. The
+model's own processing time is left out, although it also shrinks with the
+image. Vision tokens use the high-detail tiling rule: fit within 2048px,
+shortest side down to 768px, then 170 tokens per 512px tile plus 85.
+"""
+import io
+import math
+import time
+import base64
+import asyncio
+import argparse
+import logging
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_preprocessing import ImagePreprocessor, prepare_image
+
+
+def make_photo(width: int, height: int, rng: np.random.Generator) -> bytes:
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    channels = [
+        127 + 100 * np.sin(x / width * math.pi * rng.uniform(1, 3) + phase) * np.cos(y / height * math.pi * rng.uniform(1, 3))
+        for phase in rng.uniform(0, math.pi, 3)
+    ]
+    pixels = np.stack(channels, axis=-1) + rng.normal(0, 6, (height, width, 3))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+    exif = Image.Exif()
+    exif[0x0110] = "Benchmark Camera"  # Model
+    exif[0x0112] = 1  # Orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=92, exif=exif)
+    return buffer.getvalue()
+
+
+def vision_tokens(width: int, height: int) -> int:
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def request_ms(body_bytes: int, mbps: float) -> float:
+    return body_bytes * 8 / (mbps * 1_000_000) * 1000
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+async def pool_latency(preprocessor: ImagePreprocessor, photo: bytes, repeat: int) -> float:
+    await preprocessor.prepare(photo)  # start the worker outside the timing
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await preprocessor.prepare(photo)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["1024x768", "2048x1536", "3024x4032"])
+    parser.add_argument("--max-edge", type=int, default=1024)
+    parser.add_argument("--format", default="jpeg", choices=["jpeg", "webp"])
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--mbps", type=float, default=20, help="Upstream bandwidth for the request body")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = np.random.default_rng(0)
+    preprocessor = ImagePreprocessor(args.max_edge, args.format, args.quality, workers=1)
+
+    print(f"max edge {args.max_edge}px, {args.format} q{args.quality}, {args.mbps:g} Mbit/s")
+    print(
+        f"{'photo':>10} {'orig KB':>8} {'sent KB':>8} {'tokens':>13} "
+        f"{'prep ms':>8} {'pool ms':>8} {'before ms':>10} {'after ms':>9}"
+    )
+    try:
+        for size in args.sizes:
+            width, height = (int(value) for value in size.split("x"))
+            photo = make_photo(width, height, rng)
+
+            original_b64, encode_ms = timed(lambda: base64.b64encode(photo), args.repeat)
+            prepared, prepare_ms = timed(
+                lambda: prepare_image(photo, args.max_edge, args.format.upper(), args.quality), args.repeat
+            )
+            prepared_b64, prepared_encode_ms = timed(lambda: base64.b64encode(prepared.data), args.repeat)
+            in_pool_ms = asyncio.run(pool_latency(preprocessor, photo, args.repeat))
+
+            before_ms = encode_ms + request_ms(len(original_b64), args.mbps)
+            after_ms = in_pool_ms + prepared_encode_ms + request_ms(len(prepared_b64), args.mbps)
+            tokens = f"{vision_tokens(width, height)}->{vision_tokens(prepared.width, prepared.height)}"
+            print(
+                f"{size:>10} {len(photo) / 1024:>8.0f} {len(prepared.data) / 1024:>8.0f} {tokens:>13} "
+                f"{prepare_ms:>8.1f} {in_pool_ms:>8.1f} {before_ms:>10.1f} {after_ms:>9.1f}"
+            )
+    finally:
+        preprocessor.close()
+
+
+if __name__ == "__main__":
+    main()
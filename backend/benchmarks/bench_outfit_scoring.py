@@ -0,0 +1,72 @@
+"""Score synthetic wardrobes against every occasion, item by item and as one matrix product
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_outfit_scoring --sizes 50 500 5000
+
+Both modes include feature extraction, which is also reported on its own.
+"""
+import argparse
+import logging
+import random
+import time
+
+from app.services.batch_scoring import BatchRanking, occasion_batch_scorer
+from app.services.outfit_scoring import DEFAULT_MATCHER, OCCASION_REQUIREMENTS, KeywordRanking, extract_features
+
+CATEGORIES = ["Tops", "Bottoms", "Outerwear", "Shoes", "Accessories"]
+FILLER = ["classic", "fit", "wool", "slim", "vintage", "light", "everyday", "pocket", "collar", "washed"]
+
+
+def make_wardrobe(size: int, rng: random.Random):
+    words = sorted(DEFAULT_MATCHER.keywords) + FILLER * 8
+    wardrobe_by_category = {}
+    for i in range(size):
+        item = {
+            "id": i,
+            "item_name": " ".join(rng.choice(words) for _ in range(3)),
+            "description": " ".join(rng.choice(words) for _ in range(15)),
+            "category": rng.choice(CATEGORIES)
+        }
+        wardrobe_by_category.setdefault(item["category"], []).append(item)
+    return wardrobe_by_category
+
+
+def rank_all(ranking, wardrobe_by_category):
+    for occasion_id in OCCASION_REQUIREMENTS:
+        for category in wardrobe_by_category:
+            ranking.item_scores(occasion_id, category)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(0)
+    occasion_batch_scorer()  # compile outside the timings
+
+    print(f"{len(OCCASION_REQUIREMENTS)} occasions x {len(CATEGORIES)} categories")
+    print(f"{'items':>7} {'extract ms':>11} {'keyword ms':>11} {'batch ms':>9}")
+    for size in args.sizes:
+        wardrobe_by_category = make_wardrobe(size, rng)
+        items = [item for items in wardrobe_by_category.values() for item in items]
+
+        extract_ms = timed(lambda: extract_features(items), args.repeat)
+        keyword_ms = timed(lambda: rank_all(KeywordRanking(wardrobe_by_category), wardrobe_by_category), args.repeat)
+        batch_ms = timed(lambda: rank_all(BatchRanking(wardrobe_by_category), wardrobe_by_category), args.repeat)
+        print(f"{size:>7} {extract_ms:>11.2f} {keyword_ms:>11.2f} {batch_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Per-check cost and memory of the rate limiter at many distinct clients
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_rate_limiter --clients 100000 --checks-per-client 10
+
+Compares the sliding-window-counter RateLimiter with the previous
+timestamp-list implementation it replaced.
+"""
+import asyncio
+import argparse
+import gc
+import time
+import tracemalloc
+
+from app.services.rate_limiter import RateLimiter
+
+
+class TimestampListRateLimiter:
+    """The original implementation: one list of timestamps per client"""
+
+    def __init__(self, max_requests: int = 100, window_seconds: int = 3600):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.requests = {}
+
+    async def is_allowed(self, client_id: str) -> bool:
+        now = time.time()
+        if client_id not in self.requests:
+            self.requests[client_id] = []
+        self.requests[client_id] = [req_time for req_time in self.requests[client_id]
+                                    if now - req_time < self.window_seconds]
+        if len(self.requests[client_id]) >= self.max_requests:
+            return False
+        self.requests[client_id].append(now)
+        return True
+
+
+async def drive(limiter, client_ids, checks_per_client):
+    for _ in range(checks_per_client):
+        for client_id in client_ids:
+            await limiter.is_allowed(client_id)
+
+
+def run(factory, client_ids, checks_per_client):
+    # Timing and memory are measured on separate instances; tracemalloc skews timings
+    gc.collect()
+    start = time.perf_counter()
+    asyncio.run(drive(factory(), client_ids, checks_per_client))
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    limiter = factory()
+    asyncio.run(drive(limiter, client_ids, checks_per_client))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    checks = len(client_ids) * checks_per_client
+    return elapsed / checks * 1e9, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--checks-per-client", type=int, default=10)
+    parser.add_argument("--max-requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    client_ids = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.clients)]
+    limiters = [
+        ("timestamp-list", lambda: TimestampListRateLimiter(args.max_requests, 3600)),
+        ("window-counter", lambda: RateLimiter(args.max_requests, 3600))
+    ]
+
+    print(f"{args.clients} clients x {args.checks_per_client} checks")
+    print(f"{'limiter':<16} {'ns/check':>10} {'memory MiB':>11} {'bytes/client':>13}")
+    for name, factory in limiters:
+        ns_per_check, memory = run(factory, client_ids, args.checks_per_client)
+        print(f"{name:<16} {ns_per_check:>10.0f} {memory / 2**20:>11.1f} {memory / args.clients:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
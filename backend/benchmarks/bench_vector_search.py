@@ -0,0 +1,112 @@
+"""Compare the in-process NumPy index with Chroma on synthetic corpora
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_vector_search --sizes 1000 10000 100000 1000000
+
+Reports build time, per-query latency (p50/p95) and recall@k of each backend
+against exact brute-force results. Chroma is skipped above --chroma-max because
+building its HNSW index at 1M vectors takes a very long time.
+"""
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from app.services.vector_index import NumpyVectorIndex, normalize_rows, top_k_indices
+
+CHROMA_BATCH_SIZE = 5000
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(np.array(samples) * 1000, q))
+
+
+def make_corpus(size: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    # Clustered data resembles real embeddings better than isotropic noise
+    centers = rng.standard_normal((max(1, size // 100), dim)).astype(np.float32)
+    assignments = rng.integers(0, centers.shape[0], size)
+    vectors = centers[assignments] + 0.3 * rng.standard_normal((size, dim)).astype(np.float32)
+    return normalize_rows(vectors)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int):
+    return [set(top_k_indices(corpus @ q, k).tolist()) for q in queries]
+
+
+def recall(results, truth) -> float:
+    hits = sum(len(set(r) & t) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+def bench_numpy(corpus, queries, k):
+    start = time.perf_counter()
+    index = NumpyVectorIndex(corpus, [str(i) for i in range(corpus.shape[0])])
+    build = time.perf_counter() - start
+
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = index.search_by_vector(q, k)
+        latencies.append(time.perf_counter() - start)
+        results.append([row for row, _ in hits])
+    return build, latencies, results
+
+
+def bench_chroma(corpus, queries, k):
+    import chromadb
+
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"bench-{uuid.uuid4().hex[:8]}")
+
+    start = time.perf_counter()
+    for offset in range(0, corpus.shape[0], CHROMA_BATCH_SIZE):
+        batch = corpus[offset:offset + CHROMA_BATCH_SIZE]
+        collection.add(
+            ids=[str(i) for i in range(offset, offset + batch.shape[0])],
+            embeddings=batch.tolist()
+        )
+    build = time.perf_counter() - start
+
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        response = collection.query(query_embeddings=[q.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - start)
+        results.append([int(i) for i in response["ids"][0]])
+
+    client.delete_collection(collection.name)
+    return build, latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256, help="embedding width (OpenAI ada-002 uses 1536)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--chroma-max", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'backend':<8} {'size':>9} {'build s':>9} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+
+    for size in args.sizes:
+        corpus = make_corpus(size, args.dim, rng)
+        queries = normalize_rows(corpus[rng.integers(0, size, args.queries)] +
+                                 0.1 * rng.standard_normal((args.queries, args.dim)).astype(np.float32))
+        truth = exact_top_k(corpus, queries, args.k)
+
+        backends = [("numpy", bench_numpy)]
+        if size <= args.chroma_max:
+            backends.append(("chroma", bench_chroma))
+
+        for name, bench in backends:
+            build, latencies, results = bench(corpus, queries, args.k)
+            print(f"{name:<8} {size:>9} {build:>9.2f} {percentile_ms(latencies, 50):>8.3f} "
+                  f"{percentile_ms(latencies, 95):>8.3f} {recall(results, truth):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
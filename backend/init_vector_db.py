@@ -1,5 +1,6 @@
 """Initialize the fashion advice vector database with sample data"""
 import os
+import time
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
@@ -48,7 +49,7 @@ def initialize_vector_db():
     documents = [Document(page_content=text) for text in fashion_knowledge]
 
     # Create vector store
-    persist_directory = "./fashion_advice_db"
+    persist_directory = os.getenv("VECTOR_DB_DIR", "./fashion_advice_db")
 
     # Remove existing database if it exists
     if os.path.exists(persist_directory):
@@ -63,6 +64,10 @@ def initialize_vector_db():
         persist_directory=persist_directory
     )
 
+    # Bump the build marker so running API workers reopen the store
+    with open(os.path.join(persist_directory, ".version"), "w") as marker:
+        marker.write(str(time.time()))
+
     print(f"Vector database initialized successfully!")
     print(f"Total documents: {len(fashion_knowledge)}")
     print(f"Database location: {os.path.abspath(persist_directory)}")
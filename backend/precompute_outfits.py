@@ -0,0 +1,145 @@
+"""Precompute every user's outfit of the day ahead of the morning traffic peak
+
+Usage (from the backend directory, e.g. from cron shortly after midnight):
+    python precompute_outfits.py --workers 4 --page-size 1000
+
+Wardrobe rows are streamed from Supabase in pages ordered by user, weather is
+fetched once for the endpoint's location, outfits are composed in a pool of worker
+processes and written in batches to the store configured by OOTD_STORE,
+which /api/outfit-of-the-day reads before computing anything live.
+"""
+import time
+import asyncio
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+from typing import Dict, Iterator, List, Tuple
+
+from app.clients import create_daily_outfit_store, create_supabase_client, fetch_weather, http_client
+from app.services.daily_outfit import (
+    compose_outfit_of_the_day, daily_rng, wardrobe_fingerprint, weather_bucket, weather_inputs
+)
+from app.services.wardrobe_repository import WARDROBE_COLUMNS
+
+logger = logging.getLogger("precompute_outfits")
+
+# The location /api/outfit-of-the-day uses; users have no location of their own yet
+LOCATION = ("New York", "US")
+
+
+def iter_pages(query_factory, page_size: int) -> Iterator[List[dict]]:
+    start = 0
+    while True:
+        rows = query_factory().range(start, start + page_size - 1).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+
+def iter_wardrobes(supabase, page_size: int) -> Iterator[Tuple[str, List[dict]]]:
+    """(user_id, rows) per user, streaming the wardrobe table in pages"""
+    def query():
+        return supabase.table("wardrobe").select(f"user_id, {WARDROBE_COLUMNS}").order("user_id").order("id")
+
+    current_user, current_items = None, []
+    for rows in iter_pages(query, page_size):
+        for row in rows:
+            user_id = str(row.pop("user_id"))
+            if user_id != current_user:
+                if current_items:
+                    yield current_user, current_items
+                current_user, current_items = user_id, []
+            current_items.append(row)
+    if current_items:
+        yield current_user, current_items
+
+
+def compose_one(user_id: str, day: str, items: List[dict], temperature: float, description: str) -> dict:
+    """The outfit with the wardrobe fingerprint and weather bucket the endpoint checks before serving it"""
+    fingerprint = wardrobe_fingerprint(items)
+    return {
+        "fingerprint": fingerprint,
+        "bucket": weather_bucket(temperature),
+        "outfit": compose_outfit_of_the_day(items, temperature, description, rng=daily_rng(user_id, day, fingerprint))
+    }
+
+
+def compose_batch(day: str, temperature: float, description: str, batch: List[Tuple[str, List[dict]]]) -> Dict[str, dict]:
+    """Runs in a worker process; seeded like the live endpoint, so both agree on the outfit"""
+    return {user_id: compose_one(user_id, day, items, temperature, description) for user_id, items in batch}
+
+
+async def run(args):
+    # Built here, not on import, so the pool's worker processes don't open their own
+    supabase = create_supabase_client()
+    if supabase is None:
+        raise SystemExit("Supabase is not configured")
+    daily_outfit_store = create_daily_outfit_store()
+    if daily_outfit_store is None:
+        raise SystemExit("No outfit-of-the-day store configured (OOTD_STORE)")
+
+    day = args.date or date.today().isoformat()
+    started = time.perf_counter()
+    await http_client.start()
+    loop = asyncio.get_running_loop()
+    try:
+        temperature, description = weather_inputs(await fetch_weather(*LOCATION))
+        compose = partial(compose_batch, day, temperature, description)
+        users = 0
+        pending = set()
+        batch: List[Tuple[str, List[dict]]] = []
+
+        async def write(future):
+            outfits = await future
+            await asyncio.to_thread(daily_outfit_store.put_many, day, outfits)
+
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            wardrobes = iter_wardrobes(supabase, args.page_size)
+            while True:
+                # Supabase calls are blocking; pull the next user off the event loop
+                entry = await asyncio.to_thread(next, wardrobes, None)
+                if entry is None:
+                    break
+                batch.append(entry)
+                users += 1
+
+                if len(batch) >= args.batch_size:
+                    pending.add(asyncio.ensure_future(write(loop.run_in_executor(pool, compose, batch))))
+                    batch = []
+                    # Bound the wardrobes held in memory
+                    if len(pending) >= args.workers * 2:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            task.result()
+
+            if batch:
+                pending.add(asyncio.ensure_future(write(loop.run_in_executor(pool, compose, batch))))
+            for task in asyncio.as_completed(pending):
+                await task
+    finally:
+        await http_client.close()
+        daily_outfit_store.close()
+
+    logger.info(
+        f"Precomputed {users} outfits for {day} at {temperature:.0f}°F "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", help="Day to precompute (YYYY-MM-DD), default today")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=200, help="Users per worker task")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
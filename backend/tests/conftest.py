@@ -0,0 +1,24 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def main_module(tmp_path_factory):
+    """app.main configured for offline tests: stub try-on, nothing written outside a temporary directory"""
+    data = tmp_path_factory.mktemp("app")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for name, value in {
+            "OPENAI_API_KEY": "test",
+            "TRYON_UPSTREAM": "stub",
+            "TRYON_STUB_DELAY": "0.05",
+            "TRYON_CACHE_SIZE": "0",
+            "OOTD_STORE": "none",
+            "IMAGE_WORKERS": "0",
+            "DESCRIBE_CACHE_SIZE": "0",
+            "VECTOR_DB_DIR": str(data / "vector_db")
+        }.items():
+            monkeypatch.setenv(name, value)
+        # Other tests may have imported clients.py before the environment above was set
+        monkeypatch.setattr(importlib.import_module("app.clients"), "OOTD_STORE", "none")
+        yield importlib.import_module("app.main")
@@ -0,0 +1,77 @@
+"""Golden test: the matrix scorer against the per-item OccasionScorer it batches
+
+Wardrobes are drawn on both sides of OUTFIT_BATCH_MIN_ITEMS (200), where
+main.py switches from KeywordRanking to BatchRanking, so either path must
+score and pick items the same way.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.services.batch_scoring import BatchRanking, occasion_batch_scorer
+from app.services.outfit_scoring import OCCASION_REQUIREMENTS, KeywordRanking, extract_features, occasion_scorer
+from app.services.outfit_search import OutfitSearch, build_slots
+from tests.test_outfit_scoring import random_items
+
+SIZES = [1, 37, 199, 200, 450]
+
+
+def by_category(items):
+    wardrobe = {}
+    for item in items:
+        wardrobe.setdefault(item.get('category', 'Uncategorized'), []).append(item)
+    return wardrobe
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("seed", range(3))
+def test_scores_match_occasion_scorer(seed, size):
+    items = random_items(random.Random(seed * 1000 + size), size)
+    features = extract_features(items)
+    batch = occasion_batch_scorer()
+    scores = batch.score(features)
+
+    assert scores.shape == (size, len(OCCASION_REQUIREMENTS))
+    for occasion_id, column in batch.occasion_index.items():
+        scorer = occasion_scorer(occasion_id)
+        expected = [scorer.score(item_features) for item_features in features]
+        assert scores[:, column].tolist() == expected, occasion_id
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("seed", range(3))
+def test_rankings_pick_the_same_items(seed, size):
+    wardrobe = by_category(random_items(random.Random(seed * 7919 + size), size))
+    keyword, batch = KeywordRanking(wardrobe), BatchRanking(wardrobe)
+
+    for occasion_id, req in OCCASION_REQUIREMENTS.items():
+        for category in wardrobe:
+            keyword_items, keyword_scores = keyword.item_scores(occasion_id, category)
+            batch_items, batch_scores = batch.item_scores(occasion_id, category)
+            assert batch_scores == keyword_scores
+            assert all(a is b for a, b in zip(batch_items, keyword_items))
+            # np.argmax takes the earliest of equal scores, like the baseline's stable sort
+            best = int(np.argmax(batch_scores))
+            assert best == keyword_scores.index(max(keyword_scores))
+
+        slots = build_slots(keyword, occasion_id, req['required_categories'], req['optional_categories'])
+        batch_slots = build_slots(batch, occasion_id, req['required_categories'], req['optional_categories'])
+        expected = OutfitSearch(k=3, budget_seconds=10).search(slots)
+        found = OutfitSearch(k=3, budget_seconds=10).search(batch_slots)
+        assert [score for score, _ in found] == [score for score, _ in expected]
+        for (_, found_items), (_, expected_items) in zip(found, expected):
+            assert all(a is b for a, b in zip(found_items, expected_items))
+
+
+@pytest.mark.parametrize("size", [3, 250])
+def test_ties_go_to_the_earliest_item(size):
+    items = [{"item_name": "Navy wool blazer", "description": "", "category": "Tops"} for _ in range(size)]
+    wardrobe = {"Tops": items}
+    for ranking in (KeywordRanking(wardrobe), BatchRanking(wardrobe)):
+        for occasion_id in OCCASION_REQUIREMENTS:
+            _, scores = ranking.item_scores(occasion_id, "Tops")
+            assert len(set(scores)) == 1
+            slots = build_slots(ranking, occasion_id, ["Tops"], [])
+            assert slots[0].items[0] is items[0]
+            assert OutfitSearch(k=1).search(slots)[0][1][0] is items[0]
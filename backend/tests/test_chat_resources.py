@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services import chat_resources as module
+from app.services.chat_resources import VERSION_MARKER, ChatResources
+
+
+class SlowChroma:
+    """Stands in for Chroma; opening waits until the test lets it finish"""
+    opening = threading.Event()
+    release = threading.Event()
+    fail = False
+
+    def __init__(self, persist_directory, embedding_function):
+        SlowChroma.opening.set()
+        SlowChroma.release.wait(5)
+        if SlowChroma.fail:
+            raise RuntimeError("collection is corrupt")
+
+
+@pytest.fixture
+def resources(tmp_path, monkeypatch):
+    monkeypatch.setattr(module, "Chroma", SlowChroma)
+    SlowChroma.opening.clear()
+    SlowChroma.release.clear()
+    SlowChroma.fail = False
+    (tmp_path / VERSION_MARKER).write_text("v1")
+    resources = ChatResources("key", persist_directory=str(tmp_path), reload_check_interval=0)
+    resources.vectorstore = "old store"
+    resources.store_version = "v1"
+    (tmp_path / VERSION_MARKER).write_text("v2")
+    return resources
+
+
+@pytest.mark.asyncio
+async def test_reload_runs_off_the_loop_and_serves_the_old_store_meanwhile(resources):
+    resources.reload_if_changed()
+    await asyncio.to_thread(SlowChroma.opening.wait, 5)
+    # The loop is free and requests still see the previous store
+    assert resources.vectorstore == "old store"
+    resources.reload_if_changed()  # no second reload while one is running
+
+    SlowChroma.release.set()
+    await resources._reload_task
+    assert isinstance(resources.vectorstore, SlowChroma)
+    assert resources.store_version == "v2"
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_the_old_store(resources):
+    SlowChroma.fail = True
+    SlowChroma.release.set()
+    resources.reload_if_changed()
+    await resources._reload_task
+    assert resources.vectorstore == "old store"
+    assert resources.vectorstore_error == "collection is corrupt"
+    assert resources.store_version == "v2"
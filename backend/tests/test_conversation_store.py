@@ -0,0 +1,66 @@
+import fakeredis
+
+from app.services.conversation_store import ConversationStore, RedisConversationBackend
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("Connection refused")
+        return fail
+
+
+def worker(server, max_turns=10):
+    backend = RedisConversationBackend(client=fakeredis.FakeRedis(server=server))
+    return ConversationStore(max_turns=max_turns, backend=backend)
+
+
+def users(turns):
+    return [turn.user for turn in turns]
+
+
+def test_workers_without_sticky_sessions_keep_every_turn():
+    server = fakeredis.FakeServer()
+    first, second = worker(server), worker(server)
+
+    first.append("c", "1", "a")
+    assert users(second.get("c")) == ["1"]
+    second.append("c", "2", "b")
+    # first still holds its own copy of turn 1; appending must not overwrite turn 2
+    first.append("c", "3", "c")
+
+    assert users(first.get("c")) == ["1", "2", "3"]
+    assert users(second.get("c")) == ["1", "2", "3"]
+
+
+def test_backend_trims_to_max_turns():
+    store = worker(fakeredis.FakeServer(), max_turns=3)
+    for number in range(5):
+        turns = store.append("c", str(number), "reply")
+    assert users(turns) == ["2", "3", "4"]
+    assert users(store.get("c")) == ["2", "3", "4"]
+
+
+def test_delete_reaches_other_workers():
+    server = fakeredis.FakeServer()
+    first, second = worker(server), worker(server)
+    first.append("c", "1", "a")
+    second.get("c")
+    first.delete("c")
+    assert second.get("c") == []
+
+
+def test_outage_falls_back_to_local_copy():
+    store = ConversationStore(backend=RedisConversationBackend(client=BrokenRedis()))
+    store.append("c", "1", "a")
+    store.append("c", "2", "b")
+    assert users(store.get("c")) == ["1", "2"]
+    assert store.backend_errors == 3
+
+
+def test_memory_only_store():
+    store = ConversationStore(max_turns=2)
+    for number in range(3):
+        store.append("c", str(number), "reply")
+    assert users(store.get("c")) == ["1", "2"]
+    assert store.get("missing") == []
@@ -0,0 +1,32 @@
+from app.services.daily_outfit import DailyOutfitMemo
+
+OUTFIT = {"outfit": {"top": "White tee"}}
+
+
+def memo():
+    memo = DailyOutfitMemo()
+    memo.put("user", "2024-05-01", "wardrobe-a", 14, OUTFIT)
+    return memo
+
+
+def test_hit_needs_same_day_wardrobe_and_bucket():
+    assert memo().get("user", "2024-05-01", "wardrobe-a", 14) is OUTFIT
+
+
+def test_changed_wardrobe_weather_or_day_is_a_miss():
+    for day, fingerprint, bucket in [
+        ("2024-05-02", "wardrobe-a", 14),
+        ("2024-05-01", "wardrobe-b", 14),
+        ("2024-05-01", "wardrobe-a", 15)
+    ]:
+        stale = memo()
+        assert stale.get("user", day, fingerprint, bucket) is None
+        # The stale entry is dropped, not kept for the old inputs
+        assert stale.get("user", "2024-05-01", "wardrobe-a", 14) is None
+
+
+def test_invalidate_drops_the_entry():
+    invalidated = memo()
+    invalidated.invalidate("user")
+    assert invalidated.get("user", "2024-05-01", "wardrobe-a", 14) is None
+    assert invalidated.stats()["invalidations"] == 1
@@ -0,0 +1,64 @@
+import time
+
+import fakeredis
+import pytest
+
+from app.services.daily_outfit_store import RedisDailyOutfitStore, SqliteDailyOutfitStore
+
+ENTRY = {"fingerprint": "abc", "bucket": 14, "outfit": {"outfit": {"top": "White tee"}}}
+OTHER = {"fingerprint": "def", "bucket": 9, "outfit": {"outfit": {"top": "Wool sweater"}}}
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SqliteDailyOutfitStore(str(tmp_path / "ootd" / "daily.sqlite"))
+    else:
+        store = RedisDailyOutfitStore(client=fakeredis.FakeRedis())
+    yield store
+    store.close()
+
+
+def test_put_get_round_trip(store):
+    store.put_many("2024-05-01", {"u1": ENTRY, "u2": OTHER})
+    assert store.get("u1", "2024-05-01") == ENTRY
+    assert store.get("u2", "2024-05-01") == OTHER
+    assert store.get("u1", "2024-05-02") is None
+    assert store.get("u3", "2024-05-01") is None
+
+
+def test_put_replaces_and_delete_removes(store):
+    store.put_many("2024-05-01", {"u1": ENTRY})
+    store.put_many("2024-05-01", {"u1": OTHER})
+    assert store.get("u1", "2024-05-01") == OTHER
+    store.delete("u1", "2024-05-01")
+    assert store.get("u1", "2024-05-01") is None
+
+
+def test_sqlite_keeps_only_the_latest_days(tmp_path):
+    path = str(tmp_path / "daily.sqlite")
+    store = SqliteDailyOutfitStore(path, keep_days=2)
+    for day in ("2024-05-01", "2024-05-02", "2024-05-03"):
+        store.put_many(day, {"u1": ENTRY})
+    assert store.get("u1", "2024-05-01") is None
+    assert store.get("u1", "2024-05-02") == ENTRY
+    store.close()
+
+    # Entries outlive the process that wrote them
+    reopened = SqliteDailyOutfitStore(path)
+    assert reopened.get("u1", "2024-05-03") == ENTRY
+    reopened.close()
+
+
+def test_redis_entries_expire():
+    client = fakeredis.FakeRedis()
+    store = RedisDailyOutfitStore(client=client, prefix="test", ttl_seconds=36 * 3600)
+    store.put_many("2024-05-01", {"u1": ENTRY})
+    assert 0 < client.ttl("test:2024-05-01:u1") <= 36 * 3600
+
+    short = RedisDailyOutfitStore(client=client, prefix="short", ttl_seconds=1)
+    short.put_many("2024-05-01", {"u1": ENTRY})
+    assert short.get("u1", "2024-05-01") == ENTRY
+    time.sleep(1.1)
+    assert short.get("u1", "2024-05-01") is None
+    assert store.get("u1", "2024-05-01") == ENTRY
@@ -0,0 +1,220 @@
+import hashlib
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.services.describe_batch import DESCRIBE_PROMPT, BatchDescriber, BatchImage, parse_descriptions
+from app.services.describe_cache import DescribeCache
+from app.services.image_preprocessing import PreparedImage
+from app.utils.image_validation import MAX_IMAGE_BYTES, ImageUpload, ImageValidationError
+
+
+def answer(*items) -> str:
+    return "Here you go:\n" + json.dumps(list(items))
+
+
+def item(name, index=None):
+    described = {"item_name": name, "description": f"A {name}", "category": "Tops"}
+    if index is not None:
+        described["index"] = index
+    return described
+
+
+def test_parse_descriptions_places_answers_by_index():
+    results = parse_descriptions(answer(item("b", 2), item("a", 1), item("c", 3)), 3)
+    assert [result["item_name"] for result in results] == ["a", "b", "c"]
+    assert all("index" not in result for result in results)
+
+
+def test_parse_descriptions_leaves_dropped_and_garbled_entries_empty():
+    content = answer(item("a", 1), {"index": 2, "description": "no name"}, "not an object")
+    assert parse_descriptions(content, 4) == [item("a"), None, None, None]
+
+
+@pytest.mark.parametrize("bad_index", [0, 5, -1, "2", None, 1.5])
+def test_unusable_index_falls_back_to_position(bad_index):
+    results = parse_descriptions(answer(item("a", 1), item("b", bad_index)), 4)
+    assert [r and r["item_name"] for r in results] == ["a", "b", None, None]
+
+
+def test_duplicate_index_keeps_the_first_answer():
+    results = parse_descriptions(answer(item("a", 1), item("b", 1), item("c", 3)), 3)
+    assert [r and r["item_name"] for r in results] == ["a", None, "c"]
+
+
+@pytest.mark.parametrize("content", ["Sorry, I can't help with that.", "[{not json}]", '{"item_name": "a"}', "[]"])
+def test_unparseable_answer_gives_no_results(content):
+    assert parse_descriptions(content, 2) == [None, None]
+
+
+class Vision:
+    """describe() stand-in answering each call from a function of the images' names"""
+
+    def __init__(self, packed=None, single=None):
+        self.calls = []
+        self.packed = packed or (lambda names: answer(*[item(name, i) for i, name in enumerate(names, 1)]))
+        self.single = single or (lambda name: json.dumps(item(name)))
+
+    async def __call__(self, images, prompt, max_tokens):
+        names = [image.data.decode() for image in images]
+        self.calls.append(names)
+        if len(images) == 1 and prompt == DESCRIBE_PROMPT:
+            return self.single(names[0])
+        return self.packed(names)
+
+
+async def prepare(data):
+    name = bytes(data).decode()
+    # Names stand in for photos: equal names are the same picture, different ones far apart
+    phash = int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big")
+    return PreparedImage(bytes(data), "image/jpeg", 1, 1, len(data), phash, 0, 0x808080)
+
+
+def upload(name):
+    data = memoryview(name.encode())
+    return lambda: ImageUpload(name, "image/jpeg", len(data), data)
+
+
+def batch(*names):
+    return [BatchImage(index, f"{name}.jpg", upload(name)) for index, name in enumerate(names)]
+
+
+async def run(describer, images):
+    return sorted([event async for event in describer.run(images)], key=lambda event: event["index"])
+
+
+@pytest.mark.asyncio
+async def test_images_are_packed_per_prompt():
+    vision = Vision()
+    events = await run(BatchDescriber(prepare, vision, images_per_prompt=3), batch("a", "b", "c", "d", "e"))
+    assert [event["item"]["item_name"] for event in events] == ["a", "b", "c", "d", "e"]
+    assert sorted(map(len, vision.calls)) == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_dropped_or_garbled_answers_are_retried_one_by_one():
+    def packed(names):
+        # Leaves out the second image and garbles the third
+        return answer(item(names[0], 1), {"index": 3, "description": "?"}, item(names[3], 4))
+
+    vision = Vision(packed=packed)
+    events = await run(BatchDescriber(prepare, vision, images_per_prompt=4), batch("a", "b", "c", "d"))
+    assert [event["item"]["item_name"] for event in events] == ["a", "b", "c", "d"]
+    assert sorted(vision.calls) == [["a", "b", "c", "d"], ["b"], ["c"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_packed_call_falls_back_to_single_prompts():
+    def packed(names):
+        raise RuntimeError("upstream timeout")
+
+    vision = Vision(packed=packed)
+    events = await run(BatchDescriber(prepare, vision, images_per_prompt=3), batch("a", "b", "c"))
+    assert [event["item"]["item_name"] for event in events] == ["a", "b", "c"]
+    assert len(vision.calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_single_call_is_an_error_event():
+    def single(name):
+        raise RuntimeError("upstream timeout")
+
+    events = await run(BatchDescriber(prepare, Vision(single=single), images_per_prompt=1), batch("a"))
+    assert events == [{"index": 0, "filename": "a.jpg", "error": "Failed to process image"}]
+
+
+@pytest.mark.asyncio
+async def test_unreadable_images_fail_alone():
+    def rejected():
+        raise ImageValidationError("Invalid file type: content is not an image.")
+
+    def broken():
+        raise OSError("disk error")
+
+    images = batch("a", "b") + [BatchImage(2, "notes.txt", rejected), BatchImage(3, "lost.jpg", broken)]
+    events = await run(BatchDescriber(prepare, Vision(), images_per_prompt=2), images)
+    assert [event.get("item", {}).get("item_name") for event in events[:2]] == ["a", "b"]
+    assert events[2] == {"index": 2, "filename": "notes.txt", "error": "Invalid file type: content is not an image."}
+    assert events[3] == {"index": 3, "filename": "lost.jpg", "error": "Failed to read image"}
+
+
+@pytest.mark.asyncio
+async def test_cached_images_skip_the_vision_call():
+    cache = DescribeCache()
+    vision = Vision()
+    describer = BatchDescriber(prepare, vision, cache=cache, images_per_prompt=2)
+    await run(describer, batch("a", "b"))
+    vision.calls.clear()
+
+    events = await run(describer, batch("a", "c", "b"))
+    assert [event["cached"] for event in events] == [True, False, True]
+    assert vision.calls == [["c"]]
+
+
+def jpeg(color=(200, 40, 40)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def describe_app(main_module, monkeypatch):
+    calls = []
+
+    async def vision_describe(images, prompt, max_tokens):
+        calls.append(len(images))
+        if prompt == DESCRIBE_PROMPT:
+            return json.dumps(item("single"))
+        return answer(*[item(f"item {number}", number) for number in range(1, len(images) + 1)])
+
+    monkeypatch.setattr(main_module, "vision_describe", vision_describe)
+    with TestClient(main_module.app) as client:
+        client.vision_calls = calls
+        yield client
+
+
+def test_zip_archive_skips_hidden_files_and_limits_member_size(describe_app):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("shirts/red.jpg", jpeg((200, 40, 40)))
+        zip_file.writestr("shirts/", b"")
+        zip_file.writestr("__MACOSX/shirts/._red.jpg", b"\x00\x05\x16\x07 resource fork")
+        zip_file.writestr("shirts/.DS_Store", b"Bud1")
+        zip_file.writestr(".hidden.jpg", jpeg())
+        zip_file.writestr("notes.txt", b"not an image")
+        # Compresses to almost nothing, but must not be inflated into memory
+        zip_file.writestr("huge.jpg", b"\xff\xd8\xff" + bytes(MAX_IMAGE_BYTES))
+        zip_file.writestr("blue.jpg", jpeg((40, 40, 200)))
+
+    response = describe_app.post(
+        "/describe-clothing/batch",
+        files=[
+            ("images", ("upload.jpg", jpeg((40, 200, 40)), "image/jpeg")),
+            ("archive", ("wardrobe.zip", archive.getvalue(), "application/zip"))
+        ]
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    events = {event["filename"]: event for event in lines[:-1]}
+
+    assert sorted(events) == ["blue.jpg", "huge.jpg", "notes.txt", "shirts/red.jpg", "upload.jpg"]
+    # Uploads first, then the archive's files in order
+    order = ["upload.jpg", "shirts/red.jpg", "notes.txt", "huge.jpg", "blue.jpg"]
+    assert [events[name]["index"] for name in order] == [0, 1, 2, 3, 4]
+    assert events["huge.jpg"]["error"].startswith("File too large")
+    assert events["notes.txt"]["error"].startswith("Invalid file type")
+    assert all("item" in events[name] for name in ("upload.jpg", "shirts/red.jpg", "blue.jpg"))
+    assert lines[-1] == {"done": True, "images": 5, "described": 3, "cached": 0, "failed": 2}
+
+
+def test_bad_archive_is_rejected(describe_app):
+    response = describe_app.post(
+        "/describe-clothing/batch", files=[("archive", ("wardrobe.zip", b"not a zip", "application/zip"))]
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid archive")
+    assert describe_app.vision_calls == []
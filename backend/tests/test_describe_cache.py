@@ -0,0 +1,189 @@
+import io
+import random
+import sqlite3
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.services.describe_cache import CHUNK_BITS, DescribeCache
+from app.services.image_preprocessing import prepare_image
+
+SHIRT = [
+    (60, 60), (120, 40), (180, 40), (240, 60), (280, 130), (240, 150), (230, 120),
+    (230, 360), (70, 360), (70, 120), (60, 150), (20, 130)
+]
+COLORS = {"red": (200, 30, 30), "blue": (30, 60, 200), "green": (30, 150, 60)}
+
+
+def shirt(color, scale: float = 1.0, quality: int = 92):
+    """The same cut on white in the given colour, as an uploaded JPEG"""
+    image = Image.new("RGB", (300, 400), (255, 255, 255))
+    ImageDraw.Draw(image).polygon(SHIRT, fill=color)
+    image = image.resize((int(300 * scale), int(400 * scale)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return prepare_image(buffer.getvalue())
+
+
+def remember(cache, prepared, name):
+    cache.put(prepared.phash, prepared.dhash, prepared.color, {"item_name": name})
+
+
+def lookup(cache, prepared):
+    return cache.get(prepared.phash, prepared.dhash, prepared.color)
+
+
+def test_same_cut_in_another_colour_is_a_miss():
+    shirts = {name: shirt(color) for name, color in COLORS.items()}
+    # Grayscale hashes alone can't tell these apart
+    assert len({(prepared.phash, prepared.dhash) for prepared in shirts.values()}) < len(shirts)
+
+    for name, prepared in shirts.items():
+        cache = DescribeCache()
+        remember(cache, prepared, f"{name} shirt")
+        for other, other_prepared in shirts.items():
+            found = lookup(cache, other_prepared)
+            if other == name:
+                assert found == {"item_name": f"{name} shirt"}
+            else:
+                assert found is None
+
+
+def test_reupload_of_the_same_photo_hits():
+    cache = DescribeCache()
+    remember(cache, shirt(COLORS["red"]), "red shirt")
+    assert lookup(cache, shirt(COLORS["red"], scale=0.7, quality=60)) == {"item_name": "red shirt"}
+
+
+def test_colour_survives_the_disk_tier(tmp_path):
+    path = str(tmp_path / "describe.sqlite")
+    cache = DescribeCache(disk_path=path)
+    remember(cache, shirt(COLORS["red"]), "red shirt")
+    cache.close()
+
+    reopened = DescribeCache(disk_path=path)
+    assert lookup(reopened, shirt(COLORS["red"])) == {"item_name": "red shirt"}
+    assert lookup(reopened, shirt(COLORS["blue"])) is None
+    reopened.close()
+
+
+def test_rows_without_a_colour_are_not_loaded(tmp_path):
+    path = str(tmp_path / "describe.sqlite")
+    prepared = shirt(COLORS["red"])
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE describe_cache "
+        "(model TEXT, phash TEXT, dhash TEXT, result TEXT, created_at REAL, PRIMARY KEY (model, phash))"
+    )
+    db.execute(
+        "INSERT INTO describe_cache VALUES (?, ?, ?, ?, ?)",
+        ("", f"{prepared.phash:016x}", f"{prepared.dhash:016x}", '{"item_name": "blue shirt"}', 0.0)
+    )
+    db.commit()
+    db.close()
+
+    cache = DescribeCache(disk_path=path)
+    assert cache.stats()["entries"] == 0
+    assert lookup(cache, prepared) is None
+    remember(cache, prepared, "red shirt")
+    cache.close()
+    reopened = DescribeCache(disk_path=path)
+    assert reopened.stats()["entries"] == 1
+    reopened.close()
+
+
+@pytest.mark.parametrize("missing", ["phash", "dhash", "color"])
+def test_unhashed_images_are_never_cached(missing):
+    cache = DescribeCache()
+    prepared = shirt(COLORS["red"])
+    setattr(prepared, missing, None)
+    remember(cache, prepared, "red shirt")
+    assert cache.stats()["entries"] == 0
+    assert lookup(cache, prepared) is None
+
+
+DHASH, COLOR = 0x0123456789ABCDEF, 0x808080
+
+
+def flipped(value: int, positions) -> int:
+    for position in positions:
+        value ^= 1 << position
+    return value
+
+
+def spread_positions(rng, bits: int):
+    """bits positions dealt round-robin over the four chunks, the hardest case for the chunk tables"""
+    chunks = rng.sample(range(4), 4)
+    per_chunk = [[] for _ in range(4)]
+    for index in range(bits):
+        per_chunk[chunks[index % 4]].append(index)
+    positions = []
+    for chunk, indices in enumerate(per_chunk):
+        positions += [chunk * CHUNK_BITS + offset for offset in rng.sample(range(CHUNK_BITS), len(indices))]
+    return positions
+
+
+@pytest.mark.parametrize("bits", range(0, 11))
+@pytest.mark.parametrize("spread", [True, False])
+def test_near_hits_within_the_threshold_only(bits, spread):
+    rng = random.Random(bits * 2 + spread)
+    for _ in range(50):
+        cache = DescribeCache(threshold=6)
+        phash = rng.getrandbits(64)
+        cache.put(phash, DHASH, COLOR, {"item_name": "shirt"})
+        positions = spread_positions(rng, bits) if spread else rng.sample(range(64), bits)
+        found = cache.get(flipped(phash, positions), DHASH, COLOR)
+        if bits <= 6:
+            assert found == {"item_name": "shirt"}
+        else:
+            assert found is None
+    stats = cache.stats()
+    assert stats["near_hits"] == (1 if 0 < bits <= 6 else 0)
+
+
+def test_nearest_matches_a_linear_scan():
+    rng = random.Random(5)
+    base = [rng.getrandbits(64) for _ in range(20)]
+    # Clusters of close hashes, so several candidates are often within the threshold
+    stored = {flipped(b, rng.sample(range(64), rng.randint(0, 5))) for b in base for _ in range(10)}
+    cache = DescribeCache(threshold=6)
+    for phash in stored:
+        cache.put(phash, DHASH, COLOR, {"phash": phash})
+
+    for _ in range(500):
+        query = flipped(rng.choice(base), rng.sample(range(64), rng.randint(0, 9)))
+        distances = {phash: bin(phash ^ query).count("1") for phash in stored}
+        best = min(distances.values())
+        found = cache.get(query, DHASH, COLOR)
+        if best > 6:
+            assert found is None
+        else:
+            assert distances[found["phash"]] == best
+
+
+def test_near_candidates_still_need_dhash_and_colour():
+    cache = DescribeCache(threshold=6, dhash_threshold=10, color_threshold=10.0)
+    phash = 0xF0F0F0F0F0F0F0F0
+    cache.put(phash, DHASH, COLOR, {"item_name": "shirt"})
+    near = flipped(phash, [0, 20, 40])
+    assert cache.get(near, flipped(DHASH, range(11)), COLOR) is None
+    assert cache.get(near, flipped(DHASH, range(10)), COLOR) == {"item_name": "shirt"}
+
+
+def test_evicted_entries_leave_the_chunk_tables():
+    rng = random.Random(11)
+    cache = DescribeCache(max_entries=50, threshold=6)
+    live = []
+    for index in range(400):
+        phash = rng.getrandbits(64)
+        cache.put(phash, DHASH, COLOR, {"index": index})
+        live = (live + [phash])[-50:]
+
+    assert cache.stats()["evictions"] == 350
+    indexed = set()
+    for table in cache._tables:
+        assert all(table.values()), "empty buckets are removed"
+        for bucket in table.values():
+            indexed |= bucket
+    assert indexed == set(live) == set(cache._entries)
+    assert sum(len(bucket) for bucket in cache._tables[0].values()) == 50
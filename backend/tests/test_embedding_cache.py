@@ -0,0 +1,74 @@
+import pytest
+
+from app.services import embedding_cache as module
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache, normalize_query
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(module, "time", clock)
+    return clock
+
+
+def test_lru_evicts_the_least_recently_used(clock):
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]  # a is now the most recent
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0] and cache.get("c") == [3.0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = EmbeddingCache(ttl_seconds=60)
+    cache.put("a", [1.0])
+    clock.now += 59
+    assert cache.get("a") == [1.0]
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_tier_reloads_and_honours_the_ttl(clock, tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(ttl_seconds=60, disk_path=path)
+    cache.put("a", [0.5, -1.25])
+    cache.close()
+
+    reopened = EmbeddingCache(ttl_seconds=60, disk_path=path)
+    assert reopened.get("a") == [0.5, -1.25]
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.close()
+
+    clock.now += 61
+    expired = EmbeddingCache(ttl_seconds=60, disk_path=path)
+    assert expired.get("a") is None
+    expired.close()
+
+
+def test_cached_embeddings_skip_repeat_queries(clock):
+    class Counting:
+        model = "test"
+        calls = 0
+
+        def embed_query(self, text):
+            self.calls += 1
+            return [float(len(text))]
+
+    upstream = Counting()
+    embeddings = CachedEmbeddings(upstream, EmbeddingCache())
+    first = embeddings.embed_query("What goes with navy?")
+    assert embeddings.embed_query("  what goes with NAVY ") == first
+    assert upstream.calls == 1
+    assert normalize_query("What  goes\twith navy?!") == "what goes with navy"
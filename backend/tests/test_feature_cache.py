@@ -0,0 +1,89 @@
+from app.services.feature_cache import FeatureCache
+from app.services.outfit_scoring import extract_features, matcher_for
+
+
+def item(item_id, item_name, description=""):
+    return {"id": item_id, "item_name": item_name, "description": description, "category": "Tops"}
+
+
+def test_features_match_extract_features_and_hit_on_repeat():
+    cache = FeatureCache()
+    items = [item(1, "Navy Blazer", "wool, business"), item(2, "Grey hoodie"), item(3, "Plain tee", "")]
+
+    first = cache.features(items)
+    assert [f.tokens for f in first] == [f.tokens for f in extract_features(items)]
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    second = cache.features(items)
+    assert [f.tokens for f in second] == [f.tokens for f in first]
+    assert all(f.item is i for f, i in zip(second, items))
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+def test_same_content_under_another_id_hits():
+    cache = FeatureCache()
+    cache.features([item(None, "Red polo shirt", "cotton")])
+    cache.features([item(7, "RED POLO SHIRT", "Cotton")])
+    assert (cache.hits, cache.misses, cache.stale) == (1, 1, 0)
+
+
+def test_changed_content_under_the_same_id_is_stale():
+    cache = FeatureCache()
+    cache.features([item(1, "Black jeans")])
+    edited = cache.features([item(1, "Black dress pants")])[0]
+
+    assert cache.stale == 1
+    assert cache.misses == 2
+    assert edited.tokens == extract_features([item(1, "Black dress pants")])[0].tokens
+    # The record for the old text was dropped, not left to age out
+    assert cache.stats()["entries"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = FeatureCache(max_entries=2)
+    cache.features([item(1, "shirt"), item(2, "jeans")])
+    cache.features([item(1, "shirt")])
+    cache.features([item(3, "blazer")])
+    assert cache.evictions == 1
+
+    cache.features([item(1, "shirt")])
+    assert cache.hits == 2
+    cache.features([item(2, "jeans")])
+    assert cache.misses == 4
+
+
+def test_reload_from_sqlite_tier(tmp_path):
+    path = str(tmp_path / "features" / "features.sqlite")
+    items = [item(1, "Navy Blazer", "wool"), item(2, "Athletic shorts", "gym")]
+    expected = [f.tokens for f in FeatureCache(disk_path=path).features(items)]
+
+    reopened = FeatureCache(disk_path=path)
+    assert reopened.stats()["disk_tier"]
+    assert [f.tokens for f in reopened.features(items)] == expected
+    assert (reopened.hits, reopened.disk_hits, reopened.misses) == (2, 2, 0)
+    reopened.close()
+
+
+def test_stale_rows_are_deleted_from_sqlite_tier(tmp_path):
+    path = str(tmp_path / "features.sqlite")
+    cache = FeatureCache(disk_path=path)
+    cache.features([item(1, "Black jeans")])
+    cache.features([item(1, "Black dress pants")])
+    cache.close()
+
+    reopened = FeatureCache(disk_path=path)
+    reopened.features([item(None, "Black jeans")])
+    assert (reopened.disk_hits, reopened.misses) == (0, 1)
+    reopened.features([item(None, "Black dress pants")])
+    assert reopened.disk_hits == 1
+    reopened.close()
+
+
+def test_keyword_universe_change_misses_sqlite_rows(tmp_path):
+    path = str(tmp_path / "features.sqlite")
+    FeatureCache(disk_path=path).features([item(1, "Linen shirt")])
+
+    other = FeatureCache(disk_path=path, matcher=matcher_for(["linen"]))
+    assert other.fingerprint != FeatureCache().fingerprint
+    other.features([item(1, "Linen shirt")])
+    assert (other.disk_hits, other.misses) == (0, 1)
@@ -0,0 +1,110 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_client import CONNECT_RETRY, NO_RETRY, HttpClient, RetryPolicy
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(RetryPolicy, "delay", lambda self, attempt: 0)
+
+
+async def started(handler, **options) -> HttpClient:
+    client = HttpClient(transport=httpx.MockTransport(handler), **options)
+    await client.start()
+    return client
+
+
+def replies(*outcomes):
+    """Handler answering with each status (or raising each exception) in turn"""
+    calls = []
+
+    def handler(request):
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(request)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    return handler, calls
+
+
+@pytest.mark.asyncio
+async def test_get_retries_transient_statuses():
+    handler, calls = replies(503, 502, 200)
+    client = await started(handler)
+    response = await client.get("http://weather.test/now")
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert client.metrics()["hosts"]["weather.test"]["retries"] == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_gives_up_with_the_last_response():
+    handler, calls = replies(503)
+    client = await started(handler)
+    assert (await client.get("http://weather.test/now")).status_code == 503
+    assert len(calls) == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_post_only_retries_failed_connections():
+    handler, calls = replies(503, 200)
+    client = await started(handler)
+    assert (await client.post("http://api.test/try-on")).status_code == 503
+    assert len(calls) == 1
+    await client.close()
+
+    handler, calls = replies(httpx.ConnectError("refused"), 200)
+    client = await started(handler)
+    assert (await client.post("http://api.test/try-on", retry=CONNECT_RETRY)).status_code == 200
+    assert len(calls) == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_no_retry_sends_once():
+    handler, calls = replies(httpx.ConnectError("refused"), 200)
+    client = await started(handler)
+    with pytest.raises(httpx.ConnectError):
+        await client.post("http://storage.test/upload", retry=NO_RETRY)
+    assert len(calls) == 1
+    assert client.metrics()["hosts"]["storage.test"]["errors"] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_per_host_are_capped():
+    active = {"slow.test": 0, "fast.test": 0}
+    peak = dict(active)
+    release = asyncio.Event()
+
+    async def handler(request):
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        if host == "slow.test":
+            await release.wait()
+        active[host] -= 1
+        return httpx.Response(200)
+
+    client = await started(handler, max_connections_per_host=2)
+    slow = [asyncio.create_task(client.get(f"http://slow.test/{i}")) for i in range(6)]
+    await asyncio.sleep(0.05)
+    # Another host isn't held up by the saturated one
+    assert (await client.get("http://fast.test/")).status_code == 200
+    assert client.metrics()["hosts"]["slow.test"]["in_flight"] == 2
+    release.set()
+    await asyncio.gather(*slow)
+    assert peak["slow.test"] == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_need_a_started_client():
+    with pytest.raises(RuntimeError):
+        await HttpClient().get("http://weather.test/")
@@ -0,0 +1,34 @@
+import io
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image
+
+from app.services.image_preprocessing import ImagePreprocessor
+
+
+def photo() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (200, 30, 30)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_replaced():
+    preprocessor = ImagePreprocessor(workers=1)
+    try:
+        await preprocessor.prepare(photo())
+        for process in list(preprocessor._pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+
+        with pytest.raises(BrokenProcessPool):
+            await preprocessor.prepare(photo())
+        # The next image gets a fresh pool instead of failing forever
+        prepared = await preprocessor.prepare(photo())
+        assert (prepared.width, prepared.height) == (64, 48)
+        assert preprocessor.stats()["pool_restarts"] == 1
+    finally:
+        preprocessor.close()
@@ -0,0 +1,92 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.utils.image_validation import ImageValidationError, check_image, read_image, sniff_image_type
+
+
+def encoded(image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), (10, 120, 200)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("image_format, content_type", [
+    ("JPEG", "image/jpeg"), ("PNG", "image/png"), ("WEBP", "image/webp")
+])
+def test_sniffs_accepted_formats(image_format, content_type):
+    assert sniff_image_type(encoded(image_format)[:12]) == content_type
+
+
+@pytest.mark.parametrize("header", [
+    encoded("GIF")[:12],
+    encoded("BMP")[:12],
+    b"RIFF\x00\x00\x00\x00WAVE",
+    b"<svg xmlns=",
+    b"\xff\xd8",
+    b"",
+])
+def test_rejects_other_content(header):
+    assert sniff_image_type(header) is None
+
+
+def test_declared_type_is_not_trusted():
+    # A JPEG named and declared as PNG is a JPEG; text declared as JPEG is rejected
+    upload = check_image(io.BytesIO(encoded("JPEG")), "photo.png", "image/png")
+    assert upload.content_type == "image/jpeg"
+    with pytest.raises(ImageValidationError, match="declared image/jpeg"):
+        check_image(io.BytesIO(b"#!/bin/sh\necho not an image\n"), "photo.jpg", "image/jpeg")
+
+
+def test_check_image_leaves_the_file_at_its_start_unread():
+    data = encoded("PNG")
+    file = io.BytesIO(data)
+    file.seek(5)
+    upload = check_image(file, "photo.png")
+    assert (upload.filename, upload.size, upload.data) == ("photo.png", len(data), None)
+    assert file.tell() == 0
+
+
+def test_oversize_is_rejected_before_reading_the_content():
+    class Unreadable(io.BytesIO):
+        def readinto(self, buffer):
+            raise AssertionError("content read")
+
+    data = encoded("JPEG")
+    with pytest.raises(ImageValidationError, match="File too large"):
+        read_image(Unreadable(data), max_size=len(data) - 1)
+    assert read_image(io.BytesIO(data), max_size=len(data)).size == len(data)
+
+
+def test_read_image_reads_the_content_once_in_short_reads():
+    class Trickle(io.BytesIO):
+        reads = 0
+
+        def readinto(self, buffer):
+            self.reads += 1
+            return super().readinto(buffer[:7])
+
+    data = encoded("PNG")
+    file = Trickle(data)
+    upload = read_image(file, "photo.png")
+    assert bytes(upload.data) == data
+    assert file.reads == -(-len(data) // 7)
+    assert file.tell() == 0
+
+
+def test_read_image_keeps_only_what_a_truncated_file_returned():
+    class Truncated(io.BytesIO):
+        """Reports its full size but the content ends early, like a file cut short while uploading"""
+
+        def readinto(self, buffer):
+            remaining = 40 - self.tell()
+            if remaining <= 0:
+                return 0
+            return super().readinto(buffer[:remaining])
+
+    data = encoded("JPEG")
+    upload = read_image(Truncated(data))
+    assert upload.size == len(data)
+    assert len(upload.data) == 40
+    assert bytes(upload.data) == data[:40]
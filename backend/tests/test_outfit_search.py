@@ -0,0 +1,109 @@
+import itertools
+import random
+
+import pytest
+
+from app.services.outfit_search import OutfitSearch, Slot, color_families, pair_score
+
+COLORS = ["", "black", "white", "red", "pink", "green", "blue", "orange", "purple", "yellow", "navy red"]
+
+
+def random_slots(rng, count, max_items, integer_scores):
+    slots = []
+    for number in range(count):
+        items = [
+            {"item_name": f"{rng.choice(COLORS)} item {number}.{i}".strip(), "description": ""}
+            for i in range(rng.randint(1, max_items))
+        ]
+        if integer_scores:
+            scores = [rng.randint(-3, 3) for _ in items]
+        else:
+            scores = [rng.uniform(-4, 4) for _ in items]
+        slots.append(Slot(f"slot{number}", items, scores, optional=rng.random() < 0.3))
+    return slots
+
+
+def outfit_score(slots, outfit):
+    score = 0.0
+    chosen = set(map(id, outfit))
+    for slot in slots:
+        for item, item_score in zip(slot.items, slot.scores):
+            if id(item) in chosen:
+                score += item_score
+    for first, second in itertools.combinations(outfit, 2):
+        score += pair_score(color_families(first), color_families(second))
+    return score
+
+
+def brute_force(slots):
+    choices = [
+        list(zip(slot.items, slot.scores)) + ([(None, 0.0)] if slot.optional else [])
+        for slot in slots
+    ]
+    scores = []
+    for combination in itertools.product(*choices):
+        outfit = [item for item, _ in combination if item is not None]
+        scores.append(outfit_score(slots, outfit))
+    return sorted(scores, reverse=True)
+
+
+def copy_slots(slots):
+    return [Slot(slot.category, slot.items, slot.scores, slot.optional) for slot in slots]
+
+
+@pytest.mark.parametrize("integer_scores", [True, False])
+@pytest.mark.parametrize("seed", range(40))
+def test_top_k_matches_brute_force(seed, integer_scores):
+    rng = random.Random(seed)
+    slots = random_slots(rng, rng.randint(1, 4), 6, integer_scores)
+    k = rng.randint(1, 5)
+    expected = brute_force(slots)[:k]
+
+    found = OutfitSearch(k=k, budget_seconds=60).search(copy_slots(slots))
+    assert [score for score, _ in found] == pytest.approx(expected)
+    for score, outfit in found:
+        assert score == pytest.approx(outfit_score(slots, outfit))
+    # No outfit is returned twice
+    assert len({tuple(map(id, outfit)) for _, outfit in found}) == len(found)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_max_candidates_caps_each_slot(seed):
+    rng = random.Random(100 + seed)
+    slots = random_slots(rng, 3, 12, integer_scores=False)
+    k, cap = 2, 3
+    # The search sees only each slot's best `cap` items (at least k)
+    capped = [
+        Slot(slot.category, slot.items[:max(k, cap)], slot.scores[:max(k, cap)], slot.optional)
+        for slot in slots
+    ]
+
+    search = OutfitSearch(k=k, budget_seconds=60, max_candidates=cap)
+    searched = copy_slots(slots)
+    found = search.search(searched)
+    assert all(len(slot.items) <= max(k, cap) for slot in searched)
+    assert [score for score, _ in found] == pytest.approx(brute_force(capped)[:k])
+
+
+def test_budget_cuts_the_search_off():
+    # Flat scores and no colours leave nothing to prune: 40^5 outfits
+    slots = [
+        Slot(f"slot{number}", [{"item_name": f"item {number}.{i}"} for i in range(40)], [0.0] * 40, optional=False)
+        for number in range(5)
+    ]
+
+    search = OutfitSearch(k=3, budget_seconds=0)
+    found = search.search(slots)
+    assert search.timed_out
+    assert search.nodes == 256
+    # Whatever was found before the deadline is still returned
+    assert found and all(len(outfit) == 5 and score == 0.0 for score, outfit in found)
+
+    search = OutfitSearch(k=3, budget_seconds=60)
+    search.search([Slot(slot.category, slot.items[:4], slot.scores[:4], False) for slot in slots])
+    assert not search.timed_out
+
+
+def test_empty_slots_give_no_outfits():
+    assert OutfitSearch().search([]) == []
+    assert OutfitSearch().search([Slot("Tops", [], [], optional=False)]) == []
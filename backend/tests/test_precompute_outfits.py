@@ -0,0 +1,88 @@
+import pytest
+
+import precompute_outfits
+from app.services.daily_outfit import compose_outfit_of_the_day, daily_rng, wardrobe_fingerprint, weather_bucket
+
+
+class Query:
+    """The slice of the Supabase query builder iter_wardrobes uses, recording .range() calls"""
+
+    def __init__(self, rows, ranges):
+        self.rows = rows
+        self.ranges = ranges
+        self.start = self.end = None
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.ranges.append((start, end))
+        self.start, self.end = start, end
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": [dict(row) for row in self.rows[self.start:self.end + 1]]})()
+
+
+class Supabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.ranges = []
+
+    def table(self, name):
+        assert name == "wardrobe"
+        return Query(self.rows, self.ranges)
+
+
+def rows_for(counts):
+    rows = []
+    for user, count in enumerate(counts):
+        for item in range(count):
+            rows.append({
+                "user_id": f"user{user}", "id": f"{user}-{item}", "category": "Tops",
+                "item_name": f"Shirt {item}", "description": "", "image_url": ""
+            })
+    return rows
+
+
+@pytest.mark.parametrize("total, page_size, expected", [
+    (0, 3, [(0, 2)]),
+    (2, 3, [(0, 2)]),
+    (3, 3, [(0, 2), (3, 5)]),
+    (7, 3, [(0, 2), (3, 5), (6, 8)]),
+])
+def test_iter_pages_walks_ranges_until_a_short_page(total, page_size, expected):
+    database = Supabase(rows_for([total]))
+    pages = list(precompute_outfits.iter_pages(lambda: database.table("wardrobe"), page_size))
+    assert database.ranges == expected
+    assert [row["id"] for page in pages for row in page] == [f"0-{i}" for i in range(total)]
+    assert all(pages)
+
+
+def test_iter_wardrobes_groups_users_across_page_boundaries():
+    counts = [2, 5, 1, 3]
+    database = Supabase(rows_for(counts))
+    wardrobes = list(precompute_outfits.iter_wardrobes(database, page_size=3))
+
+    assert [user_id for user_id, _ in wardrobes] == ["user0", "user1", "user2", "user3"]
+    assert [len(items) for _, items in wardrobes] == counts
+    assert all("user_id" not in item for _, items in wardrobes for item in items)
+
+
+def test_compose_batch_matches_the_live_endpoint():
+    items = [
+        {"id": 1, "category": "Tops", "item_name": "White tee", "description": "", "image_url": ""},
+        {"id": 2, "category": "Bottoms", "item_name": "Navy chinos", "description": "", "image_url": ""},
+        {"id": 3, "category": "Outerwear", "item_name": "Black coat", "description": "", "image_url": ""},
+    ]
+    entry = precompute_outfits.compose_batch("2024-05-01", 45, "light rain", [("u1", items)])["u1"]
+
+    fingerprint = wardrobe_fingerprint(items)
+    assert entry["fingerprint"] == fingerprint
+    assert entry["bucket"] == weather_bucket(45)
+    assert entry["outfit"] == compose_outfit_of_the_day(
+        items, 45, "light rain", rng=daily_rng("u1", "2024-05-01", fingerprint)
+    )
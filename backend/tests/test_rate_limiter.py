@@ -0,0 +1,136 @@
+import fakeredis
+import pytest
+
+from app.services.rate_limiter import InMemoryBackend, RateLimitBackend, RateLimiter, RedisBackend
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class BrokenRedis:
+    """Stands in for an unreachable server"""
+
+    def register_script(self, script):
+        async def run(keys, args):
+            raise ConnectionError("Connection refused")
+        return run
+
+    async def aclose(self):
+        pass
+
+
+def redis_backend(clock, server=None):
+    client = fakeredis.FakeAsyncRedis(server=server or fakeredis.FakeServer())
+    return RedisBackend(client=client, clock=clock)
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_enforces_limit():
+    clock = Clock()
+    backend = redis_backend(clock)
+    results = [await backend.hit("client", 3, 60) for _ in range(5)]
+    assert results == [True, True, True, False, False]
+    assert await backend.hit("other", 3, 60)
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_weights_previous_window():
+    clock = Clock(600.0)
+    backend = redis_backend(clock)
+    for _ in range(4):
+        assert await backend.hit("client", 4, 60)
+
+    # Halfway into the next window, half of the previous window's 4 still count
+    clock.now = 690.0
+    assert await backend.hit("client", 4, 60)
+    assert await backend.hit("client", 4, 60)
+    assert not await backend.hit("client", 4, 60)
+
+    # Two windows later nothing is left
+    clock.now = 780.0
+    assert await backend.hit("client", 4, 60)
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_shares_counts_between_workers():
+    clock = Clock()
+    server = fakeredis.FakeServer()
+    first, second = redis_backend(clock, server), redis_backend(clock, server)
+    assert await first.hit("client", 2, 60)
+    assert await second.hit("client", 2, 60)
+    assert not await first.hit("client", 2, 60)
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_agrees_with_in_memory_backend():
+    clock = Clock(0.0)
+    redis, memory = redis_backend(clock), InMemoryBackend(clock=clock)
+    for step in range(300):
+        clock.now = step * 0.7
+        assert await redis.hit("client", 10, 30) == await memory.hit("client", 10, 30), step
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_falls_back_to_local_counters():
+    backend = RedisBackend(client=BrokenRedis(), clock=Clock())
+    results = [await backend.hit("client", 2, 60) for _ in range(3)]
+    assert results == [True, True, False]
+    assert backend.stats()["errors"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_scopes_have_separate_budgets():
+    limiter = RateLimiter(max_requests=1, window_seconds=60, scopes={"chat": (2, 60)})
+    assert await limiter.is_allowed("client")
+    assert not await limiter.is_allowed("client")
+    assert await limiter.is_allowed("client", "chat")
+    assert await limiter.is_allowed("client", "chat")
+    assert not await limiter.is_allowed("client", "chat")
+
+
+def test_in_memory_backend_slides_over_the_previous_window():
+    clock = Clock(600.0)
+    backend = InMemoryBackend(clock=clock)
+    assert [backend.check("client", 4, 60) for _ in range(5)] == [True, True, True, True, False]
+
+    # A quarter into the next window, three quarters of the previous 4 still count
+    clock.now = 675.0
+    assert backend.check("client", 4, 60)
+    assert not backend.check("client", 4, 60)
+    # Halfway in: 2 left over from the previous window plus 1 already counted
+    clock.now = 690.0
+    assert backend.check("client", 4, 60)
+    assert not backend.check("client", 4, 60)
+
+    # After a skipped window the old counts are gone entirely
+    clock.now = 780.0
+    assert [backend.check("client", 4, 60) for _ in range(5)] == [True, True, True, True, False]
+
+
+def test_in_memory_backend_sweeps_idle_keys():
+    clock = Clock(600.0)
+    backend = InMemoryBackend(sweep_interval=30, clock=clock)
+    backend.check("idle", 5, 60)
+    backend.check("busy", 5, 60)
+
+    # Still inside the window after next, where idle's count could matter
+    clock.now = 700.0
+    backend.check("busy", 5, 60)
+    assert set(backend.counters) == {"idle", "busy"}
+
+    # Two whole windows later idle's counts affect nothing and it is dropped
+    clock.now = 735.0
+    backend.check("busy", 5, 60)
+    assert set(backend.counters) == {"busy"}
+    assert backend.stats() == {"backend": "memory", "keys": 1}
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from app.services.outfit_search import OutfitSearch, build_slots
+from app.services.semantic_matching import HashingEmbedder, ItemEmbeddings, OccasionPrototypes, SemanticRanking
+
+WARDROBE = {
+    "Tops": [
+        {"item_name": "Grey hoodie", "description": "Relaxed cotton hoodie", "category": "Tops"},
+        {"item_name": "Navy blazer", "description": "Tailored wool blazer", "category": "Tops"},
+        {"item_name": "Moisture-wicking tank", "description": "Athletic gym tank top", "category": "Tops"}
+    ],
+    "Bottoms": [
+        {"item_name": "Gym shorts", "description": "Athletic workout shorts", "category": "Bottoms"},
+        {"item_name": "Charcoal slacks", "description": "Dress pants", "category": "Bottoms"}
+    ]
+}
+
+
+def ranking(embeddings=None):
+    embeddings = embeddings or ItemEmbeddings(HashingEmbedder())
+    return SemanticRanking(WARDROBE, embeddings, OccasionPrototypes(embeddings.embedder))
+
+
+def top(ranking, occasion_id, category):
+    items, scores = ranking.item_scores(occasion_id, category)
+    return items[scores.index(max(scores))]["item_name"]
+
+
+def test_hashing_embedder_is_deterministic_and_unit_length():
+    first = HashingEmbedder().embed_matrix(["Navy wool blazer", "Gym shorts"])
+    second = HashingEmbedder().embed_matrix(["Navy wool blazer", "Gym shorts"])
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+
+def test_occasions_pick_fitting_items_offline():
+    semantic = ranking()
+    assert top(semantic, "business", "Tops") == "Navy blazer"
+    assert top(semantic, "business", "Bottoms") == "Charcoal slacks"
+    assert top(semantic, "workout", "Tops") == "Moisture-wicking tank"
+    assert top(semantic, "workout", "Bottoms") == "Gym shorts"
+    assert top(semantic, "casual", "Tops") == "Grey hoodie"
+
+
+def test_item_embeddings_are_reused_by_content():
+    embeddings = ItemEmbeddings(HashingEmbedder())
+    ranking(embeddings)
+    assert embeddings.stats()["misses"] == 5
+    ranking(embeddings)
+    assert embeddings.stats()["hits"] == 5
+    assert embeddings.stats()["misses"] == 5
+
+
+def test_item_scores_span_the_keyword_scale():
+    items, scores = ranking().item_scores("business", "Tops")
+    assert items[scores.index(max(scores))]["item_name"] == "Navy blazer"
+    assert max(scores) == pytest.approx(SemanticRanking.ITEM_SCORE_SPAN)
+    assert min(scores) == 0.0
+
+
+def test_occasion_fit_outweighs_colour_in_outfit_search():
+    wardrobe = {
+        "Tops": [
+            {"item_name": "Red tailored blazer", "description": "Tailored wool blazer", "category": "Tops"},
+            {"item_name": "White gym tank", "description": "Athletic workout tank top", "category": "Tops"}
+        ],
+        "Bottoms": [{"item_name": "Green dress pants", "description": "Tailored slacks", "category": "Bottoms"}]
+    }
+    embeddings = ItemEmbeddings(HashingEmbedder())
+    semantic = SemanticRanking(wardrobe, embeddings, OccasionPrototypes(embeddings.embedder))
+    # Red and green clash, white goes with anything; the blazer still fits business far better
+    (_, outfit), = OutfitSearch(k=1).search(build_slots(semantic, "business", ["Tops", "Bottoms"], []))
+    assert [item["item_name"] for item in outfit] == ["Red tailored blazer", "Green dress pants"]
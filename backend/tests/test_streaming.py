@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from app.services.streaming import Tee, TeeDropped
+
+
+async def source(count: int):
+    for number in range(count):
+        yield bytes([number])
+
+
+async def read(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.asyncio
+async def test_branches_get_every_chunk():
+    tee = Tee(2, max_chunks=2)
+    run = asyncio.create_task(tee.run(source(5)))
+    first, second = await asyncio.gather(read(tee.branch(0)), read(tee.branch(1)))
+    await run
+    assert first == second == bytes(range(5))
+
+
+@pytest.mark.asyncio
+async def test_stalled_branch_is_woken_with_tee_dropped():
+    tee = Tee(2, max_chunks=1, stall_timeout=0.05)
+    stalled = tee.branch(1)
+    run = asyncio.create_task(tee.run(source(5)))
+    assert await read(tee.branch(0)) == bytes(range(5))
+    await run
+
+    # The reader that fell behind fails instead of waiting on its queue forever
+    with pytest.raises(TeeDropped):
+        await asyncio.wait_for(stalled.__anext__(), 1)
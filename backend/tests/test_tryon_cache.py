@@ -0,0 +1,150 @@
+import hashlib
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.services import tryon_cache as module
+from app.services.http_client import HttpClient, RetryPolicy
+from app.services.tryon_cache import TryOnResultCache
+
+AVATAR = b"avatar image bytes" * 100
+SHIRT = b"shirt image bytes" * 100
+
+
+class Storage:
+    """Objects by path, with or without an ETag, recording each request"""
+
+    def __init__(self):
+        self.objects = {
+            "/me.jpg": (AVATAR, '"etag-me"', "image/jpeg"),
+            "/shirt.jpg": (SHIRT, None, "image/jpeg"),
+            "/notes.txt": (b"not an image", None, "text/plain")
+        }
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append((request.method, request.url.path))
+        entry = self.objects.get(request.url.path)
+        if entry is None:
+            return httpx.Response(404, headers={"content-type": "application/json"})
+        body, etag, content_type = entry
+        headers = {"content-type": content_type, "content-length": str(len(body))}
+        if etag:
+            headers["etag"] = etag
+        return httpx.Response(200, headers=headers, content=b"" if request.method == "HEAD" else body)
+
+    def count(self, method, path):
+        return self.requests.count((method, path))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest_asyncio.fixture
+async def storage(monkeypatch):
+    monkeypatch.setattr(RetryPolicy, "delay", lambda self, attempt: 0)
+    clock = Clock()
+    monkeypatch.setattr(module, "time", clock)
+    storage = Storage()
+    storage.clock = clock
+    client = HttpClient(transport=httpx.MockTransport(storage))
+    await client.start()
+    storage.cache = TryOnResultCache(client, fingerprint_ttl=300)
+    yield storage
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_etag_fingerprint_needs_only_a_head_request(storage):
+    fingerprint = await storage.cache.fingerprint("https://storage.test/me.jpg")
+    assert fingerprint == f'etag:"etag-me":{len(AVATAR)}'
+    assert storage.requests == [("HEAD", "/me.jpg")]
+
+
+@pytest.mark.asyncio
+async def test_without_etag_the_body_is_hashed(storage):
+    fingerprint = await storage.cache.fingerprint("https://storage.test/shirt.jpg")
+    assert fingerprint == f"sha256:{hashlib.sha256(SHIRT).hexdigest()}"
+    assert storage.requests == [("HEAD", "/shirt.jpg"), ("GET", "/shirt.jpg")]
+
+
+@pytest.mark.asyncio
+async def test_fingerprints_are_reused_until_the_ttl(storage):
+    cache = storage.cache
+    first = await cache.key("https://storage.test/me.jpg", "https://storage.test/shirt.jpg", "model")
+    assert await cache.key("https://storage.test/me.jpg", "https://storage.test/shirt.jpg", "model") == first
+    assert cache.fingerprint_requests == 2
+
+    # Same content under a new ETag after the ttl: the key follows the content identity
+    storage.clock.now += 301
+    storage.objects["/me.jpg"] = (AVATAR, '"etag-me-v2"', "image/jpeg")
+    assert await cache.key("https://storage.test/me.jpg", "https://storage.test/shirt.jpg", "model") != first
+    assert cache.fingerprint_requests == 4
+    assert storage.count("GET", "/shirt.jpg") == 2
+
+
+@pytest.mark.asyncio
+async def test_key_depends_on_content_and_model(storage):
+    cache = storage.cache
+    key = await cache.key("https://storage.test/me.jpg", "https://storage.test/shirt.jpg", "model")
+    assert await cache.key("https://storage.test/me.jpg", "https://storage.test/shirt.jpg", "other") != key
+    assert await cache.key("https://storage.test/shirt.jpg", "https://storage.test/me.jpg", "model") != key
+
+    storage.clock.now += 301
+    storage.objects["/shirt.jpg"] = (SHIRT + b"edited", None, "image/jpeg")
+    assert await cache.key("https://storage.test/me.jpg", "https://storage.test/shirt.jpg", "model") != key
+
+
+@pytest.mark.asyncio
+async def test_missing_input_raises(storage):
+    with pytest.raises(httpx.HTTPStatusError):
+        await storage.cache.fingerprint("https://storage.test/gone.jpg")
+
+
+@pytest.mark.asyncio
+async def test_find_stored_accepts_only_stored_images(storage):
+    cache = storage.cache
+    assert await cache.find_stored("k1", "https://storage.test/me.jpg") == "https://storage.test/me.jpg"
+    assert cache.get("k1") == "https://storage.test/me.jpg"
+    assert await cache.find_stored("k2", "https://storage.test/gone.jpg") is None
+    assert await cache.find_stored("k3", "https://storage.test/notes.txt") is None
+    assert cache.get("k2") is None and cache.get("k3") is None
+    cache.miss()
+
+    stats = cache.stats()
+    assert (stats["storage_hits"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+@pytest.mark.asyncio
+async def test_find_stored_swallows_transport_errors(monkeypatch):
+    monkeypatch.setattr(RetryPolicy, "delay", lambda self, attempt: 0)
+
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    client = HttpClient(transport=httpx.MockTransport(refuse))
+    await client.start()
+    try:
+        cache = TryOnResultCache(client)
+        assert await cache.find_stored("k", "https://storage.test/me.jpg") is None
+    finally:
+        await client.close()
+
+
+def test_results_lru_and_discard():
+    cache = TryOnResultCache(http_client=None, max_entries=2)
+    cache.put("a", "url-a")
+    cache.put("b", "url-b")
+    assert cache.get("a") == "url-a"
+    cache.put("c", "url-c")
+    assert cache.get("b") is None
+    cache.discard("a")
+    assert cache.get("a") is None
+    assert cache.get("c") == "url-c"
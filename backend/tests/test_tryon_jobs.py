@@ -0,0 +1,182 @@
+import asyncio
+import io
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.services.tryon_jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, LocalTryOnJobQueue, QueueFull
+from app.services.tryon_upstream import StubTryOn, TryOnError
+
+
+def stub_handler(upstream):
+    async def handle(job):
+        return await upstream.generate(job.params["avatar"], job.params["clothing"]), None
+    return handle
+
+
+async def statuses(queue, job_id):
+    return [state["status"] async for state in queue.updates(job_id) if state is not None]
+
+
+@pytest.mark.asyncio
+async def test_job_moves_from_queued_to_running_to_succeeded():
+    queue = LocalTryOnJobQueue(stub_handler(StubTryOn(delay_seconds=0.02)), workers=1)
+    await queue.start()
+    try:
+        job = queue.submit("user", {"avatar": "a.jpg", "clothing": "c.jpg"})
+        assert job.status == QUEUED
+        assert await statuses(queue, job.id) == [QUEUED, RUNNING, SUCCEEDED]
+
+        image = Image.open(io.BytesIO(job.result))
+        assert image.format == "JPEG" and image.size == (384, 512)
+        # The stub renders the same pair the same way
+        assert job.result == await StubTryOn(delay_seconds=0).generate("a.jpg", "c.jpg")
+        assert queue.stats()["succeeded"] == 1
+    finally:
+        await queue.close()
+
+
+class FailingTryOn(StubTryOn):
+    def __init__(self, error):
+        super().__init__(delay_seconds=0)
+        self.error = error
+
+    @asynccontextmanager
+    async def stream(self, avatar_image_url, clothing_image_url):
+        raise self.error
+        yield
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error, status", [
+    (TryOnError("too small to be an image"), 500),
+    (HTTPException(status_code=502, detail="Virtual try-on service failed"), 502),
+])
+async def test_upstream_failure_becomes_failed_state(error, status):
+    queue = LocalTryOnJobQueue(stub_handler(FailingTryOn(error)), workers=1)
+    await queue.start()
+    try:
+        job = queue.submit("user", {"avatar": "a.jpg", "clothing": "c.jpg"})
+        assert (await statuses(queue, job.id))[-1] == FAILED
+        assert job.error_status == status
+        assert job.error == str(getattr(error, "detail", error))
+        assert job.result is None
+        assert queue.stats()["failed"] == 1
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_workers_bound_concurrent_jobs():
+    running = 0
+    peak = 0
+
+    async def handle(job):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return b"image", None
+
+    queue = LocalTryOnJobQueue(handle, workers=3)
+    await queue.start()
+    try:
+        jobs = [queue.submit("user", {}) for _ in range(10)]
+        for job in jobs:
+            await statuses(queue, job.id)
+        assert peak == 3
+        assert all(job.status == SUCCEEDED for job in jobs)
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_and_heartbeats_while_waiting():
+    release = asyncio.Event()
+
+    async def handle(job):
+        await release.wait()
+        return b"image", None
+
+    queue = LocalTryOnJobQueue(handle, workers=1, max_pending=1)
+    await queue.start()
+    try:
+        first = queue.submit("user", {})
+        await asyncio.sleep(0)  # the worker takes the first job off the queue
+        queue.submit("user", {})
+        with pytest.raises(QueueFull):
+            queue.submit("user", {})
+        assert queue.stats()["rejected"] == 1
+
+        updates = queue.updates(first.id, heartbeat_seconds=0.01)
+        assert (await updates.__anext__())["status"] == RUNNING
+        assert await updates.__anext__() is None
+        release.set()
+        assert [state["status"] async for state in updates if state is not None][-1] == SUCCEEDED
+    finally:
+        await queue.close()
+
+
+@pytest.fixture
+def tryon_app(main_module, monkeypatch):
+    monkeypatch.setattr(
+        main_module, "resolve_tryon_inputs",
+        lambda user_id, item_id, item_name: ("https://example.com/me.jpg", "https://example.com/shirt.jpg", "shirt")
+    )
+    with TestClient(main_module.app) as client:
+        yield client
+
+
+def submit(client):
+    photo = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 40, 40)).save(photo, format="JPEG")
+    files = {
+        "avatar_image": ("me.jpg", photo.getvalue(), "image/jpeg"),
+        "clothing_image": ("shirt.jpg", photo.getvalue(), "image/jpeg")
+    }
+    response = client.post("/virtual-try-on/jobs", data={"user_id": "user", "clothing_item_id": "1"}, files=files)
+    assert response.status_code == 202
+    return response.json()
+
+
+def events(client, url):
+    with client.stream("GET", url) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    return [
+        json.loads(line[len("data: "):])
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def test_endpoints_stream_status_and_serve_the_result(tryon_app):
+    job = submit(tryon_app)
+    assert job["status"] == QUEUED
+
+    states = events(tryon_app, job["events_url"])
+    assert states[0]["status"] in (QUEUED, RUNNING)
+    assert states[-1]["status"] == SUCCEEDED
+    assert all(state["job_id"] == job["job_id"] for state in states)
+    assert tryon_app.get(job["status_url"]).json()["status"] == SUCCEEDED
+
+    result = tryon_app.get(job["image_url"])
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "image/jpeg"
+    assert result.content == StubTryOn()._render("https://example.com/me.jpg", "https://example.com/shirt.jpg")
+
+
+def test_endpoints_report_an_upstream_failure(tryon_app, main_module, monkeypatch):
+    monkeypatch.setattr(main_module, "tryon_upstream", FailingTryOn(TryOnError("no image")))
+    job = submit(tryon_app)
+
+    states = events(tryon_app, job["events_url"])
+    assert states[-1]["status"] == FAILED
+    assert states[-1]["error"] == "Virtual try-on service failed, please try again"
+    assert tryon_app.get(job["image_url"]).status_code == 502
+    assert tryon_app.get("/virtual-try-on/jobs/unknown").status_code == 404
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.services.vector_index import NumpyVectorIndex, normalize_rows, top_k_indices
+
+
+def brute_force(vectors: np.ndarray, query: np.ndarray, k: int):
+    scores = [
+        float(np.dot(row, query) / (np.linalg.norm(row) * np.linalg.norm(query)))
+        for row in vectors.astype(np.float64)
+    ]
+    return sorted(range(len(scores)), key=lambda i: -scores[i])[:k], scores
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("k", [1, 3, 10, 200])
+def test_top_k_matches_a_full_sort(seed, k):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(150, 16))
+    query = rng.normal(size=16)
+    index = NumpyVectorIndex(vectors, [f"doc {i}" for i in range(150)])
+
+    found = index.search_by_vector(query, k)
+    expected, scores = brute_force(vectors, query, k)
+    assert [row for row, _ in found] == expected
+    assert [score for _, score in found] == pytest.approx([scores[i] for i in expected], abs=1e-5)
+
+
+def test_top_k_indices_ties():
+    scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1], dtype=np.float32)
+    # Ties within the result keep index order; which of a tie straddling the cut is kept is unspecified
+    assert top_k_indices(scores, 2).tolist() == [1, 3]
+    assert top_k_indices(scores, 3).tolist()[:2] == [1, 3]
+    assert top_k_indices(scores, 3).tolist()[2] in (0, 2)
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 0, 2, 4]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_documents_and_text_queries():
+    class Embedder:
+        def embed_query(self, text):
+            return [1.0, 0.0] if "coat" in text else [0.0, 1.0]
+
+    index = NumpyVectorIndex(
+        [[2.0, 0.1], [0.1, 3.0]], ["Coats layer well", "Sandals suit summer"],
+        [{"source": "winter"}, None], embedding_function=Embedder()
+    )
+    (doc,) = index.similarity_search("which coat?", k=1)
+    assert doc.page_content == "Coats layer well"
+    assert doc.metadata == {"source": "winter"}
+    assert index.similarity_search("shoes", k=1)[0].metadata == {}
+
+
+def test_edge_cases():
+    assert NumpyVectorIndex([], []).search_by_vector([1.0, 0.0]) == []
+    assert NumpyVectorIndex([[1.0, 0.0]], ["a"]).search_by_vector([0.0, 0.0]) == []
+    assert np.allclose(np.linalg.norm(normalize_rows([[3.0, 4.0], [0.0, 0.0]]), axis=1), [1.0, 0.0])
+    with pytest.raises(ValueError):
+        NumpyVectorIndex([[1.0, 0.0]], ["a", "b"])
+    with pytest.raises(RuntimeError):
+        NumpyVectorIndex([[1.0, 0.0]], ["a"]).similarity_search("anything")
@@ -0,0 +1,71 @@
+import pytest
+
+from app.services.wardrobe_index import WardrobeSearchIndex
+from app.services.wardrobe_repository import WardrobeRepository
+from tests.test_wardrobe_invalidations import Supabase
+
+ITEMS = [
+    {"id": 11, "item_name": "Grey Sweatshirt", "description": "Cotton crew neck pullover"},
+    {"id": 12, "item_name": "Denim Jeans", "description": "Straight leg, dark wash"},
+    {"id": 13, "item_name": "blue oxford shirt", "description": "Button-down collar"},
+    {"id": 14, "item_name": "Blue Oxford Shirt", "description": "Slim fit"},
+    {"id": 15, "item_name": "Trench", "description": "Beige waterproof coat with belt"},
+]
+
+
+@pytest.fixture
+def index():
+    return WardrobeSearchIndex(ITEMS)
+
+
+def name_of(item):
+    return item["item_name"] if item is not None else None
+
+
+@pytest.mark.parametrize("query, expected", [
+    # Exact name beats an earlier case-insensitive match
+    ("Blue Oxford Shirt", "Blue Oxford Shirt"),
+    # Case-insensitive exact name
+    ("DENIM JEANS", "Denim Jeans"),
+    # Name containing the whole query
+    ("oxford", "blue oxford shirt"),
+    ("jean", "Denim Jeans"),
+    ("shirt", "Grey Sweatshirt"),
+    # A longer word of the query inside a name; the first such word wins
+    ("my favourite jeans please", "Denim Jeans"),
+    ("trench coat", "Trench"),
+    ("washed sweatshirt", "Grey Sweatshirt"),
+    # Short words are ignored, so the description decides
+    ("waterproof coat", "Trench"),
+    ("dark wash", "Denim Jeans"),
+    ("pink tutu", None),
+    ("", None),
+])
+def test_match_cascade(index, query, expected):
+    assert name_of(index.best_match(query)) == expected
+
+
+def test_name_tiers_win_over_descriptions():
+    index = WardrobeSearchIndex([
+        {"id": 1, "item_name": "Parka", "description": "A wool coat"},
+        {"id": 2, "item_name": "Wool coat", "description": "Long"},
+    ])
+    assert name_of(index.best_match("wool coat")) == "Wool coat"
+    assert name_of(index.best_match("coat")) == "Wool coat"
+
+
+def test_lookup_by_clothing_item_id(index):
+    assert index.get(12)["item_name"] == "Denim Jeans"
+    assert index.get("12")["item_name"] == "Denim Jeans"
+    assert index.get("99") is None
+
+
+def test_repository_search_index_resolves_ids_and_names():
+    repository = WardrobeRepository(Supabase(ITEMS))
+    index = repository.search_index("user")
+    assert repository.search_index("user") is index
+    assert index.get("13")["item_name"] == "blue oxford shirt"
+    assert name_of(index.best_match("sweat")) == "Grey Sweatshirt"
+
+    repository.invalidate("user")
+    assert repository.search_index("user") is not index
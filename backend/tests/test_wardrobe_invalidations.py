@@ -0,0 +1,74 @@
+import threading
+
+import fakeredis
+
+from app.services.wardrobe_repository import RedisWardrobeInvalidations, WardrobeRepository
+
+
+class Table:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": list(self.rows)})()
+
+
+class Supabase:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        return Table(self.rows)
+
+
+def test_invalidation_reaches_other_workers_only():
+    server = fakeredis.FakeServer()
+    rows = [{"id": "1", "item_name": "Red shirt"}]
+    database = Supabase(rows)
+    workers = [WardrobeRepository(database) for _ in range(2)]
+    buses = [RedisWardrobeInvalidations(client=fakeredis.FakeRedis(server=server)) for _ in range(2)]
+    applied = [[], []]
+    done = threading.Event()
+
+    def apply(index):
+        def handle(user_id):
+            applied[index].append(user_id)
+            workers[index].invalidate(user_id)
+            done.set()
+        return handle
+
+    try:
+        for index, bus in enumerate(buses):
+            bus.start(apply(index))
+        for worker in workers:
+            assert worker.get_items("user")[0]["item_name"] == "Red shirt"
+
+        rows[0] = {"id": "1", "item_name": "Blue shirt"}
+        workers[0].invalidate("user")
+        buses[0].publish("user")
+
+        assert done.wait(3.0)
+        assert applied == [[], ["user"]]
+        assert workers[1].get_items("user")[0]["item_name"] == "Blue shirt"
+    finally:
+        for bus in buses:
+            bus.close()
+
+
+def test_publish_failure_is_counted_not_raised():
+    class BrokenRedis:
+        def publish(self, channel, message):
+            raise ConnectionError("Connection refused")
+
+        def close(self):
+            pass
+
+    bus = RedisWardrobeInvalidations(client=BrokenRedis())
+    bus.publish("user")
+    assert bus.stats()["errors"] == 1
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.services import weather_cache as module
+from app.services.weather_cache import WeatherCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(module, "time", clock)
+    return clock
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+        self.fail = False
+
+    async def fetch(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("weather service down")
+        return {"temp": 60 + self.calls}
+
+
+KEY = ("city", "new york", "us")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(clock):
+    cache, upstream = WeatherCache(), Upstream()
+    upstream.release.clear()
+    lookups = [asyncio.create_task(cache.get(KEY, upstream.fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+    assert await asyncio.gather(*lookups) == [{"temp": 61}] * 5
+    assert upstream.calls == 1
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_reaches_every_waiter_and_is_not_cached(clock):
+    cache, upstream = WeatherCache(), Upstream()
+    upstream.fail = True
+    upstream.release.clear()
+    lookups = [asyncio.create_task(cache.get(KEY, upstream.fetch)) for _ in range(3)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+    results = await asyncio.gather(*lookups, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    upstream.fail = False
+    assert await cache.get(KEY, upstream.fetch) == {"temp": 62}
+
+
+@pytest.mark.asyncio
+async def test_stale_reading_is_served_while_refreshing(clock):
+    cache, upstream = WeatherCache(ttl_seconds=600, stale_seconds=1800), Upstream()
+    assert await cache.get(KEY, upstream.fetch) == {"temp": 61}
+    clock.now += 599
+    assert await cache.get(KEY, upstream.fetch) == {"temp": 61}
+    assert upstream.calls == 1
+
+    clock.now += 2
+    # Past the TTL: the old reading comes back at once and a refresh starts behind it
+    assert await cache.get(KEY, upstream.fetch) == {"temp": 61}
+    await asyncio.gather(*cache._refresh_tasks)
+    assert upstream.calls == 2
+    assert await cache.get(KEY, upstream.fetch) == {"temp": 62}
+    assert cache.stats()["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_reading_is_refetched_and_kept_as_a_fallback(clock):
+    cache, upstream = WeatherCache(ttl_seconds=600, stale_seconds=1800), Upstream()
+    await cache.get(KEY, upstream.fetch)
+    clock.now += 600 + 1800 + 1
+    assert await cache.get(KEY, upstream.fetch) == {"temp": 62}
+
+    clock.now += 600 + 1800 + 1
+    # An upstream error value isn't cached; the expired reading beats it
+    error = {"error": "timeout"}
+    result = await cache.get(KEY, lambda: asyncio.sleep(0, error), is_cacheable=lambda value: "error" not in value)
+    assert result == {"temp": 62}
+
+
+def test_keys_snap_coordinates_and_normalise_cities():
+    cache = WeatherCache(grid_degrees=0.1)
+    assert cache.key(None, None, 40.7128, -74.0060) == cache.key(None, None, 40.68, -73.97)
+    assert cache.key(None, None, 40.7128, -74.0060) != cache.key(None, None, 40.9, -74.0)
+    assert cache.key(" New York ", "US", None, None) == cache.key("new york", "us", None, None)
@@ -232,6 +232,7 @@ export const VirtualTryOn: React.FC = () => {
       formData.append('clothing_image', clothingFile)
       formData.append('as_image', 'false')
       formData.append('clothing_item_name', item.item_name || '')
+      formData.append('clothing_item_id', String(item.id))
 
       const response = await fetch(`${config.backendUrl}${config.apiEndpoints.tryOn}`, {
         method: 'POST',
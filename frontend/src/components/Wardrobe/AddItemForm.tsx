@@ -5,6 +5,7 @@ import { useNavigate, useLocation } from 'react-router-dom'
 import { useAuth } from '../../contexts/AuthContext'
 import { config } from '../../lib/config'
 import { supabase } from '../../lib/supabase'
+import { notifyWardrobeChanged } from '../../lib/api'
 
 interface WardrobeItem {
   id: string
@@ -238,6 +239,7 @@ export const AddItemForm: React.FC = () => {
         if (insertError) throw insertError
       }
 
+      notifyWardrobeChanged(contextUser?.id)
       navigate('/wardrobe')
     } catch (error) {
       // Production-ready error logging
@@ -5,6 +5,7 @@ import { useNavigate } from 'react-router-dom';
 
 import { useAuth } from '../../contexts/AuthContext';
 import { supabase } from '../../lib/supabase';
+import { notifyWardrobeChanged } from '../../lib/api';
 import { getCachedModels, clearModelsCache } from '../../utils/prefetchUtils';
 import { BlurUpImage } from '../ui/BlurUpImage';
 
@@ -158,6 +159,7 @@ const WardrobeGrid: React.FC = () => {
         .eq('id', itemId);
 
       if (error) throw error;
+      notifyWardrobeChanged(user?.id);
       
       // Remove from local state
       setItems(items.filter(item => item.id !== itemId));
@@ -206,6 +208,7 @@ const WardrobeGrid: React.FC = () => {
         .eq('id', editItem.id);
 
       if (error) throw error;
+      notifyWardrobeChanged(user?.id);
 
       // Update local state
       setItems(items.map(item =>
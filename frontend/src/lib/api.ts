@@ -1,4 +1,5 @@
 import { supabase } from './supabase'
+import { config } from './config'
 
 interface WardrobeItem {
   id: string
@@ -175,4 +176,22 @@ export const deleteImage = async (bucket: string, path: string): Promise<void> =
   } catch (error) {
     throw new Error('Failed to delete image')
   }
-}
\ No newline at end of file
+}
+// Tell the backend to drop its cached copy of the user's wardrobe after an edit
+export const notifyWardrobeChanged = async (userId: string | undefined): Promise<void> => {
+  if (!userId) return
+  try {
+    const { data: { session } } = await supabase.auth.getSession()
+    if (!session) return
+    await fetch(`${config.backendUrl}${config.apiEndpoints.wardrobeInvalidate}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${session.access_token}`
+      },
+      body: JSON.stringify({ user_id: userId })
+    })
+  } catch (error) {
+    // The backend cache expires on its own; a failed notification is not fatal
+  }
+}
@@ -22,7 +22,8 @@ export const config = {
     tryOn: '/virtual-try-on',
     weather: '/api/weather',
     outfitOfTheDay: '/api/outfit-of-the-day',
-    tryonHistory: '/api/tryon-history'
+    tryonHistory: '/api/tryon-history',
+    wardrobeInvalidate: '/api/wardrobe/invalidate'
   },
   // Feature flags
   features: {